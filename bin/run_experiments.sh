@@ -2,33 +2,21 @@
 
 set -e
 
-classical_opt_dir=params/ready
-instance_dir=data/raw
+manifest=params/manifest.json
 
-for inst in $instance_dir/*
-do
-    for classical in $classical_opt_dir/*
-    do
-      local_run_path=$classical
-      echo -e "Submitting job: \n Instance: \t $inst \n Run File: \t $classical"
-
-      # Define run_file and log_file
-      classical_prefix="params/ready/"
-      classical_no_prefix=${classical#"$classical_prefix"}
-      
-      inst_file=$(awk -F/ '{split($NF,temp,"."); print temp[1]}' <<<"$inst")
-      printf "%s\n" "$inst_file"
+# Jobs are written by run/create_params_grid.py, each with its predicted memory
+# and walltime. Small tasks share a job and run one after another. The job
+# lines are read in full first, so a missing or invalid manifest stops the
+# script before anything is submitted.
+jobs=$(python -m qaoa_three_sat.utils.job_manifest $manifest --track_mlflow=True)
 
-      # Identify number of qubits
-      # N_QUBITS=$(echo $local_run_path | grep -oP '(?<=n_qubits)[0-9]+')
-
-      NodeMemory=10GB
-      echo "Allocating node $NodeMemory memory for experiment $classical"
+while read -r job_name job_memory job_walltime tasks
+do
+    # A manifest without jobs leaves a single empty line
+    [ -z "$job_name" ] && continue
+    echo -e "Submitting job: $job_name \n Memory: \t $job_memory \n Walltime: \t $job_walltime \n Tasks: \t $tasks"
 
-      exp_run_params="$inst_file:$classical_no_prefix:True"
-      log_file="logs/$exp_run_params.log"
-      # Run experiment as an instance of the singularity container
-      echo $exp_run_params
-      sbatch --mem $NodeMemory --output=$log_file bin/run-experiments.slurm $exp_run_params
-    done
-done
+    log_file="logs/$job_name.log"
+    # Run experiments as instances of the singularity container
+    sbatch --job-name=$job_name --mem $job_memory --time $job_walltime --output=$log_file bin/run-experiments.slurm $tasks
+done <<< "$jobs"
@@ -4,36 +4,11 @@ set -e
 
 classical_opt_dir=params/ready
 instance_dir=data/raw
-
-for inst in $instance_dir/*
-do
-    for classical in $classical_opt_dir/*
-    do
-      local_run_path=$classical
-      echo -e "Submitting job: \n Instance: \t $inst \n Run File: \t $classical"
-
-      # Define run_file and log_file
-      classical_prefix="params/ready/"
-      classical_no_prefix=${classical#"$classical_prefix"}
-      
-      inst_file=$(awk -F/ '{split($NF,temp,"."); print temp[1]}' <<<"$inst")
-      printf "%s\n" "$inst_file"
-
-      # Identify number of qubits
-      # N_QUBITS=$(echo $local_run_path | grep -oP '(?<=n_qubits)[0-9]+')
-      echo "Allocating node $NodeMemory memory for experiment $classical"
-
-      exp_run_params="$inst_file:$classical_no_prefix:True"
-      log_file="logs/$exp_run_params.log"
-      # Run experiment as an instance of the singularity container
-      echo $exp_run_params
-      INSTANCE_FILENAME=$inst_file
-      PARAMETER_FILE_FOR_QAOA=$classical_no_prefix
-      MLFLOW_TRACKING="True"
-      python run/main_qaoa.py --instance=$INSTANCE_FILENAME --params_file=$PARAMETER_FILE_FOR_QAOA --track_mlflow=$MLFLOW_TRACKING || True
-    done
-    # Move instance to complete
-    mv $inst data/complete/
-done
-# Move params to complete
-mv params/ready/* params/complete/
\ No newline at end of file
+# The qiskit Aer simulator, as run/main_qaoa.py uses by default
+backend=qiskit
+
+# Run every (instance, params file) pair on a process pool of one worker per CPU.
+# Instances and params whose every run succeeded are moved to complete, the
+# rest are left to retry and the script fails.
+echo -e "Running experiments: \n Instances: \t $instance_dir \n Run Files: \t $classical_opt_dir \n Backend: \t $backend"
+python -m qaoa_three_sat.simulation.scheduler --params_dir=$classical_opt_dir --instance_dir=$instance_dir --backend=$backend --track_mlflow=True --move_completed=True
@@ -0,0 +1,360 @@
+"""
+Binary instance format
+
+An instance is stored as NumPy arrays instead of the JSON string nested in a
+JSON list of ``data/raw``: for each of the single, double and triple qubit
+rotations an array of qubit indices and an array of coefficients, plus the
+number of qubits and the satisfying assignment as a basis state index.
+
+A single instance is an ``.npz`` file. An ``InstanceArchive`` is a directory
+holding many instances concatenated into one set of ``.npy`` arrays with an
+offset array per rotation type, which is memory-mapped so that opening it
+reads only the names and offsets, and loading an instance is a slice.
+
+Author: Vivek Katial
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+
+from qaoa_three_sat.rotation.rotations import Rotations
+from qaoa_three_sat.utils.metrics import basis_bitstring, basis_index
+from qaoa_three_sat.utils.qc_helpers import clean_instance, load_raw_instance
+
+# Rotation types and the number of qubits they act on
+ROTATION_TYPES = {"single": 1, "double": 2, "triple": 3}
+
+BINARY_SUFFIX = ".npz"
+ARCHIVE_METADATA_FILE = "archive.json"
+ARCHIVE_VERSION = 1
+
+
+class BinaryInstance:
+    """An instance of QAOA 3SAT stored as arrays
+
+    Attributes
+    ----------
+        n_qubits : int
+            The number of qubits
+        sat_index : int
+            Basis state index of the satisfying assignment
+        qubits : dict
+            Rotation type to a ``n_rotations x interactions`` array of qubit indices
+        coefficients : dict
+            Rotation type to the coefficient of each rotation
+    """
+
+    def __init__(self, n_qubits, sat_index, qubits, coefficients):
+        self.n_qubits = int(n_qubits)
+        self.sat_index = int(sat_index)
+        self.qubits = qubits
+        self.coefficients = coefficients
+
+    @property
+    def sat_assgn(self):
+        """The satisfying assignment as a bitstring (as in the JSON instances)"""
+        return basis_bitstring(self.sat_index, self.n_qubits)
+
+    @classmethod
+    def from_raw(cls, raw_instance):
+        """Convert an instance loaded by ``qc_helpers.load_raw_instance``
+
+        :param raw_instance: The raw instance as a dictionary
+        :type raw_instance: dict
+        :returns: The instance
+        :rtype: {BinaryInstance}
+        """
+        n_qubits, single, double, triple, sat_assgn = clean_instance(raw_instance)
+        qubits, coefficients = {}, {}
+        for name, rotations in zip(ROTATION_TYPES, [single, double, triple]):
+            rotations = Rotations(rotations, n_qubits)
+            qubits[name], coefficients[name] = rotations.to_arrays()
+        return cls(n_qubits, basis_index(sat_assgn), qubits, coefficients)
+
+    def rotations(self):
+        """The `Rotations` objects of the instance
+
+        :returns: n_qubits, single_rotations, double_rotations, triple_rotations, sat_assgn
+        :rtype: {int, Rotations, Rotations, Rotations, str}
+        """
+        single, double, triple = [
+            Rotations.from_arrays(
+                self.qubits[name], self.coefficients[name], self.n_qubits
+            )
+            for name in ROTATION_TYPES
+        ]
+        return self.n_qubits, single, double, triple, self.sat_assgn
+
+    def save(self, filename):
+        """Write the instance to an ``.npz`` file
+
+        :param filename: Path of the file
+        :type filename: str
+        """
+        arrays = {"n_qubits": self.n_qubits, "sat_index": self.sat_index}
+        for name in ROTATION_TYPES:
+            arrays["%s_qubits" % name] = self.qubits[name]
+            arrays["%s_coefficients" % name] = self.coefficients[name]
+        np.savez(filename, **arrays)
+
+    @classmethod
+    def load(cls, filename):
+        """Read an instance written by ``save``
+
+        :param filename: Path of the file
+        :type filename: str
+        :returns: The instance
+        :rtype: {BinaryInstance}
+        """
+        with np.load(filename) as arrays:
+            return cls(
+                arrays["n_qubits"],
+                arrays["sat_index"],
+                {name: arrays["%s_qubits" % name] for name in ROTATION_TYPES},
+                {name: arrays["%s_coefficients" % name] for name in ROTATION_TYPES},
+            )
+
+
+def convert_instance(json_file, binary_file=None):
+    """Convert a JSON instance file into the binary format
+
+    :param json_file: Path of the JSON instance
+    :type json_file: str
+    :param binary_file: Path of the binary instance, defaults to ``json_file`` with an ``.npz`` suffix
+    :type binary_file: str, optional
+    :returns: Path of the binary instance
+    :rtype: {str}
+    """
+    if binary_file is None:
+        binary_file = os.path.splitext(json_file)[0] + BINARY_SUFFIX
+    BinaryInstance.from_raw(load_raw_instance(json_file)).save(binary_file)
+    return binary_file
+
+
+class InstanceArchive:
+    """A memory-mapped archive of many instances
+
+    Attributes
+    ----------
+        archive_dir : str
+            Directory of the archive
+        names : numpy.ndarray
+            Name of each instance, in archive order
+        n_qubits : numpy.ndarray
+            Number of qubits of each instance
+        sat_index : numpy.ndarray
+            Basis state index of the satisfying assignment of each instance
+    """
+
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+        with open(os.path.join(archive_dir, ARCHIVE_METADATA_FILE)) as infile:
+            metadata = json.load(infile)
+        if metadata["version"] != ARCHIVE_VERSION:
+            raise ValueError(
+                "Unsupported instance archive version %s" % metadata["version"]
+            )
+
+        self.names = self._load("names")
+        self.n_qubits = self._load("n_qubits")
+        self.sat_index = self._load("sat_index")
+        self._offsets, self._qubits, self._coefficients = {}, {}, {}
+        for name in ROTATION_TYPES:
+            self._offsets[name] = self._load("%s_offsets" % name)
+            self._qubits[name] = self._load("%s_qubits" % name)
+            self._coefficients[name] = self._load("%s_coefficients" % name)
+        self._index = {name: i for i, name in enumerate(self.names.tolist())}
+
+    def _load(self, array):
+        """Memory-map one of the archive arrays"""
+        return np.load(os.path.join(self.archive_dir, array + ".npy"), mmap_mode="r")
+
+    @staticmethod
+    def is_archive(path):
+        """Whether a directory is an instance archive"""
+        return os.path.isfile(os.path.join(path, ARCHIVE_METADATA_FILE))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, key):
+        """An instance by name or position, its arrays are views of the archive"""
+        i = self._index[key] if isinstance(key, str) else int(key)
+        qubits, coefficients = {}, {}
+        for name in ROTATION_TYPES:
+            start, stop = self._offsets[name][i : i + 2]
+            qubits[name] = self._qubits[name][start:stop]
+            coefficients[name] = self._coefficients[name][start:stop]
+        return BinaryInstance(self.n_qubits[i], self.sat_index[i], qubits, coefficients)
+
+    @classmethod
+    def build(cls, instances, archive_dir):
+        """Write instances into a new archive
+
+        The arrays are written into a private temporary directory which is then
+        renamed into place, so readers never see a partially written archive.
+
+        :param instances: Pairs of instance name and `BinaryInstance`
+        :type instances: iterable
+        :param archive_dir: Directory of the archive, which must not exist yet
+        :type archive_dir: str
+        :returns: The archive
+        :rtype: {InstanceArchive}
+        """
+        names, n_qubits, sat_index = [], [], []
+        qubits = {name: [] for name in ROTATION_TYPES}
+        coefficients = {name: [] for name in ROTATION_TYPES}
+        for instance_name, instance in instances:
+            names.append(instance_name)
+            n_qubits.append(instance.n_qubits)
+            sat_index.append(instance.sat_index)
+            for name in ROTATION_TYPES:
+                qubits[name].append(instance.qubits[name])
+                coefficients[name].append(instance.coefficients[name])
+
+        arrays = {
+            "names": np.array(names, dtype=str),
+            "n_qubits": np.array(n_qubits, dtype=np.int32),
+            "sat_index": np.array(sat_index, dtype=np.int64),
+        }
+        for name, interactions in ROTATION_TYPES.items():
+            counts = [len(coefficient) for coefficient in coefficients[name]]
+            arrays["%s_offsets" % name] = np.concatenate(([0], np.cumsum(counts)))
+            arrays["%s_qubits" % name] = np.concatenate(
+                [np.empty((0, interactions), dtype=np.int16)] + qubits[name]
+            ).astype(np.int16)
+            arrays["%s_coefficients" % name] = np.concatenate(
+                [np.empty(0)] + coefficients[name]
+            )
+
+        parent = os.path.dirname(os.path.abspath(archive_dir))
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".archive.", dir=parent)
+        try:
+            for array, values in arrays.items():
+                np.save(os.path.join(tmp_dir, array + ".npy"), values)
+            metadata = {"version": ARCHIVE_VERSION, "n_instances": len(names)}
+            with open(os.path.join(tmp_dir, ARCHIVE_METADATA_FILE), "w") as outfile:
+                json.dump(metadata, outfile)
+            os.rename(tmp_dir, archive_dir)
+        finally:
+            if os.path.isdir(tmp_dir):
+                shutil.rmtree(tmp_dir)
+        return cls(archive_dir)
+
+    @classmethod
+    def from_directory(cls, instance_dir, archive_dir):
+        """Build an archive from a directory of JSON (or ``.npz``) instances
+
+        :param instance_dir: Directory of the instances
+        :type instance_dir: str
+        :param archive_dir: Directory of the archive, which must not exist yet
+        :type archive_dir: str
+        :returns: The archive
+        :rtype: {InstanceArchive}
+        """
+
+        def instances():
+            for filename in sorted(os.listdir(instance_dir)):
+                name, suffix = os.path.splitext(filename)
+                path = os.path.join(instance_dir, filename)
+                if suffix == ".json":
+                    yield name, BinaryInstance.from_raw(load_raw_instance(path))
+                elif suffix == BINARY_SUFFIX:
+                    yield name, BinaryInstance.load(path)
+
+        return cls.build(instances(), archive_dir)
+
+
+@lru_cache(maxsize=8)
+def open_archive(archive_dir):
+    """Open an archive once per process, archives are never modified after they are built
+
+    :param archive_dir: Directory of the archive
+    :type archive_dir: str
+    :returns: The archive
+    :rtype: {InstanceArchive}
+    """
+    return InstanceArchive(archive_dir)
+
+
+def load_instance(instance_dir, instance_name):
+    """Load the rotations of an instance from an archive or a directory
+
+    ``instance_dir`` may be an ``InstanceArchive``, or a directory holding
+    ``<instance_name>.npz`` or ``<instance_name>.json``.
+
+    :param instance_dir: Archive or directory of the instances
+    :type instance_dir: str
+    :param instance_name: Instance filename, without its suffix
+    :type instance_name: str
+    :returns: n_qubits, single_rotations, double_rotations, triple_rotations, sat_assgn
+    :rtype: {int, Rotations, Rotations, Rotations, str}
+    """
+    if InstanceArchive.is_archive(instance_dir):
+        return open_archive(instance_dir)[instance_name].rotations()
+
+    binary_file = os.path.join(instance_dir, instance_name + BINARY_SUFFIX)
+    if os.path.isfile(binary_file):
+        return BinaryInstance.load(binary_file).rotations()
+
+    raw_instance = load_raw_instance(
+        os.path.join(instance_dir, instance_name + ".json")
+    )
+    n_qubits, single, double, triple, sat_assgn = clean_instance(raw_instance)
+    return (
+        n_qubits,
+        Rotations(single, n_qubits),
+        Rotations(double, n_qubits),
+        Rotations(triple, n_qubits),
+        sat_assgn,
+    )
+
+
+def list_instances(instance_dir):
+    """Names of the instances in an archive or a directory
+
+    :param instance_dir: Archive or directory of the instances
+    :type instance_dir: str
+    :returns: Instance names
+    :rtype: {list}
+    """
+    if InstanceArchive.is_archive(instance_dir):
+        return open_archive(instance_dir).names.tolist()
+    return sorted(
+        {
+            os.path.splitext(filename)[0]
+            for filename in os.listdir(instance_dir)
+            if os.path.splitext(filename)[1] in (".json", BINARY_SUFFIX)
+        }
+    )
+
+
+if __name__ == "__main__":
+    """Convert a directory of JSON instances into an archive"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-i", "--instance_dir", type=str, default="data/raw", help="JSON instances"
+    )
+    parser.add_argument(
+        "-o", "--archive_dir", type=str, required=True, help="Archive to create"
+    )
+    args = parser.parse_args()
+
+    archive = InstanceArchive.from_directory(args.instance_dir, args.archive_dir)
+    print("Archived %s instances in %s" % (len(archive), args.archive_dir))
@@ -0,0 +1,259 @@
+"""
+Compiled instances for QAOA 3SAT
+
+An instance is compiled once into its diagonal problem Hamiltonian plus some
+derived data. Compiled instances can be persisted in a content-addressed
+on-disk cache so that every process evaluating the same instance memory-maps
+the same Hamiltonian instead of rebuilding it.
+
+Author: Vivek Katial
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+# Environment variable used to locate the on-disk cache if none is given
+CACHE_DIR_ENV = "QAOA_CACHE_DIR"
+
+HAMILTONIAN_FILE = "hamiltonian.npy"
+METADATA_FILE = "metadata.json"
+
+# Number of basis states whose Hamiltonian entries are built at a time, and
+# the bytes of temporaries needed per basis state of a chunk
+BUILD_CHUNK_SIZE = 2 ** 18
+BUILD_BYTES_PER_STATE = 40
+
+# Compiled instances kept in memory by each process, most recently used last,
+# bounded by their number and by the total size of their Hamiltonians
+MEMORY_CACHE_SIZE = 8
+MEMORY_CACHE_BYTES = 512 * 2 ** 20
+_MEMORY_CACHE = OrderedDict()
+
+
+def instance_key(n_qubits, single_rotations, double_rotations, triple_rotations):
+    """Content hash identifying an instance
+
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :param single_rotations: `Rotations` Object for Single Qubit Rotations
+    :type single_rotations: Rotations
+    :param double_rotations: `Rotations` Object for Double Qubit Rotations
+    :type double_rotations: Rotations
+    :param triple_rotations: `Rotations` Object for Triple Qubit Rotations
+    :type triple_rotations: Rotations
+    :returns: A hex digest of the rotation lists and number of qubits
+    :rtype: {str}
+    """
+    payload = json.dumps(
+        {
+            "n_qubits": n_qubits,
+            "single_rotations": single_rotations.rotations,
+            "double_rotations": double_rotations.rotations,
+            "triple_rotations": triple_rotations.rotations,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompiledInstance:
+    """The Hamiltonian of an instance and the data derived from it
+
+    Attributes
+    ----------
+        key : str
+            Content hash of the instance (see ``instance_key``)
+        n_qubits : int
+            The number of qubits
+        hamiltonian : numpy.ndarray
+            The diagonal of the problem Hamiltonian (possibly memory-mapped)
+        ground_energy : float
+            The smallest eigenvalue of the Hamiltonian
+        ground_states : numpy.ndarray
+            Basis state indices attaining the ground energy. For a unique
+            solution instance this is the index of the satisfying assignment
+    """
+
+    def __init__(self, key, n_qubits, hamiltonian, ground_energy, ground_states):
+        self.key = key
+        self.n_qubits = n_qubits
+        self.hamiltonian = hamiltonian
+        self.ground_energy = ground_energy
+        self.ground_states = np.asarray(ground_states, dtype=np.int64)
+
+    @classmethod
+    def from_hamiltonian(cls, key, n_qubits, hamiltonian):
+        """Derive the ground state data of a freshly built Hamiltonian"""
+        ground_energy = float(hamiltonian.min())
+        # Same tolerance as ``np.isclose``, without its Hamiltonian-sized temporaries
+        tolerance = 1e-8 + 1e-5 * abs(ground_energy)
+        ground_states = []
+        for start in range(0, len(hamiltonian), BUILD_CHUNK_SIZE):
+            chunk = hamiltonian[start : start + BUILD_CHUNK_SIZE]
+            ground_states.append(
+                start + np.flatnonzero(chunk <= ground_energy + tolerance)
+            )
+        ground_states = np.concatenate(ground_states)
+        return cls(key, n_qubits, hamiltonian, ground_energy, ground_states)
+
+    @property
+    def sat_index(self):
+        """Index of the satisfying assignment, if it is unique"""
+        if len(self.ground_states) != 1:
+            return None
+        return int(self.ground_states[0])
+
+    def save(self, cache_dir):
+        """Write the compiled instance into ``cache_dir``
+
+        The files are written into a private temporary directory which is then
+        renamed into place, so concurrent writers never expose a partially
+        written entry. If another process got there first its entry is kept.
+
+        :param cache_dir: Root directory of the cache
+        :type cache_dir: str
+        :returns: Path of the cache entry
+        :rtype: {str}
+        """
+        entry = os.path.join(cache_dir, self.key)
+        if os.path.isdir(entry):
+            return entry
+
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".%s." % self.key, dir=cache_dir)
+        try:
+            np.save(os.path.join(tmp_dir, HAMILTONIAN_FILE), self.hamiltonian)
+            metadata = {
+                "key": self.key,
+                "n_qubits": self.n_qubits,
+                "ground_energy": self.ground_energy,
+                "ground_states": self.ground_states.tolist(),
+            }
+            with open(os.path.join(tmp_dir, METADATA_FILE), "w") as outfile:
+                json.dump(metadata, outfile)
+            os.rename(tmp_dir, entry)
+        except OSError:
+            # Lost the race to another process writing the same entry
+            if not os.path.isdir(entry):
+                raise
+        finally:
+            if os.path.isdir(tmp_dir):
+                shutil.rmtree(tmp_dir)
+        return entry
+
+    @classmethod
+    def load(cls, cache_dir, key):
+        """Memory-map a compiled instance from the cache
+
+        :param cache_dir: Root directory of the cache
+        :type cache_dir: str
+        :param key: Content hash of the instance
+        :type key: str
+        :returns: The compiled instance, or None if it is not cached
+        :rtype: {CompiledInstance}
+        """
+        entry = os.path.join(cache_dir, key)
+        if not os.path.isdir(entry):
+            return None
+        with open(os.path.join(entry, METADATA_FILE)) as infile:
+            metadata = json.load(infile)
+        hamiltonian = np.load(os.path.join(entry, HAMILTONIAN_FILE), mmap_mode="r")
+        return cls(
+            key,
+            metadata["n_qubits"],
+            hamiltonian,
+            metadata["ground_energy"],
+            metadata["ground_states"],
+        )
+
+
+def build_memory_estimate(n_qubits):
+    """Peak memory of the temporaries of building a Hamiltonian, in bytes
+
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :returns: The bytes needed next to the Hamiltonian itself
+    :rtype: {int}
+    """
+    return min(BUILD_CHUNK_SIZE, 2 ** n_qubits) * BUILD_BYTES_PER_STATE
+
+
+def compile_instance(
+    n_qubits, single_rotations, double_rotations, triple_rotations, cache_dir=None
+):
+    """Compile an instance, reusing the in-memory and on-disk caches when available
+
+    The last ``MEMORY_CACHE_SIZE`` instances compiled by a process, up to
+    ``MEMORY_CACHE_BYTES`` of Hamiltonians, are kept in memory, so a
+    long-running worker evaluating the same instance many times only compiles
+    (or loads) it once. Larger instances are never kept. Their Hamiltonians
+    are read-only.
+
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :param single_rotations: `Rotations` Object for Single Qubit Rotations
+    :type single_rotations: Rotations
+    :param double_rotations: `Rotations` Object for Double Qubit Rotations
+    :type double_rotations: Rotations
+    :param triple_rotations: `Rotations` Object for Triple Qubit Rotations
+    :type triple_rotations: Rotations
+    :param cache_dir: Cache directory, defaults to ``$QAOA_CACHE_DIR``. If
+        neither is set the instance is compiled in memory only
+    :type cache_dir: str, optional
+    :returns: The compiled instance
+    :rtype: {CompiledInstance}
+    """
+    if cache_dir is None:
+        cache_dir = os.environ.get(CACHE_DIR_ENV)
+
+    key = instance_key(n_qubits, single_rotations, double_rotations, triple_rotations)
+
+    if key in _MEMORY_CACHE:
+        _MEMORY_CACHE.move_to_end(key)
+        return _MEMORY_CACHE[key]
+
+    compiled = None
+    if cache_dir:
+        compiled = CompiledInstance.load(cache_dir, key)
+    if compiled is None:
+        compiled = _build_compiled(
+            key, n_qubits, single_rotations, double_rotations, triple_rotations
+        )
+        if cache_dir:
+            compiled.save(cache_dir)
+            # Share the page cache with every other process using this entry
+            compiled = CompiledInstance.load(cache_dir, key)
+
+    compiled.hamiltonian.flags.writeable = False
+    _remember(key, compiled)
+    return compiled
+
+
+def _remember(key, compiled):
+    """Keep a compiled instance in memory, evicting the least recently used ones"""
+    if compiled.hamiltonian.nbytes > MEMORY_CACHE_BYTES:
+        return
+    _MEMORY_CACHE[key] = compiled
+    while len(_MEMORY_CACHE) > MEMORY_CACHE_SIZE or (
+        sum(entry.hamiltonian.nbytes for entry in _MEMORY_CACHE.values())
+        > MEMORY_CACHE_BYTES
+    ):
+        _MEMORY_CACHE.popitem(last=False)
+
+
+def _build_compiled(
+    key, n_qubits, single_rotations, double_rotations, triple_rotations
+):
+    """Build the Hamiltonian of an instance from its rotations, a chunk at a time"""
+    hamiltonian = np.zeros(2 ** n_qubits)
+    for start in range(0, len(hamiltonian), BUILD_CHUNK_SIZE):
+        chunk = hamiltonian[start : start + BUILD_CHUNK_SIZE]
+        for rotations in [single_rotations, double_rotations, triple_rotations]:
+            rotations.add_to_hamiltonian(chunk, start)
+    return CompiledInstance.from_hamiltonian(key, n_qubits, hamiltonian)
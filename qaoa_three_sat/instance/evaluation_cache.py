@@ -0,0 +1,120 @@
+"""
+Memoisation of cost function evaluations
+
+Optimisers regularly evaluate the same (or numerically identical) angles
+again, e.g. in Nelder-Mead shrink steps and restarts or finite-difference
+gradients. An ``EvaluationCache`` maps angle vectors, quantised to a tolerance,
+to their energy so that these repeats skip the simulation. Keys also hold the
+content hash of the instance (see ``compiled.instance_key``), so one cache can
+be shared by several instances.
+
+Author: Vivek Katial
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+
+class EvaluationCache:
+    """A bounded least-recently-used cache of energies keyed on angles
+
+    Attributes
+    ----------
+        max_entries : int
+            Maximum number of energies kept
+        tol : float
+            Angles are rounded to a multiple of ``tol`` to form the key
+        max_statevectors : int
+            Number of most recently stored entries that also keep their statevector
+        hits : int
+            Number of lookups answered from the cache
+        misses : int
+            Number of lookups that needed a simulation
+    """
+
+    def __init__(self, max_entries=4096, tol=1e-10, max_statevectors=4):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        if tol <= 0:
+            raise ValueError("tol must be positive")
+        self.max_entries = max_entries
+        self.tol = tol
+        self.max_statevectors = max_statevectors
+        self.hits = 0
+        self.misses = 0
+        self._energies = OrderedDict()
+        self._statevectors = OrderedDict()
+
+    def __len__(self):
+        return len(self._energies)
+
+    def key(self, angles, instance_key=None):
+        """The cache key of an angle vector
+
+        :param angles: Angles ``[alpha_0, ..., beta_0, ...]``
+        :type angles: list
+        :param instance_key: Content hash of the instance the angles are evaluated on, defaults to None
+        :type instance_key: str, optional
+        :returns: The instance key and the angles quantised to multiples of ``tol``
+        :rtype: {tuple}
+        """
+        quantised = np.round(np.asarray(angles, dtype=float) / self.tol)
+        return (instance_key,) + tuple(quantised.astype(np.int64).tolist())
+
+    def get(self, angles, instance_key=None):
+        """Look up the energy of an angle vector
+
+        :param angles: Angles ``[alpha_0, ..., beta_0, ...]``
+        :type angles: list
+        :param instance_key: Content hash of the instance, defaults to None
+        :type instance_key: str, optional
+        :returns: The energy and statevector (None if it was not kept), or None on a miss
+        :rtype: {tuple}
+        """
+        key = self.key(angles, instance_key)
+        if key not in self._energies:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._energies.move_to_end(key)
+        return self._energies[key], self._statevectors.get(key)
+
+    def put(self, angles, energy, statevector=None, instance_key=None):
+        """Store the energy (and optionally the statevector) of an angle vector
+
+        :param angles: Angles ``[alpha_0, ..., beta_0, ...]``
+        :type angles: list
+        :param energy: The energy at those angles
+        :type energy: float
+        :param statevector: The final statevector, defaults to None
+        :type statevector: numpy.ndarray, optional
+        :param instance_key: Content hash of the instance, defaults to None
+        :type instance_key: str, optional
+        """
+        key = self.key(angles, instance_key)
+        self._energies[key] = energy
+        self._energies.move_to_end(key)
+        if len(self._energies) > self.max_entries:
+            evicted, _ = self._energies.popitem(last=False)
+            self._statevectors.pop(evicted, None)
+
+        if statevector is not None and self.max_statevectors > 0:
+            self._statevectors[key] = statevector
+            self._statevectors.move_to_end(key)
+            if len(self._statevectors) > self.max_statevectors:
+                self._statevectors.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        """Fraction of lookups answered from the cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        """Empty the cache and reset the counters"""
+        self._energies.clear()
+        self._statevectors.clear()
+        self.hits = 0
+        self.misses = 0
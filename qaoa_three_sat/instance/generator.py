@@ -0,0 +1,269 @@
+"""
+Random Exact Cover 3 instance generator
+
+A clause ``(i, j, k)`` of Exact Cover 3 is satisfied when exactly one of the
+bits ``i, j, k`` is 1. Clauses are sampled one at a time, and after each one
+the assignments still satisfying every clause are filtered with vectorised bit
+operations over the surviving basis states, until a single solution is left
+(or none, and the instance is rejected).
+
+The penalty of a clause, 1 unless exactly one bit is 1, is expanded in Pauli Z
+terms as ``5/8 - 1/8 (Z_i + Z_j + Z_k) + 1/8 (Z_i Z_j + Z_i Z_k + Z_j Z_k)
++ 3/8 Z_i Z_j Z_k``. The coefficients are summed over the clauses and the
+constant is dropped, giving the rotations in the format of ``data/raw``.
+
+Author: Vivek Katial
+"""
+
+import json
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+
+from qaoa_three_sat.utils.metrics import basis_bitstring
+
+# Pauli Z coefficients of the penalty of one clause, by number of qubits
+CLAUSE_COEFFICIENTS = {1: -0.125, 2: 0.125, 3: 0.375}
+# Constant of the penalty of one clause, dropped from the Hamiltonian
+CLAUSE_OFFSET = 0.625
+
+# Clauses sampled before an instance is rejected, as a multiple of n_qubits
+MAX_CLAUSES_FACTOR = 10
+
+
+def satisfying_assignments(clauses, n_qubits, candidates=None):
+    """Basis state indices satisfying every clause
+
+    :param clauses: A ``n_clauses x 3`` array of qubit indices
+    :type clauses: numpy.ndarray
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :param candidates: Only check these basis states, defaults to all ``2^n``
+    :type candidates: numpy.ndarray, optional
+    :returns: The satisfying basis state indices
+    :rtype: {numpy.ndarray}
+    """
+    if candidates is None:
+        candidates = np.arange(2 ** n_qubits, dtype=np.int64)
+    for clause in np.atleast_2d(clauses):
+        if not len(candidates):
+            break
+        n_true = sum((candidates >> int(qubit)) & 1 for qubit in clause)
+        candidates = candidates[n_true == 1]
+    return candidates
+
+
+def count_solutions(clauses, n_qubits):
+    """Number of assignments satisfying every clause
+
+    :param clauses: A ``n_clauses x 3`` array of qubit indices
+    :type clauses: numpy.ndarray
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :returns: The number of solutions
+    :rtype: {int}
+    """
+    return len(satisfying_assignments(clauses, n_qubits))
+
+
+def sample_unique_instance(n_qubits, rng, max_clauses=None):
+    """Sample clauses until exactly one assignment satisfies them all
+
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :param rng: Random number generator
+    :type rng: numpy.random.Generator
+    :param max_clauses: Clauses sampled before restarting, defaults to ``MAX_CLAUSES_FACTOR * n_qubits``
+    :type max_clauses: int, optional
+    :returns: The clauses, the satisfying basis state index and the number of rejected attempts
+    :rtype: {numpy.ndarray, int, int}
+    """
+    if max_clauses is None:
+        max_clauses = MAX_CLAUSES_FACTOR * n_qubits
+
+    n_rejected = 0
+    while True:
+        clauses = []
+        candidates = np.arange(2 ** n_qubits, dtype=np.int64)
+        while len(candidates) > 1 and len(clauses) < max_clauses:
+            clause = np.sort(rng.choice(n_qubits, size=3, replace=False))
+            clauses.append(clause)
+            candidates = satisfying_assignments(clause, n_qubits, candidates)
+        if len(candidates) == 1:
+            return np.array(clauses), int(candidates[0]), n_rejected
+        n_rejected += 1
+
+
+def exact_cover_rotations(clauses):
+    """Single, double and triple qubit rotations of the clause penalties
+
+    :param clauses: A ``n_clauses x 3`` array of qubit indices
+    :type clauses: numpy.ndarray
+    :returns: single, double and triple rotations as lists of ``{"qubits", "coefficient"}``
+    :rtype: {list, list, list}
+    """
+    coefficients = {size: defaultdict(float) for size in CLAUSE_COEFFICIENTS}
+    for clause in np.sort(clauses, axis=1).tolist():
+        for size, coefficient in CLAUSE_COEFFICIENTS.items():
+            for qubits in combinations(clause, size):
+                coefficients[size][qubits] += coefficient
+
+    return [
+        [
+            {"qubits": list(qubits), "coefficient": coefficient}
+            for qubits, coefficient in sorted(coefficients[size].items())
+            if coefficient != 0
+        ]
+        for size in sorted(CLAUSE_COEFFICIENTS)
+    ]
+
+
+def make_raw_instance(clauses, n_qubits, sat_index):
+    """The raw instance dictionary, as read by ``qc_helpers.clean_instance``
+
+    :param clauses: A ``n_clauses x 3`` array of qubit indices
+    :type clauses: numpy.ndarray
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :param sat_index: Basis state index of the satisfying assignment
+    :type sat_index: int
+    :returns: The raw instance
+    :rtype: {dict}
+    """
+    single, double, triple = exact_cover_rotations(clauses)
+    return {
+        "n_qubits": n_qubits,
+        "n_clauses": len(clauses),
+        "clauses": np.asarray(clauses).tolist(),
+        "sat_assgn": basis_bitstring(sat_index, n_qubits),
+        "single_qubit": {"rotations": [single]},
+        "double_qubit": {"rotations": [double]},
+        "triple_qubit": {"rotations": [triple]},
+    }
+
+
+def write_raw_instance(raw_instance, filename):
+    """Write a raw instance in the format of ``data/raw`` (a JSON string in a JSON list)
+
+    :param raw_instance: The raw instance
+    :type raw_instance: dict
+    :param filename: Path of the file
+    :type filename: str
+    """
+    with open(filename, "w") as outfile:
+        json.dump([json.dumps(raw_instance)], outfile)
+
+
+def _generate_chunk(n_qubits, seeds, max_clauses):
+    """Generate one instance per seed"""
+    raw_instances = []
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        clauses, sat_index, _ = sample_unique_instance(n_qubits, rng, max_clauses)
+        raw_instances.append(make_raw_instance(clauses, n_qubits, sat_index))
+    return raw_instances
+
+
+def generate_instances(
+    n_qubits, n_instances, seed=0, n_workers=None, max_clauses=None, chunk_size=64
+):
+    """Generate unique solution Exact Cover 3 instances in parallel
+
+    Every instance has its own child of a ``numpy.random.SeedSequence``, so
+    the instances only depend on ``seed`` and their position, not on the
+    number of workers.
+
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :param n_instances: Number of instances
+    :type n_instances: int
+    :param seed: Seed of the whole set of instances, defaults to 0
+    :type seed: int, optional
+    :param n_workers: Number of worker processes, defaults to one per CPU (1 to run serially)
+    :type n_workers: int, optional
+    :param max_clauses: Clauses sampled before an attempt is rejected, defaults to ``MAX_CLAUSES_FACTOR * n_qubits``
+    :type max_clauses: int, optional
+    :param chunk_size: Number of instances per task, defaults to 64
+    :type chunk_size: int, optional
+    :returns: The raw instances, in seed order
+    :rtype: {list}
+    """
+    seeds = np.random.SeedSequence([seed, n_qubits]).spawn(n_instances)
+    chunks = [seeds[i : i + chunk_size] for i in range(0, n_instances, chunk_size)]
+
+    if n_workers == 1:
+        results = [_generate_chunk(n_qubits, chunk, max_clauses) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_workers, mp_context=multiprocessing.get_context("fork")
+        ) as pool:
+            results = list(
+                pool.map(
+                    _generate_chunk,
+                    [n_qubits] * len(chunks),
+                    chunks,
+                    [max_clauses] * len(chunks),
+                )
+            )
+    return [raw_instance for chunk in results for raw_instance in chunk]
+
+
+def instance_name(n_qubits, seed, index):
+    """Name of a generated instance"""
+    return "ec3_n%s_s%s_%06d" % (n_qubits, seed, index)
+
+
+if __name__ == "__main__":
+    """Generate instances into data/raw, or into an instance archive"""
+
+    import argparse
+    from qaoa_three_sat.instance.binary import BinaryInstance, InstanceArchive
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--n_qubits", type=int, required=True, help="Qubits")
+    parser.add_argument(
+        "-N", "--n_instances", type=int, default=100, help="Number of instances"
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Random seed")
+    parser.add_argument(
+        "-w",
+        "--n_workers",
+        type=int,
+        default=None,
+        help="Number of worker processes, defaults to one per CPU",
+    )
+    parser.add_argument(
+        "-o", "--output_dir", type=str, default="data/raw", help="Instance directory"
+    )
+    parser.add_argument(
+        "-a",
+        "--archive_dir",
+        type=str,
+        default=None,
+        help="Write an instance archive instead of JSON files",
+    )
+    args = parser.parse_args()
+
+    raw_instances = generate_instances(
+        args.n_qubits, args.n_instances, seed=args.seed, n_workers=args.n_workers
+    )
+    names = [
+        instance_name(args.n_qubits, args.seed, i) for i in range(len(raw_instances))
+    ]
+
+    if args.archive_dir:
+        InstanceArchive.build(
+            zip(names, map(BinaryInstance.from_raw, raw_instances)), args.archive_dir
+        )
+        print("Archived %s instances in %s" % (len(names), args.archive_dir))
+    else:
+        os.makedirs(args.output_dir, exist_ok=True)
+        for name, raw_instance in zip(names, raw_instances):
+            write_raw_instance(
+                raw_instance, os.path.join(args.output_dir, name + ".json")
+            )
+        print("Wrote %s instances to %s" % (len(names), args.output_dir))
@@ -0,0 +1,227 @@
+"""
+Symmetries of the QAOA angle domain of an instance
+
+The energy of an instance is unchanged by
+
+- ``alpha_i -> alpha_i + alpha_period`` when every gap between eigenvalues of
+  the Hamiltonian is a multiple of ``2 pi / alpha_period`` (e.g. integer
+  clause counts give ``alpha_period = 2 pi``),
+- ``beta_i -> beta_i + 2 pi``, or ``beta_i -> beta_i + pi`` when the Hamiltonian
+  is invariant under flipping every bit,
+- ``(alpha, beta) -> (-alpha, -beta)`` (time reversal), as the Hamiltonian and
+  the mixer are real.
+
+These are used to restrict landscapes and random initial points to a
+fundamental domain, and to map optimised angles to a canonical form.
+
+Author: Vivek Katial
+"""
+
+from fractions import Fraction
+from math import gcd, pi
+
+import numpy as np
+
+# Largest denominator allowed when recognising the Hamiltonian's eigenvalue
+# gaps as rational numbers
+MAX_DENOMINATOR = 1000
+
+# Number of Hamiltonian entries scanned at a time, and the bytes of
+# temporaries needed per entry of a chunk
+CHUNK_SIZE = 2 ** 18
+SCAN_BYTES_PER_STATE = 24
+
+
+def rational_gcd(values, max_denominator=MAX_DENOMINATOR, tol=1e-9):
+    """Greatest common divisor of a set of (rational) real numbers
+
+    :param values: Positive values
+    :type values: numpy.ndarray
+    :param max_denominator: Largest denominator to try, defaults to ``MAX_DENOMINATOR``
+    :type max_denominator: int, optional
+    :param tol: Tolerance when matching a value to a fraction, defaults to 1e-9
+    :type tol: float, optional
+    :returns: The largest ``g`` such that every value is an integer multiple of
+        ``g``, or None if a value is not rational within ``max_denominator``
+    :rtype: {float}
+    """
+    fractions = []
+    for value in values:
+        fraction = Fraction(float(value)).limit_denominator(max_denominator)
+        if abs(float(fraction) - value) > tol * max(1.0, abs(value)):
+            return None
+        fractions.append(fraction)
+
+    denominator = 1
+    for fraction in fractions:
+        denominator = (
+            denominator * fraction.denominator // gcd(denominator, fraction.denominator)
+        )
+    numerator = 0
+    for fraction in fractions:
+        numerator = gcd(numerator, int(fraction * denominator))
+    return numerator / denominator
+
+
+def scan_memory_estimate(n_qubits):
+    """Peak memory of the temporaries of ``AngleSymmetry.from_hamiltonian``, in bytes
+
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :returns: The bytes needed next to the Hamiltonian itself
+    :rtype: {int}
+    """
+    return min(CHUNK_SIZE, 2 ** n_qubits) * SCAN_BYTES_PER_STATE
+
+
+class AngleSymmetry:
+    """The symmetries of the angle domain of an instance
+
+    Attributes
+    ----------
+        alpha_period : float
+            Period of the energy in each alpha (None if there is none to find)
+        beta_period : float
+            Period of the energy in each beta, ``pi`` or ``2 pi``
+        flip_symmetric : bool
+            Whether the Hamiltonian is invariant under flipping every bit
+    """
+
+    def __init__(self, alpha_period, beta_period, flip_symmetric=False):
+        self.alpha_period = alpha_period
+        self.beta_period = beta_period
+        self.flip_symmetric = flip_symmetric
+
+    @classmethod
+    def from_hamiltonian(cls, hamiltonian):
+        """Analyse the diagonal of an instance's problem Hamiltonian
+
+        :param hamiltonian: The diagonal of the problem Hamiltonian
+        :type hamiltonian: numpy.ndarray
+        :returns: The symmetries of the instance
+        :rtype: {AngleSymmetry}
+        """
+        hamiltonian = np.asarray(hamiltonian)
+        ground_energy = hamiltonian.min()
+
+        # Scan in chunks, so that no temporary is the size of the Hamiltonian
+        gaps = set()
+        flip_symmetric = True
+        size = len(hamiltonian)
+        for start in range(0, size, CHUNK_SIZE):
+            chunk = hamiltonian[start : start + CHUNK_SIZE]
+            gaps.update(np.unique(np.round(chunk - ground_energy, 9)).tolist())
+            # Flipping every bit reverses the order of the basis states
+            flipped = hamiltonian[size - start - len(chunk) : size - start][::-1]
+            flip_symmetric = flip_symmetric and bool(np.allclose(chunk, flipped))
+        gaps = np.array(sorted(gaps))
+        gaps = gaps[gaps > 0]
+
+        alpha_period = None
+        if len(gaps):
+            spacing = rational_gcd(gaps)
+            if spacing is not None:
+                alpha_period = 2 * pi / spacing
+
+        beta_period = pi if flip_symmetric else 2 * pi
+        return cls(alpha_period, beta_period, flip_symmetric)
+
+    def _alpha_half_width(self):
+        """Half of the alpha range of the fundamental domain"""
+        return pi if self.alpha_period is None else self.alpha_period / 2
+
+    def domain(self, n_rounds):
+        """Bounds of a fundamental domain of the ``2 n_rounds`` angles
+
+        Time reversal is removed by keeping ``alpha_0`` non-negative. Without an
+        ``alpha_period`` the alphas have no fundamental domain, and the bounds
+        only give the ``(-pi, pi)`` range random starts and landscapes cover.
+
+        :param n_rounds: Number of rounds
+        :type n_rounds: int
+        :returns: A ``(low, high)`` pair per angle ``[alpha_0, ..., beta_0, ...]``
+        :rtype: {list}
+        """
+        alpha_width = self._alpha_half_width()
+        beta_width = self.beta_period / 2
+        bounds = [(-alpha_width, alpha_width)] * n_rounds
+        bounds[0] = (0.0, alpha_width)
+        return bounds + [(-beta_width, beta_width)] * n_rounds
+
+    def landscape_bounds(self, time_reversal=True):
+        """Bounds of a fundamental domain of a landscape over one round
+
+        :param time_reversal: Set to False if the fixed angles of the other
+            rounds are not all zero, so time reversal does not map the slice
+            onto itself, defaults to True
+        :type time_reversal: bool, optional
+        :returns: The alpha and beta bounds
+        :rtype: {tuple, tuple}
+        """
+        alpha_width = self._alpha_half_width()
+        beta_width = self.beta_period / 2
+        alpha_bounds = (0.0 if time_reversal else -alpha_width, alpha_width)
+        return alpha_bounds, (-beta_width, beta_width)
+
+    def canonical_angles(self, angles, n_rounds):
+        """Map angles to their equivalent in the fundamental domain
+
+        Without an ``alpha_period`` the alphas are not wrapped, only time
+        reversal is removed, so they may lie outside the alpha bounds of
+        ``domain(n_rounds)``.
+
+        :param angles: Angles ``[alpha_0, ..., beta_0, ...]``
+        :type angles: list
+        :param n_rounds: Number of rounds
+        :type n_rounds: int
+        :returns: Angles with the same energy, inside ``domain(n_rounds)`` if
+            ``alpha_period`` is known
+        :rtype: {numpy.ndarray}
+        """
+        angles = np.array(angles, dtype=float)
+        all_periods = np.array(
+            [self.alpha_period or np.inf] * n_rounds + [self.beta_period] * n_rounds
+        )
+        periodic = np.isfinite(all_periods)
+        periods, half = all_periods[periodic], all_periods[periodic] / 2
+
+        def wrap(x):
+            x[periodic] = (x[periodic] + half) % periods - half
+            return x
+
+        angles = wrap(angles)
+        # Remove time reversal, the first non-zero angle is made positive
+        nonzero = np.flatnonzero(np.abs(angles) > 1e-12)
+        if len(nonzero) and angles[nonzero[0]] < 0:
+            angles = wrap(-angles)
+            # Wrapping maps a leading -period/2 back onto itself, use the
+            # equivalent +period/2 at the edge of the domain instead
+            if angles[nonzero[0]] < 0:
+                angles[nonzero[0]] += all_periods[nonzero[0]]
+        return angles
+
+
+def unfold_landscape(alphas, betas, energies):
+    """Extend a landscape over ``alpha >= 0`` to negative alpha by time reversal
+
+    :param alphas: The alpha grid, starting at 0
+    :type alphas: numpy.ndarray
+    :param betas: The beta grid, symmetric about 0
+    :type betas: numpy.ndarray
+    :param energies: A ``len(alphas) x len(betas)`` array of energies
+    :type energies: numpy.ndarray
+    :raises ValueError: If the grids are not of this form
+    :returns: The alpha grid, the beta grid and the energies over ``-alphas[-1] <= alpha``
+    :rtype: {numpy.ndarray, numpy.ndarray, numpy.ndarray}
+    """
+    alphas, betas = np.asarray(alphas), np.asarray(betas)
+    if alphas[0] != 0 or not np.allclose(betas, -betas[::-1]):
+        raise ValueError("Landscape must start at alpha = 0 and be symmetric in beta")
+
+    # E(-alpha, beta) = E(alpha, -beta)
+    mirrored = energies[:0:-1, ::-1]
+    return (
+        np.concatenate((-alphas[:0:-1], alphas)),
+        betas,
+        np.concatenate((mirrored, energies)),
+    )
@@ -5,14 +5,25 @@ Author: Vivek Katial
 """
 
 # External Modules
+# qiskit and pandas are imported where they are used, so importing this module
+# is cheap, and runs on the native NumPy engines only import qiskit if the
+# circuit is built (e.g. to print or draw it)
 import numpy as np
-import pandas as pd
-from qiskit import Aer, IBMQ
-from qiskit import QuantumCircuit, execute
-import mlflow
 
 # Custom Modules
+from qaoa_three_sat.instance.compiled import build_memory_estimate, compile_instance
+from qaoa_three_sat.instance.symmetry import AngleSymmetry, scan_memory_estimate
+from qaoa_three_sat.instance.trace import OptimisationTrace
 from qaoa_three_sat.rotation.rotations import Rotations
+from qaoa_three_sat.simulation.chunked import ChunkedStatevector
+from qaoa_three_sat.simulation.statevector import (
+    DEFAULT_BATCH_MEMORY,
+    NUMPY_BACKEND,
+    energy_and_gradient,
+    evaluate_batch,
+    simulate_qaoa,
+)
+from qaoa_three_sat.utils.metrics import probabilities, state_metrics
 from qaoa_three_sat.utils.qc_helpers import calculate_rotation_angle_theta
 from qaoa_three_sat.optimiser.nelder_mead import NelderMead
 from qaoa_three_sat.optimiser.cma_es import CMA_ES
@@ -51,12 +62,25 @@ class QAOAInstance3SAT:
             A list of angle values for beta
         backend : object
             An object representing where the simulation will run (e.g. `Aer.get_backend('statevector_simulator'))
+            or ``"numpy"`` to use the native NumPy statevector engine, or ``"numpy-large[:precision]"``
+            (or a `ChunkedStatevector`) for the memory-lean engine. Defaults to the
+            `qiskit` statevector simulator, resolved when the instance is created
         statevector : list
             An array of complex numbers representing the 2^n state vector
         hamiltonian : np.array()
-            A `numpy` array containing the problem Hamiltonian
+            A `numpy` vector containing the diagonal of the problem Hamiltonian
+        compiled : CompiledInstance
+            The compiled instance holding the Hamiltonian and its ground state data
+        symmetry : AngleSymmetry
+            The symmetries of the angle domain, found from the Hamiltonian
+        eval_cache : EvaluationCache
+            Optional cache of ``cost_function`` evaluations (None to disable)
+        cache_dir : str
+            Directory of the on-disk compiled instance cache (defaults to ``$QAOA_CACHE_DIR``)
         quantum_circuit : object
             A `qiskit` quantum circuit object
+        circuit_template : object
+            The circuit with a `qiskit` ``Parameter`` for each round's alpha and beta, transpiled for the backend
         energy : float
             The energy cost function value being minimised
         pdf : list
@@ -65,18 +89,23 @@ class QAOAInstance3SAT:
             A string representing the binary string for the satisfying assignment
         track_optimiser : bool
             A boolean on whether or not tracking of the classical optimizer should be enabled
+        trace : OptimisationTrace
+            Array-backed record of every evaluation of the cost function
         d_alpha : list
-            An array containing the alpha angle settings at each iteration e.g. ``[[a_0, a_1], ... ]``
+            An array containing the alpha angle settings at each iteration e.g. ``[[a_0, a_1], ... ]`` (read from ``trace``)
         d_beta : list
-            An array containing the beta angle settings at each iteration e.g. ``[[b_0, b_1], ... ]``
+            An array containing the beta angle settings at each iteration e.g. ``[[b_0, b_1], ... ]`` (read from ``trace``)
         d_energy : list
-            An array containing the energy angle settings at each iteration e.g. ``[e_1, ..., e_n]``
+            An array containing the energy angle settings at each iteration e.g. ``[e_1, ..., e_n]`` (read from ``trace``)
         d_instance : pandas.DataFrame()
             A pandas dataframe object with data
         disp : bool
             Set to True to print convergence messages.
         mlflow : bool
             Set to True to track results on the MLFlow Server
+        warm_start_history : list
+            A ``dict`` per earlier level of a warm started run, with its
+            ``n_rounds``, optimal ``alpha`` and ``beta``, ``energy`` and ``classical_iter``
     """
 
     def __init__(
@@ -94,7 +123,10 @@ class QAOAInstance3SAT:
         track_optimiser=False,
         disp=False,
         mlflow=False,
-        backend=Aer.get_backend("statevector_simulator"),
+        backend=None,
+        cache_dir=None,
+        eval_cache=None,
+        trace_length=None,
     ):
 
         self.n_qubits = n_qubits
@@ -111,24 +143,36 @@ class QAOAInstance3SAT:
         self.sat_assgn = sat_assgn
 
         # Tracking attributes
-        self.d_alpha = []
-        self.d_beta = []
-        self.d_energy = []
+        self.trace = OptimisationTrace(n_rounds, max_length=trace_length)
         self.disp = disp
         self.mlflow = mlflow
+        self.warm_start_history = []
 
         # Quantum SubRoutine Settings
         self.n_rounds = n_rounds
         self.circuit_init = False
         self.alpha = alpha
         self.beta = beta
+        if backend is None:
+            from qiskit import Aer
+
+            backend = Aer.get_backend("statevector_simulator")
+        elif isinstance(backend, str) and ChunkedStatevector.is_backend_name(backend):
+            backend = ChunkedStatevector.from_name(backend)
         self.backend = backend
         self.statevector = None
         self.pdf = None
         self.hamiltonian = None
+        self.compiled = None
+        self.symmetry = None
+        self.cache_dir = cache_dir
+        self.eval_cache = eval_cache
 
         # Metric settings
         self.quantum_circuit = None
+        self.circuit_template = None
+        self.alpha_parameters = None
+        self.beta_parameters = None
         self.d_instance = None
         self.energy = 0
 
@@ -282,101 +326,228 @@ class QAOAInstance3SAT:
             raise TypeError("sat_assgn must be a string")
         self._sat_assgn = value
 
+    @property
+    def native_backend(self):
+        """Whether the circuit is simulated by the native NumPy engine"""
+        return isinstance(self.backend, str) and self.backend == NUMPY_BACKEND
+
+    @property
+    def large_backend(self):
+        """Whether the circuit is simulated in place by the memory-lean engine"""
+        return isinstance(self.backend, ChunkedStatevector)
+
+    def memory_estimate(self):
+        """Peak memory of the memory-lean engine for this instance, in bytes
+
+        :returns: The estimate of ``ChunkedStatevector.memory_estimate`` with the
+            ``build`` temporaries of compiling the instance and scanning its
+            symmetries, or None for other backends
+        :rtype: {dict}
+        """
+        if not self.large_backend:
+            return None
+        estimate = self.backend.memory_estimate(
+            self.n_qubits, gradient=self.classical_opt_alg == "bfgs"
+        )
+        estimate["build"] = max(
+            build_memory_estimate(self.n_qubits), scan_memory_estimate(self.n_qubits)
+        )
+        estimate["total"] += estimate["build"]
+        return estimate
+
     def initiate_circuit(self):
         """A function to initiate circuit as a qiskit QC circuit object.
         ...
         :return: An initialised quantum circuit with hadmards across all qubits
         :rtype: qiskit.circuit.quantumcircuit.QuantumCircuit
         """
+        from qiskit import QuantumCircuit
+
         self.circuit_init = True
         self.quantum_circuit = QuantumCircuit(self.n_qubits, self.n_qubits)
         self.quantum_circuit.h(range(self.n_qubits))
         self.quantum_circuit.barrier()
         return self.quantum_circuit
 
-    def add_single_rotations(self, n_round):
+    def add_single_rotations(self, n_round, alpha=None):
         """ Adding single qubit rotations to circuit"""
+        if alpha is None:
+            alpha = self.alpha[n_round]
         # Apply single qubit rotations
         for qubit in self.single_rotations.rotations:
-            theta = calculate_rotation_angle_theta(
-                self.alpha[n_round], qubit["coefficient"]
-            )
+            theta = calculate_rotation_angle_theta(alpha, qubit["coefficient"])
             self.quantum_circuit.rz(theta, qubit["qubits"][0])
 
-    def add_double_rotations(self, n_round):
+    def add_double_rotations(self, n_round, alpha=None):
         """ Adding two qubit rotations to circuit"""
+        if alpha is None:
+            alpha = self.alpha[n_round]
 
         # Apply double qubit rotations
         for qubit in self.double_rotations.rotations:
-            theta = calculate_rotation_angle_theta(
-                self.alpha[n_round], qubit["coefficient"]
-            )
+            theta = calculate_rotation_angle_theta(alpha, qubit["coefficient"])
             # Apply on Gate Z_i Z_j
             self.quantum_circuit.cx(qubit["qubits"][0], qubit["qubits"][1])
             self.quantum_circuit.rz(theta, qubit["qubits"][1])
             self.quantum_circuit.cx(qubit["qubits"][0], qubit["qubits"][1])
 
-    def add_triple_rotations(self, n_round):
+    def add_triple_rotations(self, n_round, alpha=None):
         """Adding three qubit rotation terms into circuit"""
+        if alpha is None:
+            alpha = self.alpha[n_round]
 
         # Apply 3 qubit rotations
         for qubit in self.triple_rotations.rotations:
-            theta = calculate_rotation_angle_theta(
-                self.alpha[n_round], qubit["coefficient"]
-            )
+            theta = calculate_rotation_angle_theta(alpha, qubit["coefficient"])
             self.quantum_circuit.cx(qubit["qubits"][0], qubit["qubits"][1])
             self.quantum_circuit.cx(qubit["qubits"][1], qubit["qubits"][2])
             self.quantum_circuit.rz(theta, qubit["qubits"][2])
             self.quantum_circuit.cx(qubit["qubits"][1], qubit["qubits"][2])
             self.quantum_circuit.cx(qubit["qubits"][0], qubit["qubits"][1])
 
-    def close_round(self, n_round):
+    def close_round(self, n_round, beta=None):
         """Closing the round of a quantum circuit (then measuring)
 
         :param n_round: Number of rounds to build the circuit for
         :type n_round: int
+        :param beta: Angle beta for the round, defaults to ``self.beta[n_round]``
+        :type beta: float, optional
         """
+        if beta is None:
+            beta = self.beta[n_round]
         self.quantum_circuit.barrier()
         # Apply X rotations
-        self.quantum_circuit.rx(self.beta[n_round], range(self.n_qubits))
+        self.quantum_circuit.rx(beta, range(self.n_qubits))
         self.quantum_circuit.barrier()
         # self.quantum_circuit.measure(range(self.n_qubits), range(self.n_qubits))
 
-    def build_circuit(self):
+    def build_circuit(self, alpha=None, beta=None):
         """
         Class method to build the quantum circuit.
+
+        :param alpha: Angles alpha for each round, defaults to ``self.alpha``
+        :type alpha: list, optional
+        :param beta: Angles beta for each round, defaults to ``self.beta``
+        :type beta: list, optional
         """
+        if alpha is None:
+            alpha = self.alpha
+        if beta is None:
+            beta = self.beta
 
         # Initiate Quantum Circuit
         self.initiate_circuit()
 
         for i in range(self.n_rounds):
-            self.add_single_rotations(n_round=i)
-            self.add_double_rotations(n_round=i)
-            self.add_triple_rotations(n_round=i)
-            self.close_round(i)
+            self.add_single_rotations(n_round=i, alpha=alpha[i])
+            self.add_double_rotations(n_round=i, alpha=alpha[i])
+            self.add_triple_rotations(n_round=i, alpha=alpha[i])
+            self.close_round(i, beta=beta[i])
+
+    def build_circuit_template(self):
+        """
+        Build the circuit once with a ``Parameter`` for each round's alpha and
+        beta and transpile it for the backend. Evaluations then only bind the
+        angles instead of re-appending every gate and re-transpiling.
+        """
+        from qiskit import transpile
+        from qiskit.circuit import ParameterVector
+
+        self.alpha_parameters = ParameterVector("alpha", self.n_rounds)
+        self.beta_parameters = ParameterVector("beta", self.n_rounds)
+
+        # Build the template without replacing the user facing circuit
+        quantum_circuit = self.quantum_circuit
+        self.build_circuit(
+            alpha=list(self.alpha_parameters), beta=list(self.beta_parameters)
+        )
+        self.circuit_template = transpile(self.quantum_circuit, self.backend)
+        self.quantum_circuit = quantum_circuit
 
     def simulate_circuit(self):
         """
         Simulate the quantum circuit and get the corresponding statevector
         """
-        self.statevector = (
-            execute(self.quantum_circuit, self.backend).result().get_statevector()
+        if self.large_backend:
+            # Overwrite the previous statevector rather than allocating another
+            self.build_hamiltonian()
+            self.statevector = self.backend.simulate(
+                self.alpha,
+                self.beta,
+                self.hamiltonian,
+                self.n_qubits,
+                out=self.statevector,
+            )
+            return
+        self.statevector = self.run_circuit(self.alpha, self.beta)
+
+    def run_circuit(self, alpha, beta):
+        """Simulate the circuit at the given angles without changing the instance
+
+        :param alpha: Phase separator angles, one per round
+        :type alpha: list
+        :param beta: Mixer angles, one per round
+        :type beta: list
+        :returns: The final statevector
+        :rtype: {numpy.ndarray}
+        """
+        if self.native_backend:
+            self.build_hamiltonian()
+            return simulate_qaoa(alpha, beta, self.hamiltonian, self.n_qubits)
+        if self.large_backend:
+            self.build_hamiltonian()
+            return self.backend.simulate(alpha, beta, self.hamiltonian, self.n_qubits)
+
+        if self.circuit_template is None:
+            self.build_circuit_template()
+
+        from qiskit import assemble
+
+        # Bind the angles and run without transpiling again
+        bindings = dict(zip(self.alpha_parameters, alpha))
+        bindings.update(zip(self.beta_parameters, beta))
+        circuit = self.circuit_template.assign_parameters(bindings)
+        qobj = assemble(circuit, self.backend)
+        return self.backend.run(qobj).result().get_statevector()
+
+    def evaluate_energy(self, angles):
+        """Energy of the circuit at the given angles
+
+        Unlike ``cost_function`` this neither changes nor tracks anything on the
+        instance, so it is safe to call from several threads at once.
+
+        :param angles: Angles ``[alpha_0, ..., beta_0, ...]``
+        :type angles: numpy.ndarray
+        :returns: The energy ``<s|H|s>``
+        :rtype: {float}
+        """
+        angles = np.asarray(angles, dtype=float)
+        statevector = self.run_circuit(
+            angles[0 : self.n_rounds], angles[self.n_rounds :]
         )
+        self.build_hamiltonian()
+        if self.large_backend:
+            return self.backend.expectation(statevector, self.hamiltonian)
+        probabilities = np.abs(np.asarray(statevector)) ** 2
+        return float(np.dot(self.hamiltonian, probabilities))
 
     def build_hamiltonian(self):
         """
-        Calculate circuit energy
+        Build the circuit Hamiltonian. The instance is only compiled once, later
+        calls reuse it.
         """
-        self.single_rotations.build_hamiltonian()
-        self.double_rotations.build_hamiltonian()
-        self.triple_rotations.build_hamiltonian()
-        # Build circuit Hamiltonian
-        self.hamiltonian = (
-            self.single_rotations.hamiltonian
-            + self.double_rotations.hamiltonian
-            + self.triple_rotations.hamiltonian
+        if self.hamiltonian is not None:
+            return
+
+        self.compiled = compile_instance(
+            self.n_qubits,
+            self.single_rotations,
+            self.double_rotations,
+            self.triple_rotations,
+            cache_dir=self.cache_dir,
         )
+        self.hamiltonian = self.compiled.hamiltonian
+        self.symmetry = AngleSymmetry.from_hamiltonian(self.hamiltonian)
 
     def cost_function(self, angles):
         """Circuit Cost function, run the circuit and measure the energy
@@ -401,43 +572,167 @@ class QAOAInstance3SAT:
         self.alpha = angles[0 : self.n_rounds].tolist()
         self.beta = angles[self.n_rounds :].tolist()
 
-        # Rebuild Circuit
-        self.quantum_circuit = None
-        self.build_circuit()
+        cached = None
+        if self.eval_cache is not None:
+            # Keyed on the instance too, a cache may be shared between instances
+            self.build_hamiltonian()
+            cached = self.eval_cache.get(angles, self.compiled.key)
+        if cached is None:
+            # Run circuit
+            self.simulate_circuit()
+            self.measure_energy()
+            if self.eval_cache is not None:
+                # The memory-lean engine overwrites its statevector in place
+                statevector = None if self.large_backend else self.statevector
+                self.eval_cache.put(angles, self.energy, statevector, self.compiled.key)
+        else:
+            # The statevector is only kept for the most recent entries
+            self.energy, self.statevector = cached
+
+        self.record_evaluation(angles, self.energy)
 
+        return self.energy
+
+    @property
+    def d_alpha(self):
+        """ Get the alpha of each recorded iteration, as a list copied from the trace"""
+        return self.trace.alphas.T.tolist()
+
+    @property
+    def d_beta(self):
+        """ Get the beta of each recorded iteration, as a list copied from the trace"""
+        return self.trace.betas.T.tolist()
+
+    @property
+    def d_energy(self):
+        """ Get the energy of each recorded iteration, as a list copied from the trace"""
+        return self.trace.energies.tolist()
+
+    def record_evaluation(self, angles, energy, p_success=None):
+        """Record an evaluation of the cost function as a classical iteration
+
+        Also used for evaluations made elsewhere (e.g. in optimiser worker
+        processes) so that they are tracked on this instance.
+
+        :param angles: Angles ``[alpha_0, ..., beta_0, ...]`` that were evaluated
+        :type angles: numpy.ndarray
+        :param energy: The energy at those angles
+        :type energy: float
+        :param p_success: The success probability at those angles, defaults to None
+        :type p_success: float, optional
+        """
         self.classical_iter += 1
-        # Run circuit
-        self.simulate_circuit()
-        self.measure_energy()
+        self.trace.append(angles, energy, p_success)
 
-        # If tracking enabled - collect data on alpha, beta
-        self.d_alpha.append(self.alpha)
-        self.d_beta.append(self.beta)
-        self.d_energy.append(self.energy)
+    def gradient(self, angles):
+        """Exact gradient of the cost function, computed with the adjoint method
 
-        return self.energy
+        The gradient is always computed by the native NumPy engine, which gives
+        the same energies as the ``qiskit`` backend, so it can be passed as the
+        ``jac`` of any gradient-based optimiser.
+
+        :param angles: Angles ``[alpha_0, ..., beta_0, ...]``
+        :type angles: numpy.ndarray
+        :returns: The gradient ``[dE/dalpha_0, ..., dE/dbeta_0, ...]``
+        :rtype: {numpy.ndarray}
+        """
+        self.build_hamiltonian()
+        if self.large_backend:
+            # Run the forward pass in the instance statevector, so the adjoint
+            # is the only other state-sized array, then simulate it again
+            # when it is next needed
+            _, gradient = self.backend.energy_and_gradient(
+                angles[0 : self.n_rounds],
+                angles[self.n_rounds :],
+                self.hamiltonian,
+                self.n_qubits,
+                out=self.statevector,
+            )
+            self.statevector = None
+            return gradient
+        _, gradient = energy_and_gradient(
+            angles[0 : self.n_rounds],
+            angles[self.n_rounds :],
+            self.hamiltonian,
+            self.n_qubits,
+        )
+        return gradient
+
+    def batch_cost_function(
+        self, angles, p_success=False, max_memory=DEFAULT_BATCH_MEMORY
+    ):
+        """Evaluate the cost function for many angle vectors at once
+
+        The batch is always simulated with the native NumPy engine, which gives
+        the same energies as the ``qiskit`` backend. Every row is recorded as an
+        iteration of the classical optimiser.
+
+        :param angles: A ``K x 2p`` array, each row is ``[alpha_0, ..., beta_0, ...]``
+        :type angles: numpy.ndarray
+        :param p_success: Set True, to also return the success probabilities, defaults to False
+        :type p_success: bool, optional
+        :param max_memory: Memory budget in bytes for each chunk of statevectors
+        :type max_memory: int, optional
+        :returns: ``K`` energies, and ``K`` success probabilities if requested
+        :rtype: {numpy.ndarray or tuple}
+        """
+        angles = np.atleast_2d(np.asarray(angles, dtype=float))
+        if angles.shape[1] != 2 * self.n_rounds:
+            raise ValueError(
+                "Incorrect number of angles passed. Should be %s - User passed %s"
+                % (2 * self.n_rounds, angles.shape[1])
+            )
+
+        self.build_hamiltonian()
+        sat_index = int(self.sat_assgn, 2) if p_success else None
+        if self.large_backend:
+            result = self.backend.evaluate_batch(
+                angles, self.hamiltonian, self.n_qubits, sat_index=sat_index
+            )
+        else:
+            result = evaluate_batch(
+                angles,
+                self.hamiltonian,
+                self.n_qubits,
+                sat_index=sat_index,
+                max_memory=max_memory,
+            )
+        energies = result[0] if p_success else result
+        probabilities = result[1] if p_success else [None] * len(energies)
+
+        for row, energy, probability in zip(angles, energies, probabilities):
+            self.record_evaluation(row, energy, probability)
+
+        return result
 
     def measure_energy(self):
         """
         Calculate circuit energy
         """
         self.build_hamiltonian()
-        ham_state = np.matmul(self.hamiltonian, self.statevector)
-        energy = np.dot(ham_state, np.conjugate(self.statevector))
-        self.energy = energy.real
+        if self.large_backend:
+            self.energy = self.backend.expectation(self.statevector, self.hamiltonian)
+            return
+        # The Hamiltonian is diagonal so <s|H|s> = sum_k h_k |s_k|^2
+        self.energy = float(np.dot(self.hamiltonian, probabilities(self.statevector)))
 
     def optimise_circuit(self):
         """
         Method to optimise the circuit
         """
 
-        if self.quantum_circuit is None:
+        simulated_natively = self.native_backend or self.large_backend
+        if self.quantum_circuit is None and not simulated_natively:
             raise AttributeError("Please Build Circuit before Optimization")
 
         # Construct n-d array for Nelder-Mead
         angles = [self.alpha, self.beta]
         angles = [angle for i in angles for angle in i]
 
+        # Random initial points are drawn from a fundamental domain
+        self.build_hamiltonian()
+        domain = self.symmetry.domain(self.n_rounds)
+
         # Build Optimiser Class
         if self.classical_opt_alg == "nelder-mead":
             # Initialise Nelder Mead
@@ -445,14 +740,24 @@ class QAOAInstance3SAT:
                 vars_vec=angles,
                 cost_function=self.cost_function,
                 options=self.optimiser_opts,
+                callback=self.record_evaluation,
+                domain=domain,
             )
         # Run CMA ES
         elif self.classical_opt_alg == "cma-es":
+            # Build what the evaluators share before any workers start
+            if not simulated_natively and self.circuit_template is None:
+                self.build_circuit_template()
+
             # Initialise CMA ES
             self.optimiser = CMA_ES(
                 vars_vec=angles,
                 cost_function=self.cost_function,
                 options=self.optimiser_opts,
+                batch_cost_function=self.batch_cost_function,
+                energy_function=self.evaluate_energy,
+                callback=self.record_evaluation,
+                domain=domain,
             )
 
         elif self.classical_opt_alg == "bfgs":
@@ -461,6 +766,7 @@ class QAOAInstance3SAT:
                 vars_vec=angles,
                 cost_function=self.cost_function,
                 options=self.optimiser_opts,
+                jac=self.gradient,
             )
 
         else:
@@ -472,54 +778,86 @@ class QAOAInstance3SAT:
 
         # Optimise Instance & Circuit
         self.optimiser.optimise()
+        optimum = np.asarray(self.optimiser.vars_vec, dtype=float)
+        self.optimiser.vars_vec = self.symmetry.canonical_angles(optimum, self.n_rounds)
+
+        # Batch and parallel evaluators never call cost_function, so leave the
+        # instance angles, statevector and energy at the optimum explicitly
+        canonical = np.asarray(self.optimiser.vars_vec, dtype=float)
+        self.alpha = canonical[0 : self.n_rounds].tolist()
+        self.beta = canonical[self.n_rounds :].tolist()
+        cached = None
+        if self.eval_cache is not None and not self.symmetry.flip_symmetric:
+            # Without the bit flip symmetry, folding only changes the state by a
+            # global phase and complex conjugation, so the state cached at the
+            # optimiser's own angles has the same probabilities
+            cached = self.eval_cache.get(optimum, self.compiled.key)
+        if cached is not None and cached[1] is not None:
+            self.energy, self.statevector = cached
+        else:
+            self.simulate_circuit()
+            self.measure_energy()
+
         self.generate_instance_df()
 
     def generate_instance_df(self):
         """A function to generate a dataframe containing columns for angles and the minimum energy"""
+        import pandas as pd
 
-        # Create alpha key strings
-        l_alpha = ["alpha_" + str(i) for i in range(len(self.alpha))]
-        # Create beta key strings
-        l_beta = ["beta_" + str(i) for i in range(len(self.alpha))]
-        # Create all
-        l_all = [l_alpha, l_beta]
-        l_keys = [item for sublist in l_all for item in sublist]
-        l_keys.append("energy")
-
-        # Data dictionary
-        d_dict = dict.fromkeys(l_keys)
-        d_instance = []
-
-        for row in zip(self.d_alpha, self.d_beta, self.d_energy):
-            # initiate row element
-            row_el = d_dict
-
-            # Build alpha vals df
-            for i, alpha in enumerate(l_alpha):
-                row_el[alpha] = row[0][i]
-
-            # Build beta vals df
-            for i, beta in enumerate(l_beta):
-                row_el[beta] = row[1][i]
-
-            row_el["energy"] = row[2]
-
-            d_instance.append(row_el)
+        # Build the row of the best iteration from the trace's online tracker,
+        # in canonical angles like the instance's own
+        self.build_hamiltonian()
+        best_angles = self.symmetry.canonical_angles(
+            self.trace.best_angles, self.n_rounds
+        )
+        row = {}
+        for i in range(self.n_rounds):
+            row["alpha_" + str(i)] = best_angles[i]
+        for i in range(self.n_rounds):
+            row["beta_" + str(i)] = best_angles[self.n_rounds + i]
+        row["energy"] = self.trace.best_energy
 
         # Add optimisation stuff
-        d_instance = pd.DataFrame(d_instance)
+        d_instance = pd.DataFrame([row], index=[self.trace.best_iteration])
         d_instance["algorithm"] = self.classical_opt_alg
         d_instance["optimiser_opts"] = str(self.optimiser_opts)
 
-        d_instance = d_instance.loc[[d_instance["energy"].idxmin()]]
-        d_instance.to_csv("data/sample_test.csv")
-
         # Allocate data for instance
         self.d_instance = d_instance
         return 0
 
     def calculate_pdf(self):
         """
-        This function generates a PDF from the instance state vector
+        This function generates a PDF (real probabilities) from the instance state vector
         """
-        self.pdf = np.multiply(self.statevector, np.conjugate(self.statevector))
+        if self.statevector is None:
+            self.simulate_circuit()
+        if self.large_backend:
+            self.pdf = self.backend.probabilities(self.statevector)
+            return
+        self.pdf = probabilities(self.statevector)
+
+    def calculate_metrics(self):
+        """Quality metrics of the instance state vector
+
+        :returns: ``energy``, ``p_success``, ``approximation_ratio`` and ``expected_violations``
+        :rtype: {dict}
+        """
+        if self.statevector is None:
+            self.simulate_circuit()
+        self.build_hamiltonian()
+        if self.large_backend:
+            # Streaming reductions, without a statevector-sized probability array
+            energy = self.backend.expectation(self.statevector, self.hamiltonian)
+            e_min, e_max = self.compiled.ground_energy, float(self.hamiltonian.max())
+            sat_amplitude = self.statevector[int(self.sat_assgn, 2)]
+            return {
+                "energy": energy,
+                "p_success": float(abs(sat_amplitude) ** 2),
+                "approximation_ratio": (e_max - energy) / (e_max - e_min)
+                if e_max > e_min
+                else 1.0,
+                "expected_violations": energy - e_min,
+            }
+        metrics = state_metrics(self.statevector, self.hamiltonian, self.sat_assgn)
+        return {key: float(value) for key, value in metrics.items()}
@@ -0,0 +1,189 @@
+"""
+Optimisation trace recorder
+
+Every evaluation of the cost function is appended to preallocated NumPy
+buffers that grow geometrically, so recording is O(1) and the trace can be
+exported without building Python lists row by row. In ring buffer mode only
+the most recent evaluations are kept, for very long runs.
+
+Author: Vivek Katial
+"""
+
+import time
+
+import numpy as np
+
+# Initial number of rows allocated for a trace
+DEFAULT_CAPACITY = 1024
+
+
+class OptimisationTrace:
+    """Array-backed record of the evaluations made during an optimisation
+
+    Angles are stored one row per angle so that every exported column is a
+    contiguous array.
+
+    Attributes
+    ----------
+        n_rounds : int
+            The number of rounds, a row holds ``2 n_rounds`` angles
+        max_length : int
+            Keep only the last ``max_length`` evaluations (None to keep all)
+        n_recorded : int
+            Total number of evaluations appended, including any overwritten
+        best_energy : float
+            The lowest energy recorded so far
+        best_angles : numpy.ndarray
+            The angles at which ``best_energy`` was recorded
+        best_iteration : int
+            The iteration at which ``best_energy`` was recorded
+    """
+
+    def __init__(self, n_rounds, capacity=DEFAULT_CAPACITY, max_length=None):
+        self.n_rounds = n_rounds
+        self.max_length = max_length
+        if max_length is not None:
+            capacity = max_length
+        self.n_recorded = 0
+        self.best_energy = np.inf
+        self.best_angles = None
+        self.best_iteration = None
+
+        self._iteration = np.empty(capacity, dtype=np.int64)
+        self._angles = np.empty((2 * n_rounds, capacity))
+        self._energy = np.empty(capacity)
+        self._timestamp = np.empty(capacity)
+        self._p_success = np.empty(capacity)
+
+    def __len__(self):
+        return min(self.n_recorded, len(self._energy))
+
+    def _grow(self):
+        """Double the capacity of the buffers"""
+        capacity = 2 * len(self._energy)
+        for name in ["_iteration", "_energy", "_timestamp", "_p_success"]:
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+        angles = np.empty((self._angles.shape[0], capacity))
+        angles[:, : self._angles.shape[1]] = self._angles
+        self._angles = angles
+
+    def append(self, angles, energy, p_success=None):
+        """Record an evaluation
+
+        :param angles: Angles ``[alpha_0, ..., beta_0, ...]``
+        :type angles: numpy.ndarray
+        :param energy: The energy at those angles
+        :type energy: float
+        :param p_success: The success probability at those angles, defaults to None
+        :type p_success: float, optional
+        """
+        if self.max_length is not None:
+            row = self.n_recorded % self.max_length
+        else:
+            row = self.n_recorded
+            if row == len(self._energy):
+                self._grow()
+
+        self._iteration[row] = self.n_recorded
+        self._angles[:, row] = angles
+        self._energy[row] = energy
+        self._timestamp[row] = time.time()
+        self._p_success[row] = np.nan if p_success is None else p_success
+
+        if energy < self.best_energy:
+            self.best_energy = energy
+            self.best_angles = np.array(angles, dtype=float)
+            self.best_iteration = self.n_recorded
+        self.n_recorded += 1
+
+    def _ordered(self, array):
+        """The recorded part of a buffer in the order it was recorded
+
+        This is a view of the buffer, unless a ring buffer has wrapped around.
+        """
+        n_rows = len(self)
+        if self.max_length is None or self.n_recorded <= self.max_length:
+            return array[..., :n_rows]
+        start = self.n_recorded % self.max_length
+        return np.concatenate((array[..., start:], array[..., :start]), axis=-1)
+
+    @property
+    def iterations(self):
+        """The iteration number of each recorded evaluation"""
+        return self._ordered(self._iteration)
+
+    @property
+    def angles(self):
+        """A ``2 n_rounds x len(self)`` array of the recorded angles"""
+        return self._ordered(self._angles)
+
+    @property
+    def alphas(self):
+        """A ``n_rounds x len(self)`` array of the recorded alphas"""
+        return self.angles[: self.n_rounds]
+
+    @property
+    def betas(self):
+        """A ``n_rounds x len(self)`` array of the recorded betas"""
+        return self.angles[self.n_rounds :]
+
+    @property
+    def energies(self):
+        """The recorded energies"""
+        return self._ordered(self._energy)
+
+    @property
+    def timestamps(self):
+        """The time (in seconds since the epoch) of each recorded evaluation"""
+        return self._ordered(self._timestamp)
+
+    @property
+    def p_success(self):
+        """The recorded success probabilities (NaN where none was recorded)"""
+        return self._ordered(self._p_success)
+
+    def columns(self):
+        """The trace as a dictionary of one-dimensional arrays
+
+        :returns: Columns ``iteration``, ``alpha_i``, ``beta_i``, ``energy``,
+            ``timestamp`` and ``p_success``
+        :rtype: {dict}
+        """
+        angles = self.angles
+        columns = {"iteration": self.iterations}
+        for i in range(self.n_rounds):
+            columns["alpha_%s" % i] = angles[i]
+        for i in range(self.n_rounds):
+            columns["beta_%s" % i] = angles[self.n_rounds + i]
+        columns["energy"] = self.energies
+        columns["timestamp"] = self.timestamps
+        columns["p_success"] = self.p_success
+        return columns
+
+    def to_dataframe(self):
+        """Export the trace to a ``pandas.DataFrame``
+
+        The columns are copied into the DataFrame, so it does not change as
+        more evaluations are recorded.
+
+        :returns: One row per recorded evaluation
+        :rtype: {pandas.DataFrame}
+        """
+        import pandas as pd
+
+        return pd.DataFrame(self.columns())
+
+    def to_arrow(self):
+        """Export the trace to a ``pyarrow.Table``, sharing the NumPy buffers
+        unless a ring buffer has wrapped around
+
+        :raises ImportError: If ``pyarrow`` is not installed
+        :returns: One row per recorded evaluation
+        :rtype: {pyarrow.Table}
+        """
+        import pyarrow as pa
+
+        return pa.table(self.columns())
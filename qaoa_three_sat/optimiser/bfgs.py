@@ -17,6 +17,8 @@ class BFGS:
             A list of variables that need to be optimised (e.g. alpha_i and beta_i)
         cost_function : func
             A cost function with ``callback()`` that we're evaluating
+        jac : func
+            The gradient of the cost function, if None it is estimated by finite differences
 
     Example
     --------
@@ -25,13 +27,14 @@ class BFGS:
     >>> BFGS.optimise()
     """
 
-    def __init__(self, vars_vec, cost_function, options=None):
+    def __init__(self, vars_vec, cost_function, options=None, jac=None):
         """
         Initialisation method on the class for rotations
         """
         self.vars_vec = vars_vec
         self.cost_function = cost_function
         self.options = options
+        self.jac = jac
 
     def optimise(self):
         """Optimisation Method for BFGS"""
@@ -39,4 +42,8 @@ class BFGS:
         vars_vec_0 = self.vars_vec
 
         # Optimise alpha and beta using the cost function <s|H|s>
-        res = minimize(self.cost_function, x0=vars_vec_0, method="BFGS")
+        res = minimize(
+            self.cost_function, x0=vars_vec_0, method="BFGS", jac=self.jac
+        )
+
+        self.vars_vec = res.x
@@ -5,10 +5,14 @@ Author: Vivek Katial
 """
 
 import numpy as np
-import cma
 import random
 from math import pi
 
+from qaoa_three_sat.optimiser.evaluators import create_evaluator
+
+# Initial step size when warm started from a previous optimum
+WARM_START_SIGMA = 0.1
+
 
 class CMA_ES:
     """This class is an Object for the CMA-ES Optimisation algorithm
@@ -19,6 +23,25 @@ class CMA_ES:
             A list of variables that need to be optimised (e.g. alpha_i and beta_i)
         cost_function : func
             A cost function with ``callback()`` that we're evaluating
+        options : dict
+            Optimisation Algorithm Parameters Dictionary. ``evaluator`` picks how
+            each generation is evaluated (``serial``, ``batch``, ``thread`` or
+            ``process``) and ``n_workers`` the number of threads or processes.
+            Set ``warm_start`` to search around ``vars_vec`` instead of a random
+            point
+        batch_cost_function : func
+            Vectorised cost function used by the ``batch`` evaluator
+        energy_function : func
+            Side effect free cost function used by the ``thread`` and
+            ``process`` evaluators
+        callback : func
+            Called as ``callback(x, cost)`` for evaluations made by the
+            ``thread`` and ``process`` evaluators
+        domain : list
+            A ``(low, high)`` pair per variable to draw the random initial point
+            from, defaults to ``(-pi, pi)`` for every variable
+        best_cost : float
+            The cost of the best solution found
 
     Example
     --------
@@ -28,46 +51,68 @@ class CMA_ES:
 
     Details
     -------
-    Return the list provided in `CMAEvolutionStrategy.result` appended
-    with termination conditions, an `OOOptimizer` and a `BaseDataLogger`::
-        res = es.result + (es.stop(), es, logger)
-
-        where
-        - ``res[0]`` (``xopt``) -- best evaluated solution
-        - ``res[1]`` (``fopt``) -- respective function value
-        - ``res[2]`` (``evalsopt``) -- respective number of function evaluations
-        - ``res[3]`` (``evals``) -- number of overall conducted objective function evaluations
-        - ``res[4]`` (``iterations``) -- number of overall conducted iterations
-        - ``res[5]`` (``xmean``) -- mean of the final sample distribution
-        - ``res[6]`` (``stds``) -- effective stds of the final sample distribution
-        - ``res[-3]`` (``stop``) -- termination condition(s) in a dictionary
-        - ``res[-2]`` (``cmaes``) -- class `CMAEvolutionStrategy` instance
-        - ``res[-1]`` (``logger``) -- class `CMADataLogger` instance
+    The optimiser is driven through the ask/tell interface of
+    `cma.CMAEvolutionStrategy`, handing each whole generation to the evaluator.
+    The ``maxfevals`` budget is checked between generations, as in `cma.fmin`,
+    and the best evaluated solution is kept in ``vars_vec``.
     """
 
-    def __init__(self, vars_vec, cost_function, options):
+    def __init__(
+        self,
+        vars_vec,
+        cost_function,
+        options,
+        batch_cost_function=None,
+        energy_function=None,
+        callback=None,
+        domain=None,
+    ):
         """
         Initialisation method on the class for rotations
         """
         self.vars_vec = vars_vec
         self.cost_function = cost_function
         self.options = options
+        self.batch_cost_function = batch_cost_function
+        self.energy_function = energy_function
+        self.callback = callback
+        self.domain = domain or [(-pi, pi)] * len(vars_vec)
         self.budget = options["budget"]
         self.iterations = 1
+        self.best_cost = np.inf
 
     def optimise(self):
         """Optimisation Method for CMA-ES"""
+        import cma
 
-        vars_vec = self.vars_vec
-        vars_vec_0 = [random.uniform(-pi, pi) for i in range(len(self.vars_vec))]
-        std = np.std(vars_vec_0)
+        if self.options.get("warm_start"):
+            vars_vec_0 = list(self.vars_vec)
+            std = WARM_START_SIGMA
+        else:
+            vars_vec_0 = [random.uniform(low, high) for low, high in self.domain]
+            # A single angle has no spread, so fall back to a quarter period
+            std = np.std(vars_vec_0) or pi / 2
 
-        # Results from CMA-ES process
-        res = cma.fmin(
-            self.cost_function, vars_vec_0, std, options={"maxfevals": self.budget}
+        es = cma.CMAEvolutionStrategy(vars_vec_0, std, {"maxfevals": self.budget})
+        evaluator = create_evaluator(
+            self.options.get("evaluator", "serial"),
+            self.cost_function,
+            batch_cost_function=self.batch_cost_function,
+            energy_function=self.energy_function,
+            n_workers=self.options.get("n_workers"),
+            callback=self.callback,
         )
 
+        # Evaluate a whole generation at a time
+        with evaluator:
+            while not es.stop():
+                solutions = es.ask()
+                es.tell(solutions, evaluator(solutions))
+                es.disp()
+
         # Return the best function evaluation
-        self.vars_vec = res[0]
+        self.vars_vec = es.result.xbest
+        self.best_cost = es.result.fbest
+        self.iterations = es.result.evaluations
 
         return 0
@@ -0,0 +1,200 @@
+"""
+Evaluators that compute the cost of a whole population of solutions
+
+Population based optimisers (e.g. CMA-ES) hand every generation to an
+evaluator, which is called with a list of solutions and returns a list of
+costs in the same order. Evaluators should be closed (or used as a context
+manager) so that any workers are shut down.
+
+Author: Vivek Katial
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil
+import os
+
+import numpy as np
+
+from qaoa_three_sat.optimiser.parallel import create_pool, worker_cost_function
+
+EVALUATORS = ["serial", "batch", "thread", "process"]
+
+
+def _evaluate_in_worker(vars_vec):
+    """Evaluate a single solution inside a pool worker"""
+    return worker_cost_function()(vars_vec)
+
+
+class Evaluator:
+    """Base class for population evaluators
+
+    Attributes
+    ----------
+        callback : func
+            Called as ``callback(x, cost)`` in this process for every
+            evaluation, so that evaluations made elsewhere can still be tracked
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+
+    def __call__(self, solutions):
+        costs = [float(cost) for cost in self.evaluate(solutions)]
+        if self.callback is not None:
+            for vars_vec, cost in zip(solutions, costs):
+                self.callback(vars_vec, cost)
+        return costs
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def evaluate(self, solutions):
+        """Compute the cost of every solution
+
+        :param solutions: The solutions to evaluate
+        :type solutions: list
+        :returns: The costs in the same order as ``solutions``
+        :rtype: {list}
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any workers held by the evaluator"""
+
+
+class SerialEvaluator(Evaluator):
+    """Evaluates solutions one after another in this process
+
+    Attributes
+    ----------
+        cost_function : func
+            The cost function of a single solution
+    """
+
+    def __init__(self, cost_function, callback=None):
+        super().__init__(callback)
+        self.cost_function = cost_function
+
+    def evaluate(self, solutions):
+        return [self.cost_function(vars_vec) for vars_vec in solutions]
+
+
+class BatchEvaluator(Evaluator):
+    """Evaluates the whole population with one vectorised call
+
+    Attributes
+    ----------
+        batch_cost_function : func
+            Maps a ``K x d`` array of solutions to ``K`` costs
+    """
+
+    def __init__(self, batch_cost_function, callback=None):
+        super().__init__(callback)
+        self.batch_cost_function = batch_cost_function
+
+    def evaluate(self, solutions):
+        return self.batch_cost_function(np.asarray(solutions, dtype=float))
+
+
+class ThreadEvaluator(Evaluator):
+    """Evaluates solutions on a thread pool
+
+    Only useful for cost functions that release the GIL while they run, and the
+    cost function must be safe to call from several threads at once.
+
+    Attributes
+    ----------
+        cost_function : func
+            The thread safe cost function of a single solution
+        pool : concurrent.futures.ThreadPoolExecutor
+            The worker threads
+    """
+
+    def __init__(self, cost_function, n_workers=None, callback=None):
+        super().__init__(callback)
+        self.cost_function = cost_function
+        self.pool = ThreadPoolExecutor(max_workers=n_workers)
+
+    def evaluate(self, solutions):
+        return list(self.pool.map(self.cost_function, solutions))
+
+    def close(self):
+        self.pool.shutdown()
+
+
+class ProcessEvaluator(Evaluator):
+    """Evaluates solutions on a forked process pool
+
+    Attributes
+    ----------
+        n_workers : int
+            Number of worker processes
+        pool : concurrent.futures.ProcessPoolExecutor
+            The worker processes, which inherit the cost function
+    """
+
+    def __init__(self, cost_function, n_workers=None, callback=None):
+        super().__init__(callback)
+        self.n_workers = n_workers or os.cpu_count()
+        self.pool = create_pool(self.n_workers, cost_function)
+
+    def evaluate(self, solutions):
+        # One chunk per worker keeps the IPC to a message per worker
+        chunksize = max(1, ceil(len(solutions) / self.n_workers))
+        return list(self.pool.map(_evaluate_in_worker, solutions, chunksize=chunksize))
+
+    def close(self):
+        self.pool.shutdown()
+
+
+def create_evaluator(
+    evaluator,
+    cost_function,
+    batch_cost_function=None,
+    energy_function=None,
+    n_workers=None,
+    callback=None,
+):
+    """Create a population evaluator by name
+
+    ``serial`` calls ``cost_function``, which is expected to track its own
+    evaluations. The other evaluators call ``batch_cost_function`` (``batch``)
+    or ``energy_function`` (``thread`` and ``process``) and report each
+    evaluation through ``callback``, except ``batch``, whose function is also
+    expected to track its own evaluations.
+
+    :param evaluator: One of ``serial``, ``batch``, ``thread`` or ``process``
+    :type evaluator: str
+    :param cost_function: The cost function of a single solution
+    :type cost_function: func
+    :param batch_cost_function: Vectorised cost function, defaults to None
+    :type batch_cost_function: func, optional
+    :param energy_function: Side effect free cost function, defaults to ``cost_function``
+    :type energy_function: func, optional
+    :param n_workers: Number of threads or processes, defaults to the CPU count
+    :type n_workers: int, optional
+    :param callback: Called as ``callback(x, cost)`` for untracked evaluations
+    :type callback: func, optional
+    :raises ValueError: If the evaluator is unknown or its function is missing
+    :returns: The evaluator
+    :rtype: {Evaluator}
+    """
+    if evaluator not in EVALUATORS:
+        raise ValueError(
+            "Evaluator must be one of %s - User passed %s" % (EVALUATORS, evaluator)
+        )
+    if evaluator == "serial":
+        return SerialEvaluator(cost_function)
+    if evaluator == "batch":
+        if batch_cost_function is None:
+            raise ValueError("The batch evaluator needs a `batch_cost_function`")
+        return BatchEvaluator(batch_cost_function)
+
+    if energy_function is None:
+        energy_function = cost_function
+    if evaluator == "thread":
+        return ThreadEvaluator(energy_function, n_workers, callback)
+    return ProcessEvaluator(energy_function, n_workers, callback)
@@ -6,9 +6,56 @@ Author: Vivek Katial
 
 import random
 import numpy as np
+from concurrent.futures import FIRST_COMPLETED, wait
 from scipy.optimize import minimize
 from math import pi
 
+from qaoa_three_sat.optimiser.parallel import (
+    BudgetExhausted,
+    SharedBudget,
+    TracedCostFunction,
+    create_pool,
+    worker_cost_function,
+)
+
+
+def _nelder_mead_restart(vars_vec_0, options):
+    """Run a single Nelder-Mead restart inside a pool worker
+
+    :param vars_vec_0: Initial point of the restart
+    :type vars_vec_0: list
+    :param options: Optimisation Algorithm Parameters Dictionary
+    :type options: dict
+    :returns: The restart's initial point, best point and cost, evaluation count and trace
+    :rtype: {dict}
+    """
+    cost_function = worker_cost_function()
+    try:
+        minimize(
+            cost_function,
+            x0=vars_vec_0,
+            method="nelder-mead",
+            options={
+                "xtol": options["xtol"],
+                "disp": options["disp"],
+                "adaptive": options["adaptive"],
+                "maxfev": options["budget"],
+            },
+        )
+    except BudgetExhausted:
+        # Out of budget part way through, keep what was evaluated
+        pass
+
+    trace_x, trace_f = cost_function.trace()
+    restart = {"x0": np.array(vars_vec_0), "nfev": len(trace_f)}
+    restart["trace_x"], restart["trace_f"] = trace_x, trace_f
+    if len(trace_f):
+        best = int(np.argmin(trace_f))
+        restart["x"], restart["fun"] = trace_x[best], trace_f[best]
+    else:
+        restart["x"], restart["fun"] = None, np.inf
+    return restart
+
 
 class NelderMead:
     """This class is an Object for the Nelder-Mead Optimisation algorithm
@@ -20,7 +67,21 @@ class NelderMead:
         cost_function : func
             A cost function with ``callback()`` that we're evaluating
         options : dict
-            Optimisation Algorithm Parameters Dictionary.
+            Optimisation Algorithm Parameters Dictionary. Set ``n_workers`` above
+            one to run restarts in parallel on a process pool, and ``warm_start``
+            to start the first restart from ``vars_vec`` instead of at random
+        callback : func
+            Called as ``callback(x, cost)`` in this process for every evaluation
+            made by a pool worker, so that they can still be tracked
+        domain : list
+            A ``(low, high)`` pair per variable to draw random initial points
+            from, defaults to ``(-pi, pi)`` for every variable
+        best_cost : float
+            The lowest cost found across all restarts
+        restarts : list
+            A ``dict`` per restart with its initial point ``x0``, best point
+            ``x``, cost ``fun``, evaluation count ``nfev`` and its trace
+            ``trace_x`` and ``trace_f``
 
     Example
     --------
@@ -29,28 +90,47 @@ class NelderMead:
     >>> NelderMead.optimise()
     """
 
-    def __init__(self, vars_vec, cost_function, options):
+    def __init__(self, vars_vec, cost_function, options, callback=None, domain=None):
         """
         Initialisation method on the class for rotations
         """
         self.vars_vec = vars_vec
         self.cost_function = cost_function
         self.options = options
+        self.callback = callback
+        self.domain = domain or [(-pi, pi)] * len(vars_vec)
         self.budget = options["budget"]
+        self.n_workers = options.get("n_workers", 1)
         self.iterations = 1
+        self.best_cost = np.inf
+        self.restarts = []
+        self.started = False
+
+    def random_start(self):
+        """Draw a random initial point for a restart
+
+        The first restart of a warm started run begins at ``vars_vec`` instead.
+        """
+        if self.options.get("warm_start") and not self.started:
+            self.started = True
+            return list(self.vars_vec)
+        return [random.uniform(low, high) for low, high in self.domain]
 
     def optimise(self):
         """Optimisation Method for Nelder-Mead"""
 
+        if self.n_workers > 1:
+            return self.optimise_parallel()
+
         while self.iterations < self.budget:
 
             # Create a vector
-            print("Re-generating inital random state")
-            vars_vec_0 = [random.uniform(-pi, pi) for i in range(len(self.vars_vec))]
+            vars_vec_0 = self.random_start()
+            cost_function = TracedCostFunction(self.cost_function)
 
             # Optimise alpha and beta using the cost function <s|H|s>
             res = minimize(
-                self.cost_function,
+                cost_function,
                 x0=vars_vec_0,
                 method="nelder-mead",
                 options={
@@ -62,16 +142,89 @@ class NelderMead:
             )
 
             self.iterations += res.nfev
+            trace_x, trace_f = cost_function.trace()
+            # When maxfev stops a step part way, scipy only reports the best
+            # vertex of the simplex, so take the best point evaluated instead
+            best = int(np.argmin(trace_f))
+            x, fun = trace_x[best], trace_f[best]
+            self.restarts.append(
+                {
+                    "x0": np.array(vars_vec_0),
+                    "x": x,
+                    "fun": fun,
+                    "nfev": res.nfev,
+                    "trace_x": trace_x,
+                    "trace_f": trace_f,
+                }
+            )
+
+            # Keep the best restart rather than the last one
+            if fun < self.best_cost:
+                self.best_cost = fun
+                self.vars_vec = x
+
+            self.print_restart(fun)
+
+        self.print_optimum()
 
-            print("THIS IS THE ITERATIONS %s" % self.iterations)
+    def optimise_parallel(self):
+        """Run Nelder-Mead restarts concurrently on a process pool
 
-        # Print result
+        All restarts draw from one shared, atomically decremented evaluation
+        budget. A new restart is started whenever one finishes until the budget
+        is spent, and the best point over all restarts is kept.
+        """
+
+        budget = SharedBudget(self.budget - self.iterations)
+        running = set()
+
+        with create_pool(self.n_workers, self.cost_function, budget) as pool:
+            while True:
+                while len(running) < self.n_workers and not budget.spent:
+                    running.add(
+                        pool.submit(
+                            _nelder_mead_restart, self.random_start(), self.options
+                        )
+                    )
+                if not running:
+                    break
+
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.add_restart(future.result())
+
+        self.print_optimum()
+
+    def add_restart(self, restart):
+        """Record the result of a restart run by a pool worker"""
+
+        self.restarts.append(restart)
+        self.iterations += restart["nfev"]
+
+        if self.callback is not None:
+            for vars_vec, cost in zip(restart["trace_x"], restart["trace_f"]):
+                self.callback(vars_vec, cost)
+
+        if restart["fun"] < self.best_cost:
+            self.best_cost = restart["fun"]
+            self.vars_vec = restart["x"]
+
+        self.print_restart(restart["fun"])
+
+    def print_restart(self, cost):
+        """Print the progress of the last restart, with ``disp`` set"""
+        if self.options["disp"]:
+            print(
+                "Restart %s finished: \t cost=%s \t evaluations=%s"
+                % (len(self.restarts), cost, self.iterations)
+            )
+
+    def print_optimum(self):
+        """Print the best solution found"""
         print(
             "Optimal Sol:\t alpha:%s beta:%s"
             % (
-                res.x[0 : (int(len(self.vars_vec) / 2))],
-                res.x[int(len(self.vars_vec) / 2) :],
+                self.vars_vec[0 : (int(len(self.vars_vec) / 2))],
+                self.vars_vec[int(len(self.vars_vec) / 2) :],
             )
         )
-
-        self.vars_vec = res.x
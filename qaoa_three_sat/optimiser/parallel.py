@@ -0,0 +1,120 @@
+"""
+Process pool helpers shared by the optimisers
+
+Workers are forked from the optimising process so they inherit the cost
+function (usually a bound method of ``QAOAInstance3SAT``) instead of having it
+pickled.
+
+Author: Vivek Katial
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Per-process state of the optimiser pool workers
+_WORKER = {}
+
+
+class BudgetExhausted(Exception):
+    """Raised when the shared function evaluation budget has been spent"""
+
+
+class SharedBudget:
+    """A function evaluation budget shared by several processes
+
+    Attributes
+    ----------
+        remaining : multiprocessing.Value
+            The number of evaluations left, decremented atomically
+    """
+
+    def __init__(self, budget):
+        self.remaining = multiprocessing.get_context("fork").Value("q", budget)
+
+    def take(self):
+        """Claim one evaluation from the budget
+
+        :returns: False if the budget has already been spent
+        :rtype: {bool}
+        """
+        with self.remaining.get_lock():
+            if self.remaining.value <= 0:
+                return False
+            self.remaining.value -= 1
+            return True
+
+    @property
+    def spent(self):
+        """Whether the budget has been used up"""
+        return self.remaining.value <= 0
+
+
+class TracedCostFunction:
+    """Wraps a cost function to record every evaluation and enforce a budget
+
+    Attributes
+    ----------
+        cost_function : func
+            The cost function being wrapped
+        budget : SharedBudget
+            The budget evaluations are drawn from (None for no limit)
+        trace_x : list
+            The points evaluated
+        trace_f : list
+            The cost at each point evaluated
+    """
+
+    def __init__(self, cost_function, budget=None):
+        self.cost_function = cost_function
+        self.budget = budget
+        self.trace_x = []
+        self.trace_f = []
+
+    def __call__(self, vars_vec):
+        if self.budget is not None and not self.budget.take():
+            raise BudgetExhausted()
+        cost = self.cost_function(vars_vec)
+        self.trace_x.append(np.array(vars_vec, dtype=float))
+        self.trace_f.append(cost)
+        return cost
+
+    def trace(self):
+        """The evaluations as a ``(points, costs)`` pair of arrays"""
+        return np.array(self.trace_x), np.array(self.trace_f)
+
+
+def init_worker(cost_function, budget=None):
+    """Store the cost function and budget in a pool worker"""
+    _WORKER["cost_function"] = cost_function
+    _WORKER["budget"] = budget
+
+
+def worker_cost_function():
+    """A traced, budgeted cost function for the calling pool worker
+
+    :returns: A fresh ``TracedCostFunction`` around the worker's cost function
+    :rtype: {TracedCostFunction}
+    """
+    return TracedCostFunction(_WORKER["cost_function"], _WORKER["budget"])
+
+
+def create_pool(n_workers, cost_function, budget=None):
+    """Start a forked process pool whose workers share a cost function and budget
+
+    :param n_workers: Number of worker processes
+    :type n_workers: int
+    :param cost_function: The cost function to evaluate in the workers
+    :type cost_function: func
+    :param budget: A shared evaluation budget, defaults to None
+    :type budget: SharedBudget, optional
+    :returns: The process pool
+    :rtype: {concurrent.futures.ProcessPoolExecutor}
+    """
+    return ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=init_worker,
+        initargs=(cost_function, budget),
+    )
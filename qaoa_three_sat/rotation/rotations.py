@@ -5,7 +5,6 @@ Author: Vivek Katial
 """
 
 import numpy as np
-from qaoa_three_sat.utils.qc_helpers import pauli_z, pauli_identity
 
 
 class Rotations:
@@ -13,6 +12,8 @@ class Rotations:
 
     Attributes:
         rotations (:obj:`list`): A list of rotations
+        hamiltonian (:obj:`numpy.ndarray`): The diagonal of the Hamiltonian
+            for the rotations as a vector of length ``2 ** n_qubits``
 
     """
 
@@ -29,6 +30,47 @@ class Rotations:
         self.interactions = self.get_interactions()
         self.hamiltonian = None
 
+    @classmethod
+    def from_arrays(cls, qubits, coefficients, n_qubits):
+        """
+        Build rotations from arrays, as stored in the binary instance format
+
+        Args:
+            qubits (numpy.ndarray): A ``n_rotations x interactions`` array of qubit indices
+            coefficients (numpy.ndarray): The coefficient of each rotation
+            n_qubits (int): The number of qubits
+
+        Returns:
+            (Rotations) The rotations
+        """
+        rotations = [
+            {"qubits": row, "coefficient": coefficient}
+            for row, coefficient in zip(
+                np.asarray(qubits).tolist(), np.asarray(coefficients).tolist()
+            )
+        ]
+        instance = cls.__new__(cls)
+        instance.rotations = rotations
+        instance.n_qubits = n_qubits
+        instance.interactions = np.shape(qubits)[1]
+        instance.hamiltonian = None
+        return instance
+
+    def to_arrays(self):
+        """Arrays of the qubit indices and coefficients of the rotations
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray) A ``n_rotations x interactions`` array
+            of qubit indices and the coefficient of each rotation
+        """
+        qubits = np.array(
+            [rotation["qubits"] for rotation in self.rotations], dtype=np.int16
+        ).reshape(len(self.rotations), self.interactions)
+        coefficients = np.array(
+            [rotation["coefficient"] for rotation in self.rotations], dtype=float
+        )
+        return qubits, coefficients
+
     def get_interactions(self):
         """Gets the number of  interaction terms in the QC Circuit
 
@@ -41,23 +83,41 @@ class Rotations:
     def build_hamiltonian(self):
         """
         A function for building Hamiltonians
+
+        Every rotation is a product of Pauli Z operators so the Hamiltonian is
+        diagonal in the computational basis. Only the diagonal is stored: the
+        term ``Z_i Z_j ...`` contributes ``+coefficient`` to basis state ``k``
+        when the bits ``i, j, ...`` of ``k`` have even parity and
+        ``-coefficient`` otherwise. Qubit ``i`` is bit ``i`` of the basis
+        index, which is the (little-endian) ordering of ``qiskit``
+        statevectors.
         """
 
         # Initialise empty hamiltonian
-        hamiltonian = np.zeros((2 ** self.n_qubits, 2 ** self.n_qubits))
+        hamiltonian = np.zeros(2 ** self.n_qubits)
+        self.add_to_hamiltonian(hamiltonian)
+
+        self.hamiltonian = hamiltonian
+
+    def add_to_hamiltonian(self, hamiltonian, start=0):
+        """
+        Add the rotations to a slice of a Hamiltonian diagonal in place
+
+        Building the diagonal a slice at a time keeps the temporaries the size
+        of the slice rather than of the whole ``2 ** n_qubits`` diagonal.
+
+        Args:
+            hamiltonian (numpy.ndarray): The diagonal entries of basis states
+                ``start`` to ``start + len(hamiltonian)``
+            start (int): The basis index of the first entry
+        """
+        basis = np.arange(start, start + len(hamiltonian))
 
         for rotation in self.rotations:
-            # Initialise current Ham
-            curr = 1
-            # Loop through qubits
-            for term in range(self.n_qubits):
-                # If Z-rotation operating on qubit i apply Z operation
-                if term in rotation["qubits"]:
-                    curr = np.kron(curr, pauli_z())
-                # Else leave alone
-                else:
-                    curr = np.kron(curr, pauli_identity())
-
-            hamiltonian += curr * rotation["coefficient"]
+            # Parity of the bits the Z-rotation acts on
+            parity = np.zeros_like(basis)
+            for qubit in rotation["qubits"]:
+                parity ^= basis >> qubit
+            parity &= 1
 
-        self.hamiltonian = hamiltonian
+            hamiltonian += (1 - 2 * parity) * rotation["coefficient"]
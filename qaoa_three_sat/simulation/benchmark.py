@@ -0,0 +1,597 @@
+""" Benchmarks of the simulation hot paths
+
+Times ``Rotations.build_hamiltonian``, ``QAOAInstance3SAT.cost_function``,
+``build_landscape`` and the classical optimisers over a grid of qubits, rounds
+and backends, on Exact Cover 3 instances generated deterministically from a
+seed. Each case reports the time per evaluation, evaluations per second and
+peak memory, and the results are written as JSON, both to compare later runs
+against (``compare_results``) and to calibrate the job manifest resource model
+(``utils.job_manifest.ResourceModel.load``).
+
+Author: Vivek Katial
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+
+from qaoa_three_sat.instance.binary import load_instance
+from qaoa_three_sat.instance.generator import (
+    generate_instances,
+    instance_name,
+    write_raw_instance,
+)
+from qaoa_three_sat.instance.three_sat import QAOAInstance3SAT
+from qaoa_three_sat.utils.job_manifest import ResourceModel
+
+BENCHMARKS = [
+    "build_hamiltonian",
+    "cost_function",
+    "build_landscape",
+    "nelder-mead",
+    "cma-es",
+    "bfgs",
+]
+OPTIMISERS = ["nelder-mead", "cma-es", "bfgs"]
+
+N_QUBITS = list(range(6, 23, 2))
+N_ROUNDS = [1, 2, 3, 4, 5]
+SEED = 0
+
+# Cases are repeated until they have run for at least this many seconds
+MIN_TIME = 0.5
+MAX_REPEATS = 100
+# Cases predicted to take longer than this are skipped
+MAX_CASE_SECONDS = 120
+
+LANDSCAPE_RESOLUTION = 8
+OPTIMISER_BUDGET = 50
+
+# Slowdown of a case, relative to the baseline, reported as a regression
+REGRESSION_TOLERANCE = 0.25
+RESULTS_FILE = os.path.join("reports", "benchmarks.json")
+
+
+def available_backends():
+    """Backends that can run here, ``qiskit`` only if its Aer simulator is installed
+
+    :returns: Backend names
+    :rtype: {list}
+    """
+    backends = ["numpy", "numpy-large", "numpy-large:complex128"]
+    try:
+        from qiskit import Aer  # noqa: F401
+
+        backends.append("qiskit")
+    except ImportError:
+        pass
+    return backends
+
+
+def _backend_argument(backend):
+    """The ``backend`` argument of ``QAOAInstance3SAT`` for a backend name"""
+    if backend == "qiskit":
+        from qiskit import Aer
+
+        return Aer.get_backend("statevector_simulator")
+    return backend
+
+
+def current_rss():
+    """Resident memory of this process, in bytes (its peak where ``/proc`` is unavailable)"""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def time_case(run, setup, min_time=MIN_TIME, max_repeats=MAX_REPEATS):
+    """Repeat a case until it has run for ``min_time`` seconds
+
+    :param run: Runs the case on the output of ``setup``, returns its number of evaluations
+    :type run: function
+    :param setup: Prepares each repeat, it is not timed
+    :type setup: function
+    :param min_time: Seconds to repeat for, the case always runs once, defaults to ``MIN_TIME``
+    :type min_time: float, optional
+    :param max_repeats: Maximum number of repeats, defaults to ``MAX_REPEATS``
+    :type max_repeats: int, optional
+    :returns: The total seconds, evaluations and repeats
+    :rtype: {float, int, int}
+    """
+    seconds, evaluations, repeats = 0.0, 0, 0
+    while repeats < max(max_repeats, 1) and (repeats == 0 or seconds < min_time):
+        case = setup()
+        start = time.perf_counter()
+        evaluations += run(case)
+        seconds += time.perf_counter() - start
+        repeats += 1
+    return seconds, evaluations, repeats
+
+
+def peak_memory(run, setup):
+    """Peak memory of one run of a case
+
+    NumPy and Python allocations are traced with ``tracemalloc``, on top of
+    the resident memory once the case is set up. Allocations outside of their
+    view (e.g. in the `qiskit` Aer simulator) only show in the peak resident
+    memory of the process, which is used instead when it grew during the run.
+
+    :param run: Runs the case on the output of ``setup``
+    :type run: function
+    :param setup: Prepares the run
+    :type setup: function
+    :returns: The peak memory of the process and the peak traced allocation, in bytes
+    :rtype: {int, int}
+    """
+    case = setup()
+    rss = current_rss()
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    try:
+        run(case)
+        _, traced = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    peak = rss + traced
+    new_max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if new_max_rss > max_rss:
+        peak = max(peak, new_max_rss * 1024)
+    return peak, traced
+
+
+def _make_instance(instance_dir, name, backend, n_rounds, classical_opt_alg, opts):
+    """An instance of the benchmark problem, with its Hamiltonian built"""
+    n_qubits, single, double, triple, sat_assgn = load_instance(instance_dir, name)
+    instance = QAOAInstance3SAT(
+        n_qubits=n_qubits,
+        n_rounds=n_rounds,
+        single_rotations=single,
+        double_rotations=double,
+        triple_rotations=triple,
+        alpha=[0] * n_rounds,
+        beta=[0] * n_rounds,
+        classical_opt_alg=classical_opt_alg,
+        optimiser_opts=opts,
+        sat_assgn=sat_assgn,
+        backend=_backend_argument(backend),
+    )
+    instance.build_hamiltonian()
+    return instance
+
+
+def _optimiser_opts(classical_opt_alg, budget):
+    """Options of a benchmarked optimiser run"""
+    if classical_opt_alg == "nelder-mead":
+        return {
+            "classical_opt_alg": classical_opt_alg,
+            "xtol": 0.001,
+            "disp": False,
+            "adaptive": True,
+            "budget": budget,
+        }
+    return {"classical_opt_alg": classical_opt_alg, "budget": budget}
+
+
+def benchmark_case(
+    benchmark,
+    backend,
+    n_qubits,
+    n_rounds,
+    instance_dir,
+    name,
+    min_time=MIN_TIME,
+    seed=SEED,
+    resolution=LANDSCAPE_RESOLUTION,
+    budget=OPTIMISER_BUDGET,
+):
+    """Benchmark one hot path on one instance
+
+    :param benchmark: One of ``BENCHMARKS``
+    :type benchmark: str
+    :param backend: Backend name, one of ``available_backends()``
+    :type backend: str
+    :param n_qubits: Number of qubits of the instance
+    :type n_qubits: int
+    :param n_rounds: Number of QAOA rounds
+    :type n_rounds: int
+    :param instance_dir: Directory of the benchmark instances
+    :type instance_dir: str
+    :param name: Name of the instance
+    :type name: str
+    :param min_time: Seconds to repeat the case for, defaults to ``MIN_TIME``
+    :type min_time: float, optional
+    :param seed: Seed of the random angles and optimisers, defaults to ``SEED``
+    :type seed: int, optional
+    :param resolution: Landscape points along each axis, defaults to ``LANDSCAPE_RESOLUTION``
+    :type resolution: int, optional
+    :param budget: Evaluation budget of the optimisers, defaults to ``OPTIMISER_BUDGET``
+    :type budget: int, optional
+    :returns: The benchmark record
+    :rtype: {dict}
+    """
+    rng = np.random.default_rng(seed)
+
+    if benchmark == "build_hamiltonian":
+        rotations = load_instance(instance_dir, name)[1:4]
+
+        def setup():
+            return rotations
+
+        def run(rotations):
+            for rotation in rotations:
+                rotation.build_hamiltonian()
+            return 1
+
+    elif benchmark == "cost_function":
+        instance = _make_instance(
+            instance_dir,
+            name,
+            backend,
+            n_rounds,
+            "nelder-mead",
+            _optimiser_opts("nelder-mead", budget),
+        )
+
+        def setup():
+            return rng.uniform(-np.pi, np.pi, 2 * n_rounds)
+
+        def run(angles):
+            instance.cost_function(angles)
+            return 1
+
+    elif benchmark == "build_landscape":
+        from qaoa_three_sat.simulation.landscape import build_landscape
+
+        def setup():
+            return None
+
+        def run(_):
+            build_landscape(
+                name,
+                "nelder-mead",
+                _optimiser_opts("nelder-mead", budget),
+                backend=_backend_argument(backend),
+                resolution=resolution,
+                n_rounds=n_rounds,
+                instance_dir=instance_dir,
+            )
+            return resolution ** 2
+
+    elif benchmark in OPTIMISERS:
+        opts = _optimiser_opts(benchmark, budget)
+
+        def setup():
+            np.random.seed(seed)
+            return _make_instance(
+                instance_dir, name, backend, n_rounds, benchmark, opts
+            )
+
+        def run(instance):
+            with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                instance.optimise_circuit()
+            return instance.classical_iter
+
+    else:
+        raise ValueError(
+            "%s is not a benchmark, use one of %s" % (benchmark, BENCHMARKS)
+        )
+
+    seconds, evaluations, repeats = time_case(run, setup, min_time)
+    memory, traced = peak_memory(run, setup)
+    return {
+        "benchmark": benchmark,
+        "backend": None if benchmark == "build_hamiltonian" else backend,
+        "n_qubits": n_qubits,
+        "n_rounds": None if benchmark == "build_hamiltonian" else n_rounds,
+        "repeats": repeats,
+        "evaluations": evaluations,
+        "seconds": seconds,
+        "seconds_per_evaluation": seconds / max(evaluations, 1),
+        "evaluations_per_second": evaluations / seconds if seconds > 0 else None,
+        "peak_memory": memory,
+        "traced_memory": traced,
+    }
+
+
+def _predicted_seconds(model, benchmark, backend, n_qubits, n_rounds, config):
+    """Predicted duration of a case, to skip the ones over the time limit"""
+    if benchmark == "build_hamiltonian":
+        return 0.0
+    evaluations = {
+        "cost_function": 1,
+        "build_landscape": config["resolution"] ** 2,
+    }.get(benchmark, config["budget"])
+    return evaluations * model.seconds_per_evaluation(n_qubits, n_rounds, backend)
+
+
+def machine_info():
+    """Description of the machine the benchmarks ran on"""
+    return {
+        "hostname": platform.node(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+def run_benchmarks(
+    benchmarks=BENCHMARKS,
+    backends=None,
+    n_qubits=N_QUBITS,
+    n_rounds=N_ROUNDS,
+    seed=SEED,
+    min_time=MIN_TIME,
+    max_case_seconds=MAX_CASE_SECONDS,
+    resolution=LANDSCAPE_RESOLUTION,
+    budget=OPTIMISER_BUDGET,
+    quiet=False,
+):
+    """Run every benchmark over a grid of qubits, rounds and backends
+
+    Instances are generated with ``generator.generate_instances`` from
+    ``seed``, so every run benchmarks the same problems.
+
+    :param benchmarks: Hot paths to benchmark, defaults to ``BENCHMARKS``
+    :type benchmarks: list, optional
+    :param backends: Backend names, defaults to ``available_backends()``
+    :type backends: list, optional
+    :param n_qubits: Numbers of qubits, defaults to ``N_QUBITS``
+    :type n_qubits: list, optional
+    :param n_rounds: Numbers of QAOA rounds, defaults to ``N_ROUNDS``
+    :type n_rounds: list, optional
+    :param seed: Seed of the instances, angles and optimisers, defaults to ``SEED``
+    :type seed: int, optional
+    :param min_time: Seconds to repeat each case for, defaults to ``MIN_TIME``
+    :type min_time: float, optional
+    :param max_case_seconds: Skip cases predicted to take longer, defaults to ``MAX_CASE_SECONDS``
+    :type max_case_seconds: float, optional
+    :param resolution: Landscape points along each axis, defaults to ``LANDSCAPE_RESOLUTION``
+    :type resolution: int, optional
+    :param budget: Evaluation budget of the optimisers, defaults to ``OPTIMISER_BUDGET``
+    :type budget: int, optional
+    :param quiet: Set True, to not print each result, defaults to False
+    :type quiet: bool, optional
+    :returns: The ``machine``, the ``config`` and the ``results`` of every case
+    :rtype: {dict}
+    """
+    if backends is None:
+        backends = available_backends()
+    config = {
+        "benchmarks": list(benchmarks),
+        "backends": list(backends),
+        "n_qubits": list(n_qubits),
+        "n_rounds": list(n_rounds),
+        "seed": seed,
+        "min_time": min_time,
+        "max_case_seconds": max_case_seconds,
+        "resolution": resolution,
+        "budget": budget,
+    }
+    model = ResourceModel()
+    results, skipped = [], []
+
+    with tempfile.TemporaryDirectory() as instance_dir:
+        for n in n_qubits:
+            name = instance_name(n, seed, 0)
+            raw_instance = generate_instances(n, 1, seed=seed, n_workers=1)[0]
+            write_raw_instance(raw_instance, os.path.join(instance_dir, name + ".json"))
+
+            for benchmark in benchmarks:
+                # The Hamiltonian does not depend on the rounds or the backend
+                if benchmark == "build_hamiltonian":
+                    cases = [(None, n_rounds[0])]
+                else:
+                    cases = [(b, p) for b in backends for p in n_rounds]
+
+                for backend, p in cases:
+                    predicted = _predicted_seconds(
+                        model, benchmark, backend, n, p, config
+                    )
+                    if predicted > max_case_seconds:
+                        skipped.append((benchmark, backend, n, p))
+                        continue
+                    record = benchmark_case(
+                        benchmark,
+                        backend,
+                        n,
+                        p,
+                        instance_dir,
+                        name,
+                        min_time=min_time,
+                        seed=seed,
+                        resolution=resolution,
+                        budget=budget,
+                    )
+                    results.append(record)
+                    if not quiet:
+                        print(format_record(record))
+
+    if skipped and not quiet:
+        print(
+            "Skipped %s cases predicted to take over %ss"
+            % (len(skipped), max_case_seconds)
+        )
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "config": config,
+        "results": results,
+    }
+
+
+def format_record(record):
+    """One line summary of a benchmark record"""
+    return "%-17s %-22s n=%-2s p=%-4s %10.3es/eval %10.1f evals/s %10.1f MiB" % (
+        record["benchmark"],
+        record["backend"] or "-",
+        record["n_qubits"],
+        record["n_rounds"] or "-",
+        record["seconds_per_evaluation"],
+        record["evaluations_per_second"] or 0.0,
+        record["peak_memory"] / 2 ** 20,
+    )
+
+
+def _record_key(record):
+    """What identifies a case across runs"""
+    return (
+        record["benchmark"],
+        record["backend"],
+        record["n_qubits"],
+        record["n_rounds"],
+    )
+
+
+def compare_results(baseline, current, tolerance=REGRESSION_TOLERANCE):
+    """Cases of ``current`` that are slower, or use more memory, than ``baseline``
+
+    :param baseline: Earlier results, as returned by ``run_benchmarks``
+    :type baseline: dict
+    :param current: New results, as returned by ``run_benchmarks``
+    :type current: dict
+    :param tolerance: Relative increase reported as a regression, defaults to ``REGRESSION_TOLERANCE``
+    :type tolerance: float, optional
+    :returns: The regressions, each with its case, ``metric``, ``baseline``, ``current`` and ``ratio``
+    :rtype: {list}
+    """
+    earlier = {_record_key(record): record for record in baseline["results"]}
+    regressions = []
+    for record in current["results"]:
+        before = earlier.get(_record_key(record))
+        if before is None:
+            continue
+        for metric in ["seconds_per_evaluation", "peak_memory"]:
+            if not before[metric]:
+                continue
+            ratio = record[metric] / before[metric]
+            if ratio > 1 + tolerance:
+                regressions.append(
+                    dict(
+                        zip(
+                            ["benchmark", "backend", "n_qubits", "n_rounds"],
+                            _record_key(record),
+                        ),
+                        metric=metric,
+                        baseline=before[metric],
+                        current=record[metric],
+                        ratio=ratio,
+                    )
+                )
+    return regressions
+
+
+def write_results(results, filename=RESULTS_FILE):
+    """Write benchmark results as JSON"""
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(filename, "w") as outfile:
+        json.dump(results, outfile, indent=4)
+
+
+def load_results(filename=RESULTS_FILE):
+    """Read benchmark results written by ``write_results``"""
+    with open(filename) as file:
+        return json.load(file)
+
+
+if __name__ == "__main__":
+    """Benchmark the simulation hot paths and compare with an earlier run"""
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-B",
+        "--benchmarks",
+        type=str,
+        nargs="+",
+        default=BENCHMARKS,
+        choices=BENCHMARKS,
+        help="Hot paths to benchmark",
+    )
+    parser.add_argument(
+        "-b",
+        "--backends",
+        type=str,
+        nargs="+",
+        default=None,
+        help="Backends, defaults to every available one",
+    )
+    parser.add_argument(
+        "-n", "--n_qubits", type=int, nargs="+", default=N_QUBITS, help="Qubits"
+    )
+    parser.add_argument(
+        "-p", "--n_rounds", type=int, nargs="+", default=N_ROUNDS, help="QAOA rounds"
+    )
+    parser.add_argument("-s", "--seed", type=int, default=SEED, help="Random seed")
+    parser.add_argument(
+        "--min_time",
+        type=float,
+        default=MIN_TIME,
+        help="Seconds to repeat each case for",
+    )
+    parser.add_argument(
+        "--max_seconds",
+        type=float,
+        default=MAX_CASE_SECONDS,
+        help="Skip cases predicted to take longer than this",
+    )
+    parser.add_argument(
+        "-o", "--output", type=str, default=RESULTS_FILE, help="Results file to write"
+    )
+    parser.add_argument(
+        "-c",
+        "--compare",
+        type=str,
+        default=None,
+        help="Earlier results file, exit with an error on regressions",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=REGRESSION_TOLERANCE,
+        help="Relative slowdown reported as a regression",
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        benchmarks=args.benchmarks,
+        backends=args.backends,
+        n_qubits=args.n_qubits,
+        n_rounds=args.n_rounds,
+        seed=args.seed,
+        min_time=args.min_time,
+        max_case_seconds=args.max_seconds,
+    )
+    write_results(results, args.output)
+    print("Wrote %s results to %s" % (len(results["results"]), args.output))
+
+    if args.compare:
+        regressions = compare_results(
+            load_results(args.compare), results, args.tolerance
+        )
+        for regression in regressions:
+            print(
+                "Regression: %(benchmark)s %(backend)s n=%(n_qubits)s p=%(n_rounds)s "
+                "%(metric)s %(baseline).3e -> %(current).3e (x%(ratio).2f)" % regression
+            )
+        if regressions:
+            sys.exit(1)
+        print("No regressions against %s" % args.compare)
@@ -0,0 +1,294 @@
+"""Memory-lean NumPy statevector engine for large instances
+
+Simulates the same circuit as ``statevector.simulate_qaoa``, but applies the
+phase separator and mixer in place, a fixed-size chunk at a time, and computes
+energies and probabilities as streaming reductions. Apart from the statevector
+and the Hamiltonian, memory use is a few chunk-sized buffers, and the state can
+be kept in single precision (``complex64``) to halve it again.
+
+Selected on ``QAOAInstance3SAT`` with the backend ``"numpy-large"`` (single
+precision) or ``"numpy-large:complex128"``.
+
+Author: Vivek Katial
+"""
+
+import numpy as np
+
+# Backend name selecting this engine on ``QAOAInstance3SAT``
+LARGE_BACKEND = "numpy-large"
+PRECISIONS = ["complex64", "complex128"]
+DEFAULT_PRECISION = "complex64"
+
+# Number of amplitudes processed at a time
+DEFAULT_CHUNK_SIZE = 2 ** 18
+
+
+def format_bytes(n_bytes):
+    """Human readable size, e.g. ``"1.5 GiB"``"""
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if n_bytes < 1024:
+            return "%.1f %s" % (n_bytes, unit)
+        n_bytes /= 1024
+    return "%.1f TiB" % n_bytes
+
+
+class ChunkedStatevector:
+    """Backend simulating QAOA in place on a single statevector
+
+    Attributes
+    ----------
+        precision : numpy.dtype
+            Complex dtype of the statevector
+        chunk_size : int
+            Number of amplitudes processed at a time
+    """
+
+    def __init__(self, precision=DEFAULT_PRECISION, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.precision = np.dtype(precision)
+        if self.precision.name not in PRECISIONS:
+            raise ValueError("precision must be one of %s" % PRECISIONS)
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        self.chunk_size = int(chunk_size)
+
+    @staticmethod
+    def is_backend_name(name):
+        """Whether a backend name selects this engine"""
+        return name.split(":")[0] == LARGE_BACKEND
+
+    @classmethod
+    def from_name(cls, name):
+        """Backend from its name, ``"numpy-large[:<precision>]"``
+
+        :param name: The backend name
+        :type name: str
+        :returns: The backend
+        :rtype: {ChunkedStatevector}
+        """
+        if not cls.is_backend_name(name):
+            raise ValueError("%s is not a %s backend" % (name, LARGE_BACKEND))
+        _, _, precision = name.partition(":")
+        return cls(precision or DEFAULT_PRECISION)
+
+    def __str__(self):
+        if self.precision.name == DEFAULT_PRECISION:
+            return LARGE_BACKEND
+        return "%s:%s" % (LARGE_BACKEND, self.precision.name)
+
+    def memory_estimate(self, n_qubits, gradient=False):
+        """Peak memory of a simulation, in bytes
+
+        :param n_qubits: Number of qubits
+        :type n_qubits: int
+        :param gradient: Set True, to include the adjoint statevector of the gradient (its forward pass overwrites the simulated statevector), defaults to False
+        :type gradient: bool, optional
+        :returns: ``statevector``, ``hamiltonian``, ``gradient``, ``temporaries`` and ``total`` bytes
+        :rtype: {dict}
+        """
+        n_states = 2 ** n_qubits
+        chunk = min(self.chunk_size, n_states)
+        estimate = {
+            "statevector": n_states * self.precision.itemsize,
+            "hamiltonian": n_states * np.dtype(np.float64).itemsize,
+            "gradient": n_states * self.precision.itemsize if gradient else 0,
+            # Phase buffer, two mixer buffers and the reduction temporaries
+            "temporaries": chunk * (16 + 2 * self.precision.itemsize + 16),
+        }
+        estimate["total"] = sum(estimate.values())
+        return estimate
+
+    def _chunks(self, size):
+        """Slices covering ``range(size)`` a chunk at a time"""
+        for start in range(0, size, self.chunk_size):
+            yield slice(start, min(start + self.chunk_size, size))
+
+    def initial_state(self, n_qubits, out=None):
+        """The uniform superposition, written into ``out`` if it is given"""
+        if out is None:
+            out = np.empty(2 ** n_qubits, dtype=self.precision)
+        out.fill(2 ** (-n_qubits / 2))
+        return out
+
+    def apply_phase_separator(self, state, alpha, hamiltonian):
+        """Multiply ``state`` by :math:`\\exp(i \\alpha H)` in place"""
+        phases = np.empty(min(self.chunk_size, len(state)), dtype=np.complex128)
+        for chunk in self._chunks(len(state)):
+            phase = phases[: chunk.stop - chunk.start]
+            np.multiply(hamiltonian[chunk], 1j * alpha, out=phase)
+            np.exp(phase, out=phase)
+            state[chunk] *= phase
+        return state
+
+    def _pair_blocks(self, state, qubit):
+        """Views of the amplitudes with bit ``qubit`` 0 and 1, a chunk at a time"""
+        view = state.reshape(-1, 2, 2 ** qubit)
+        n_blocks, _, width = view.shape
+        if width >= self.chunk_size:
+            for block in range(n_blocks):
+                for start in range(0, width, self.chunk_size):
+                    columns = slice(start, start + self.chunk_size)
+                    yield view[block, 0, columns], view[block, 1, columns]
+        else:
+            rows = self.chunk_size // width
+            for start in range(0, n_blocks, rows):
+                yield view[start : start + rows, 0], view[start : start + rows, 1]
+
+    def apply_mixer(self, state, beta, n_qubits):
+        """Apply ``rx(beta)`` to every qubit of ``state`` in place"""
+        cos, sin = float(np.cos(beta / 2)), -1j * float(np.sin(beta / 2))
+        size = min(self.chunk_size, len(state) // 2)
+        zeros = np.empty(size, dtype=self.precision)
+        ones = np.empty(size, dtype=self.precision)
+        for qubit in range(n_qubits):
+            for zero, one in self._pair_blocks(state, qubit):
+                old_zero = zeros[: zero.size].reshape(zero.shape)
+                rotated_one = ones[: one.size].reshape(one.shape)
+                np.copyto(old_zero, zero)
+                np.multiply(one, sin, out=rotated_one)
+                zero *= cos
+                zero += rotated_one
+                old_zero *= sin
+                one *= cos
+                one += old_zero
+        return state
+
+    def simulate(self, alpha, beta, hamiltonian, n_qubits, out=None):
+        """Simulate the QAOA circuit for the given angles
+
+        :param alpha: Angles alpha, one per round
+        :type alpha: list
+        :param beta: Angles beta, one per round
+        :type beta: list
+        :param hamiltonian: Diagonal of the problem Hamiltonian
+        :type hamiltonian: numpy.ndarray
+        :param n_qubits: Number of qubits
+        :type n_qubits: int
+        :param out: A statevector to overwrite instead of allocating a new one, defaults to None
+        :type out: numpy.ndarray, optional
+        :returns: The final statevector
+        :rtype: {numpy.ndarray}
+        """
+        state = self.initial_state(n_qubits, out)
+        for alp, bet in zip(alpha, beta):
+            self.apply_phase_separator(state, alp, hamiltonian)
+            self.apply_mixer(state, bet, n_qubits)
+        return state
+
+    def probabilities(self, state, out=None):
+        """Real probabilities of ``state``, in the matching real precision"""
+        if out is None:
+            out = np.empty(len(state), dtype=state.real.dtype)
+        for chunk in self._chunks(len(state)):
+            amplitudes = state[chunk]
+            np.multiply(amplitudes.real, amplitudes.real, out=out[chunk])
+            out[chunk] += amplitudes.imag ** 2
+        return out
+
+    def expectation(self, state, hamiltonian):
+        """Energy ``<s|H|s>``, accumulated in double precision a chunk at a time"""
+        energy = 0.0
+        for chunk in self._chunks(len(state)):
+            amplitudes = state[chunk]
+            probabilities = amplitudes.real ** 2 + amplitudes.imag ** 2
+            energy += float(np.dot(probabilities, hamiltonian[chunk]))
+        return energy
+
+    def _mixer_generator_overlap(self, adjoint, state, n_qubits):
+        """:math:`\\langle\\lambda| \\frac{1}{2} \\sum_i X_i |\\psi\\rangle`"""
+        overlap = 0j
+        for qubit in range(n_qubits):
+            blocks = zip(
+                self._pair_blocks(adjoint, qubit), self._pair_blocks(state, qubit)
+            )
+            for (adjoint_0, adjoint_1), (state_0, state_1) in blocks:
+                overlap += complex(np.vdot(adjoint_0, state_1))
+                overlap += complex(np.vdot(adjoint_1, state_0))
+        return overlap / 2
+
+    def _hamiltonian_overlap(self, adjoint, state, hamiltonian):
+        """:math:`\\langle\\lambda| H |\\psi\\rangle`"""
+        overlap = 0j
+        for chunk in self._chunks(len(state)):
+            overlap += complex(
+                np.vdot(adjoint[chunk], hamiltonian[chunk] * state[chunk])
+            )
+        return overlap
+
+    def energy_and_gradient(self, alpha, beta, hamiltonian, n_qubits, out=None):
+        """Energy and its exact gradient, with the adjoint method of
+        ``statevector.energy_and_gradient`` on two in-place statevectors
+
+        The forward pass is simulated into ``out`` if it is given, which is left
+        at the initial state by the backward pass.
+
+        :param alpha: Angles alpha, one per round
+        :type alpha: list
+        :param beta: Angles beta, one per round
+        :type beta: list
+        :param hamiltonian: Diagonal of the problem Hamiltonian
+        :type hamiltonian: numpy.ndarray
+        :param n_qubits: Number of qubits
+        :type n_qubits: int
+        :param out: A statevector to overwrite instead of allocating a new one, defaults to None
+        :type out: numpy.ndarray, optional
+        :returns: The energy and the gradient ``[dE/dalpha_0, ..., dE/dbeta_0, ...]``
+        :rtype: {float, numpy.ndarray}
+        """
+        state = self.simulate(alpha, beta, hamiltonian, n_qubits, out=out)
+        energy = self.expectation(state, hamiltonian)
+        adjoint = np.empty_like(state)
+        for chunk in self._chunks(len(state)):
+            np.multiply(hamiltonian[chunk], state[chunk], out=adjoint[chunk])
+
+        grad_alpha = np.empty(len(alpha))
+        grad_beta = np.empty(len(beta))
+        for n_round in reversed(range(len(alpha))):
+            overlap = self._mixer_generator_overlap(adjoint, state, n_qubits)
+            grad_beta[n_round] = 2 * overlap.imag
+            self.apply_mixer(state, -beta[n_round], n_qubits)
+            self.apply_mixer(adjoint, -beta[n_round], n_qubits)
+
+            overlap = self._hamiltonian_overlap(adjoint, state, hamiltonian)
+            grad_alpha[n_round] = -2 * overlap.imag
+            self.apply_phase_separator(state, -alpha[n_round], hamiltonian)
+            self.apply_phase_separator(adjoint, -alpha[n_round], hamiltonian)
+
+        return energy, np.concatenate((grad_alpha, grad_beta))
+
+    def evaluate_batch(self, angles, hamiltonian, n_qubits, sat_index=None):
+        """Energies (and success probabilities) for a stack of angle vectors
+
+        The rows are simulated one after another in a single reused statevector.
+
+        :param angles: A ``K x 2p`` array, each row is ``[alpha_0, ..., beta_0, ...]``
+        :type angles: numpy.ndarray
+        :param hamiltonian: Diagonal of the problem Hamiltonian
+        :type hamiltonian: numpy.ndarray
+        :param n_qubits: Number of qubits
+        :type n_qubits: int
+        :param sat_index: Basis index of the satisfying assignment, defaults to None
+        :type sat_index: int, optional
+        :returns: ``K`` energies, and ``K`` success probabilities if ``sat_index`` is given
+        :rtype: {numpy.ndarray or tuple}
+        """
+        angles = np.atleast_2d(np.asarray(angles, dtype=float))
+        n_rounds = angles.shape[1] // 2
+        energies = np.empty(angles.shape[0])
+        p_success = np.empty(angles.shape[0])
+
+        state = None
+        for row, row_angles in enumerate(angles):
+            state = self.simulate(
+                row_angles[:n_rounds],
+                row_angles[n_rounds:],
+                hamiltonian,
+                n_qubits,
+                state,
+            )
+            energies[row] = self.expectation(state, hamiltonian)
+            if sat_index is not None:
+                p_success[row] = abs(state[sat_index]) ** 2
+
+        if sat_index is None:
+            return energies
+        return energies, p_success
@@ -3,22 +3,540 @@
 Author: Vivek Katial
 """
 
+import os
 from math import pi
+from multiprocessing import Pool, shared_memory
 
-from scipy.optimize import minimize
 import numpy as np
 import pandas as pd
+from scipy.interpolate import griddata
 
 # Import Custom Modules
 from qaoa_three_sat.instance.three_sat import QAOAInstance3SAT
-from qaoa_three_sat.utils.qc_helpers import load_raw_instance, clean_instance
-from qaoa_three_sat.rotation.rotations import Rotations
+from qaoa_three_sat.instance.binary import load_instance
+from qaoa_three_sat.simulation.statevector import (
+    DEFAULT_BATCH_MEMORY,
+    batch_chunk_size,
+    evaluate_batch,
+)
+
+
+def slice_angles(alphas, betas, n_rounds=1, round_index=0, fixed_angles=None):
+    """Build the angle vectors for paired alpha/beta values of one round
+
+    :param alphas: Values for alpha of ``round_index``
+    :type alphas: numpy.ndarray
+    :param betas: Values for beta of ``round_index`` (same length as ``alphas``)
+    :type betas: numpy.ndarray
+    :param n_rounds: Number of rounds of the QAOA circuit, defaults to 1
+    :type n_rounds: int, optional
+    :param round_index: The round whose alpha and beta are swept, defaults to 0
+    :type round_index: int, optional
+    :param fixed_angles: Angles ``[alpha_0, ..., beta_0, ...]`` held fixed for the other rounds, defaults to zeros
+    :type fixed_angles: list, optional
+    :returns: A ``len(alphas) x 2p`` array
+    :rtype: {numpy.ndarray}
+    :raises: ValueError
+    """
+    if not 0 <= round_index < n_rounds:
+        raise ValueError("round_index must be between 0 and %s" % (n_rounds - 1))
+    if fixed_angles is None:
+        fixed_angles = np.zeros(2 * n_rounds)
+    fixed_angles = np.asarray(fixed_angles, dtype=float)
+    if fixed_angles.shape != (2 * n_rounds,):
+        raise ValueError(
+            "Incorrect number of fixed angles passed. Should be %s - User passed %s"
+            % (2 * n_rounds, fixed_angles.size)
+        )
+
+    angles = np.tile(fixed_angles, (len(alphas), 1))
+    angles[:, round_index] = alphas
+    angles[:, n_rounds + round_index] = betas
+    return angles
+
+
+def landscape_angles(alphas, betas, n_rounds=1, round_index=0, fixed_angles=None):
+    """Build the angle vectors for every point of an alpha/beta grid
+
+    :param alphas: Grid values for alpha
+    :type alphas: numpy.ndarray
+    :param betas: Grid values for beta
+    :type betas: numpy.ndarray
+    :param n_rounds: Number of rounds of the QAOA circuit, defaults to 1
+    :type n_rounds: int, optional
+    :param round_index: The round whose alpha and beta are swept, defaults to 0
+    :type round_index: int, optional
+    :param fixed_angles: Angles ``[alpha_0, ..., beta_0, ...]`` held fixed for the other rounds, defaults to zeros
+    :type fixed_angles: list, optional
+    :returns: A ``len(alphas) * len(betas) x 2p`` array in row-major (alpha, beta) order
+    :rtype: {numpy.ndarray}
+    :raises: ValueError
+    """
+    grid_alpha, grid_beta = np.meshgrid(alphas, betas, indexing="ij")
+    return slice_angles(
+        grid_alpha.ravel(), grid_beta.ravel(), n_rounds, round_index, fixed_angles
+    )
+
+
+def evaluate_angles(instance, angles, max_memory=DEFAULT_BATCH_MEMORY):
+    """Energies of an instance at a stack of angle vectors, on its own backend
+
+    The native NumPy engine evaluates the stack as vectorised batches and the
+    memory-lean engine one row after another in a single reused statevector.
+    Instances with a ``qiskit`` backend are evaluated point by point through
+    ``cost_function``.
+
+    :param instance: The instance to evaluate
+    :type instance: QAOAInstance3SAT
+    :param angles: A ``K x 2p`` array, each row is ``[alpha_0, ..., beta_0, ...]``
+    :type angles: numpy.ndarray
+    :param max_memory: Memory budget in bytes for each batch of statevectors
+    :type max_memory: int, optional
+    :returns: ``K`` energies
+    :rtype: {numpy.ndarray}
+    """
+    instance.build_hamiltonian()
+    if instance.native_backend:
+        return evaluate_batch(
+            angles, instance.hamiltonian, instance.n_qubits, max_memory=max_memory
+        )
+    if instance.large_backend:
+        return instance.backend.evaluate_batch(
+            angles, instance.hamiltonian, instance.n_qubits
+        )
+    return np.array([instance.cost_function(row) for row in angles])
+
+
+def compute_landscape(
+    instance,
+    alphas,
+    betas,
+    round_index=0,
+    fixed_angles=None,
+    max_memory=DEFAULT_BATCH_MEMORY,
+    disp=False,
+):
+    """Evaluate the energy of an instance over an alpha/beta grid
+
+    The instance is compiled once and the grid is evaluated a tile of rows at
+    a time through ``evaluate_angles``.
+
+    :param instance: The instance to evaluate
+    :type instance: QAOAInstance3SAT
+    :param alphas: Grid values for alpha
+    :type alphas: numpy.ndarray
+    :param betas: Grid values for beta
+    :type betas: numpy.ndarray
+    :param round_index: The round whose alpha and beta are swept, defaults to 0
+    :type round_index: int, optional
+    :param fixed_angles: Angles ``[alpha_0, ..., beta_0, ...]`` held fixed for the other rounds, defaults to zeros
+    :type fixed_angles: list, optional
+    :param max_memory: Memory budget in bytes for each tile of statevectors
+    :type max_memory: int, optional
+    :param disp: Set to True to print landscape progress messages, defaults to False
+    :type disp: bool, optional
+    :returns: A ``len(alphas) x len(betas)`` array of energies
+    :rtype: {numpy.ndarray}
+    """
+    angles = landscape_angles(
+        alphas, betas, instance.n_rounds, round_index, fixed_angles
+    )
+    energies = np.empty(len(angles))
+
+    instance.build_hamiltonian()
+    tile_rows = max(1, batch_chunk_size(instance.n_qubits, max_memory) // len(betas))
+    tile = tile_rows * len(betas)
+
+    for start in range(0, len(angles), tile):
+        energies[start : start + tile] = evaluate_angles(
+            instance, angles[start : start + tile], max_memory=max_memory
+        )
+
+        if disp:
+            print(
+                "Landscape Tile: \t alpha rows %s-%s of %s"
+                % (
+                    start // len(betas),
+                    min(start + tile, len(angles)) // len(betas) - 1,
+                    len(alphas),
+                )
+            )
+
+    return energies.reshape(len(alphas), len(betas))
+
+
+# Per-process state of the parallel landscape workers
+_WORKER = {}
+
+
+def _shared_array(array):
+    """Copy an array into a new shared memory block
+
+    :returns: The shared memory block and an array view on it
+    :rtype: {multiprocessing.shared_memory.SharedMemory, numpy.ndarray}
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    view[...] = array
+    return block, view
+
+
+def _init_landscape_worker(hamiltonian_spec, energies_spec, grid_spec):
+    """Attach a pool worker to the shared Hamiltonian and output arrays"""
+    for name, spec in (("hamiltonian", hamiltonian_spec), ("energies", energies_spec)):
+        block_name, shape, dtype = spec
+        block = shared_memory.SharedMemory(name=block_name)
+        _WORKER[name + "_block"] = block
+        _WORKER[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    _WORKER.update(grid_spec)
+
+
+def _evaluate_landscape_tile(tile):
+    """Evaluate one ``(alpha_start, alpha_stop, beta_start, beta_stop)`` tile in a worker"""
+    alpha_start, alpha_stop, beta_start, beta_stop = tile
+    angles = landscape_angles(
+        _WORKER["alphas"][alpha_start:alpha_stop],
+        _WORKER["betas"][beta_start:beta_stop],
+        _WORKER["n_rounds"],
+        _WORKER["round_index"],
+        _WORKER["fixed_angles"],
+    )
+    energies = evaluate_batch(
+        angles,
+        _WORKER["hamiltonian"],
+        _WORKER["n_qubits"],
+        max_memory=_WORKER["max_memory"],
+    )
+    tile_energies = _WORKER["energies"][alpha_start:alpha_stop, beta_start:beta_stop]
+    tile_energies[...] = energies.reshape(tile_energies.shape)
+    return tile
+
+
+def parallel_landscape(
+    instance,
+    alphas,
+    betas,
+    round_index=0,
+    fixed_angles=None,
+    n_workers=None,
+    tile_size=32,
+    ordered=True,
+    max_memory=DEFAULT_BATCH_MEMORY,
+    disp=False,
+):
+    """Evaluate the energy landscape of an instance on a process pool
+
+    The grid is split into ``tile_size x tile_size`` tiles which are evaluated
+    by the pool workers on the native NumPy engine. The compiled Hamiltonian is
+    placed in shared memory once instead of being pickled to every worker, and
+    each worker writes its tile straight into a shared output array, so the
+    result does not depend on the order in which tiles finish.
+
+    :param instance: The instance to evaluate
+    :type instance: QAOAInstance3SAT
+    :param alphas: Grid values for alpha
+    :type alphas: numpy.ndarray
+    :param betas: Grid values for beta
+    :type betas: numpy.ndarray
+    :param round_index: The round whose alpha and beta are swept, defaults to 0
+    :type round_index: int, optional
+    :param fixed_angles: Angles ``[alpha_0, ..., beta_0, ...]`` held fixed for the other rounds, defaults to zeros
+    :type fixed_angles: list, optional
+    :param n_workers: Number of worker processes, defaults to the number of CPUs
+    :type n_workers: int, optional
+    :param tile_size: Number of grid points along each side of a tile, defaults to 32
+    :type tile_size: int, optional
+    :param ordered: Set to False to let tiles complete (and be reported) in any order, defaults to True
+    :type ordered: bool, optional
+    :param max_memory: Memory budget in bytes for the statevectors of each worker
+    :type max_memory: int, optional
+    :param disp: Set to True to print landscape progress messages, defaults to False
+    :type disp: bool, optional
+    :returns: A ``len(alphas) x len(betas)`` array of energies
+    :rtype: {numpy.ndarray}
+    """
+    alphas = np.asarray(alphas, dtype=float)
+    betas = np.asarray(betas, dtype=float)
+    # Validates round_index and fixed_angles before starting any workers
+    landscape_angles(
+        alphas[:1], betas[:1], instance.n_rounds, round_index, fixed_angles
+    )
+
+    instance.build_hamiltonian()
+    hamiltonian = np.asarray(instance.hamiltonian, dtype=float)
+
+    tiles = [
+        (a, min(a + tile_size, len(alphas)), b, min(b + tile_size, len(betas)))
+        for a in range(0, len(alphas), tile_size)
+        for b in range(0, len(betas), tile_size)
+    ]
+    grid_spec = {
+        "alphas": alphas,
+        "betas": betas,
+        "n_qubits": instance.n_qubits,
+        "n_rounds": instance.n_rounds,
+        "round_index": round_index,
+        "fixed_angles": fixed_angles,
+        "max_memory": max_memory,
+    }
+
+    hamiltonian_block, _ = _shared_array(hamiltonian)
+    energies_block, energies = _shared_array(np.zeros((len(alphas), len(betas))))
+    try:
+        initargs = (
+            (hamiltonian_block.name, hamiltonian.shape, hamiltonian.dtype),
+            (energies_block.name, energies.shape, energies.dtype),
+            grid_spec,
+        )
+        with Pool(n_workers, _init_landscape_worker, initargs) as pool:
+            imap = pool.imap if ordered else pool.imap_unordered
+            for done, tile in enumerate(imap(_evaluate_landscape_tile, tiles), 1):
+                if disp:
+                    print(
+                        "Landscape Tile %s of %s: \t alpha=%s:%s \t beta=%s:%s"
+                        % ((done, len(tiles)) + tile)
+                    )
+        result = energies.copy()
+    finally:
+        del energies
+        for block in (hamiltonian_block, energies_block):
+            block.close()
+            block.unlink()
+
+    return result
+
+
+def _cell_points(cell):
+    """Lattice points added when a ``(i, j, size)`` cell is split into four"""
+    i, j, size = cell
+    half = size // 2
+    return {
+        (i + half, j + half),
+        (i + half, j),
+        (i + half, j + size),
+        (i, j + half),
+        (i + size, j + half),
+    }
+
+
+def _split_cell(cell):
+    """The four quadrants of a ``(i, j, size)`` cell"""
+    i, j, size = cell
+    half = size // 2
+    return [
+        (i, j, half),
+        (i + half, j, half),
+        (i, j + half, half),
+        (i + half, j + half, half),
+    ]
+
+
+def adaptive_landscape(
+    instance,
+    alpha_bounds=(-pi, pi),
+    beta_bounds=(-pi, pi),
+    coarse_resolution=17,
+    max_evaluations=4096,
+    min_cell_size=0.01,
+    gradient_tol=0.05,
+    curvature_tol=0.05,
+    minimum_tol=0.1,
+    output_resolution=200,
+    round_index=0,
+    fixed_angles=None,
+    max_memory=DEFAULT_BATCH_MEMORY,
+    disp=False,
+):
+    """Sample the energy landscape of an instance with adaptive refinement
+
+    Starting from a coarse grid, every cell whose corners show a large energy
+    change (gradient), a large mixed second difference (curvature) or an energy
+    close to the running minimum is split into four. Cells are refined in order
+    of how far they exceed these thresholds until there is nothing left to
+    refine, the evaluation budget is spent or cells reach ``min_cell_size``.
+    All thresholds are fractions of the energy range sampled so far. Each round
+    of refinement is evaluated as one batch on the instance's backend.
+
+    :param instance: The instance to evaluate
+    :type instance: QAOAInstance3SAT
+    :param alpha_bounds: Lower and upper bounds of the alpha axis, defaults to ``(-pi, pi)``
+    :type alpha_bounds: tuple, optional
+    :param beta_bounds: Lower and upper bounds of the beta axis, defaults to ``(-pi, pi)``
+    :type beta_bounds: tuple, optional
+    :param coarse_resolution: Number of points along each axis of the initial grid, defaults to 17
+    :type coarse_resolution: int, optional
+    :param max_evaluations: Budget of energy evaluations (including the initial grid), defaults to 4096
+    :type max_evaluations: int, optional
+    :param min_cell_size: Cells are not refined below this width, defaults to 0.01
+    :type min_cell_size: float, optional
+    :param gradient_tol: Refine cells whose corner energies differ by more than this, defaults to 0.05
+    :type gradient_tol: float, optional
+    :param curvature_tol: Refine cells whose mixed second difference exceeds this, defaults to 0.05
+    :type curvature_tol: float, optional
+    :param minimum_tol: Refine cells with a corner within this of the running minimum, defaults to 0.1
+    :type minimum_tol: float, optional
+    :param output_resolution: Number of points along each axis of the interpolated grid (or an
+        ``(n_alpha, n_beta)`` pair), defaults to 200
+    :type output_resolution: int or tuple, optional
+    :param round_index: The round whose alpha and beta are swept, defaults to 0
+    :type round_index: int, optional
+    :param fixed_angles: Angles ``[alpha_0, ..., beta_0, ...]`` held fixed for the other rounds, defaults to zeros
+    :type fixed_angles: list, optional
+    :param max_memory: Memory budget in bytes for each batch of statevectors
+    :type max_memory: int, optional
+    :param disp: Set to True to print refinement messages, defaults to False
+    :type disp: bool, optional
+    :returns: The ``N x 2`` sampled (alpha, beta) points, their ``N`` energies, and the interpolated alpha grid,
+        beta grid and array of energies
+    :rtype: {numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray}
+    :raises: ValueError
+    """
+    if coarse_resolution < 2:
+        raise ValueError("coarse_resolution must be at least 2")
+    if coarse_resolution ** 2 > max_evaluations:
+        raise ValueError("max_evaluations is smaller than the coarse grid")
+
+    # Cells live on an integer lattice fine enough to hold the smallest cells
+    n_cells = coarse_resolution - 1
+    coarse_width = max(np.ptp(alpha_bounds), np.ptp(beta_bounds)) / n_cells
+    scale = 2 ** max(0, int(np.ceil(np.log2(coarse_width / min_cell_size))))
+    alpha_step = np.ptp(alpha_bounds) / (n_cells * scale)
+    beta_step = np.ptp(beta_bounds) / (n_cells * scale)
+
+    instance.build_hamiltonian()
+    samples = {}
+
+    def evaluate(points):
+        lattice = np.array(sorted(points))
+        angles = slice_angles(
+            alpha_bounds[0] + lattice[:, 0] * alpha_step,
+            beta_bounds[0] + lattice[:, 1] * beta_step,
+            instance.n_rounds,
+            round_index,
+            fixed_angles,
+        )
+        energies = evaluate_angles(instance, angles, max_memory=max_memory)
+        samples.update(zip(map(tuple, lattice), energies))
+
+    evaluate(
+        {
+            (i * scale, j * scale)
+            for i in range(coarse_resolution)
+            for j in range(coarse_resolution)
+        }
+    )
+    cells = [
+        (i * scale, j * scale, scale) for i in range(n_cells) for j in range(n_cells)
+    ]
+
+    while True:
+        energies = np.fromiter(samples.values(), dtype=float)
+        energy_min = energies.min()
+        energy_range = max(np.ptp(energies), np.finfo(float).eps)
+
+        # Score every refinable cell, a score above 1 exceeds some threshold
+        ranked = []
+        for cell in cells:
+            i, j, size = cell
+            if size == 1:
+                continue
+            corners = np.array(
+                [
+                    samples[(i, j)],
+                    samples[(i + size, j)],
+                    samples[(i, j + size)],
+                    samples[(i + size, j + size)],
+                ]
+            )
+            gradient = np.ptp(corners) / energy_range
+            curvature = abs(corners[0] - corners[1] - corners[2] + corners[3])
+            curvature /= energy_range
+            closeness = 1 - (corners.min() - energy_min) / energy_range
+            score = max(
+                gradient / gradient_tol,
+                curvature / curvature_tol,
+                closeness / (1 - minimum_tol),
+            )
+            if score > 1:
+                ranked.append((score, cell))
+        ranked.sort(reverse=True)
+
+        # Refine the highest scoring cells the budget allows
+        refined, new_points = set(), set()
+        for _, cell in ranked:
+            points = _cell_points(cell).difference(samples, new_points)
+            if len(samples) + len(new_points) + len(points) > max_evaluations:
+                break
+            refined.add(cell)
+            new_points.update(points)
+
+        if not refined:
+            break
+
+        evaluate(new_points)
+        cells = [cell for cell in cells if cell not in refined]
+        cells.extend(child for cell in refined for child in _split_cell(cell))
+
+        if disp:
+            print(
+                "Landscape Refinement: \t refined=%s \t evaluations=%s \t energy=%s"
+                % (len(refined), len(samples), min(samples.values()))
+            )
+
+    lattice = np.array(list(samples))
+    points = np.column_stack(
+        (
+            alpha_bounds[0] + lattice[:, 0] * alpha_step,
+            beta_bounds[0] + lattice[:, 1] * beta_step,
+        )
+    )
+    point_energies = np.fromiter(samples.values(), dtype=float)
+
+    # Interpolate onto a regular grid (nearest neighbour at the hull's edge)
+    n_alpha, n_beta = np.broadcast_to(output_resolution, 2)
+    alphas = np.linspace(alpha_bounds[0], alpha_bounds[1], n_alpha)
+    betas = np.linspace(beta_bounds[0], beta_bounds[1], n_beta)
+    grid = np.meshgrid(alphas, betas, indexing="ij")
+    grid_energies = griddata(points, point_energies, tuple(grid), method="linear")
+    missing = np.isnan(grid_energies)
+    if missing.any():
+        grid_energies[missing] = griddata(
+            points,
+            point_energies,
+            (grid[0][missing], grid[1][missing]),
+            method="nearest",
+        )
+
+    return points, point_energies, alphas, betas, grid_energies
 
 
 def build_landscape(
-    instance_filename, classical_opt_alg, optimisation_opts, write_csv=False, disp=False
+    instance_filename,
+    classical_opt_alg,
+    optimisation_opts,
+    write_csv=False,
+    disp=False,
+    backend=None,
+    resolution=63,
+    alpha_bounds=None,
+    beta_bounds=None,
+    n_rounds=1,
+    round_index=0,
+    fixed_angles=None,
+    max_memory=DEFAULT_BATCH_MEMORY,
+    n_workers=1,
+    tile_size=32,
+    ordered=True,
+    adaptive=False,
+    max_evaluations=4096,
+    min_cell_size=0.01,
+    instance_dir=os.path.join("data", "raw"),
 ):
-    """This function generates a landscape for an instance problem. Currently the functions only work on ``n_rounds=1``
+    """This function generates a landscape for an instance problem. For ``n_rounds > 1`` the landscape is a slice
+    through the alpha and beta of ``round_index`` with the other rounds fixed at ``fixed_angles``
+
+    Without explicit bounds only a fundamental domain of the instance's angle symmetries is swept (see
+    ``AngleSymmetry.landscape_bounds``), ``unfold_landscape`` recovers the negative alpha half if needed.
 
     :param instance_filename: Instance filename
     :type instance_filename: str
@@ -30,75 +548,146 @@ def build_landscape(
     :type write_csv: bool, optional
     :param write_csv: Set to True to print landscape iteration messages, defaults to False
     :type disp: bool, optional
-    :returns: Pandas Dataframe for the instance landscape
-    :rtype: pandas.DataFrame
+    :param backend: Simulation backend, defaults to the native NumPy engine
+    :type backend: object, optional
+    :param resolution: Number of grid points along each axis (or an ``(n_alpha, n_beta)`` pair), defaults to 63
+    :type resolution: int or tuple, optional
+    :param alpha_bounds: Lower and upper bounds of the alpha axis, defaults to the fundamental domain
+    :type alpha_bounds: tuple, optional
+    :param beta_bounds: Lower and upper bounds of the beta axis, defaults to the fundamental domain
+    :type beta_bounds: tuple, optional
+    :param n_rounds: Number of rounds to build QAOA Circuit, defaults to 1
+    :type n_rounds: int, optional
+    :param round_index: The round whose alpha and beta are swept, defaults to 0
+    :type round_index: int, optional
+    :param fixed_angles: Angles ``[alpha_0, ..., beta_0, ...]`` held fixed for the other rounds, defaults to zeros
+    :type fixed_angles: list, optional
+    :param max_memory: Memory budget in bytes for each tile of statevectors
+    :type max_memory: int, optional
+    :param n_workers: Number of worker processes, ``None`` for one per CPU, defaults to 1
+    :type n_workers: int, optional
+    :param tile_size: Side length of the grid tiles handed to each worker, defaults to 32
+    :type tile_size: int, optional
+    :param ordered: Set to False to let parallel tiles complete in any order, defaults to True
+    :type ordered: bool, optional
+    :param adaptive: Set to True to refine a coarse grid adaptively (see ``adaptive_landscape``) and interpolate
+        the samples onto the ``resolution`` grid, defaults to False
+    :type adaptive: bool, optional
+    :param max_evaluations: Evaluation budget of the adaptive mode, defaults to 4096
+    :type max_evaluations: int, optional
+    :param min_cell_size: Smallest cell width of the adaptive mode, defaults to 0.01
+    :type min_cell_size: float, optional
+    :param instance_dir: Directory of the JSON or binary instance files, or an instance archive, defaults to ``data/raw``
+    :type instance_dir: str, optional
+    :returns: The alpha grid, the beta grid and a ``len(alphas) x len(betas)`` array of energies
+    :rtype: {numpy.ndarray, numpy.ndarray, numpy.ndarray}
     """
 
-    # Load instance into environment
-    instance_file = "data/raw/%s.json" % instance_filename
-    raw_instance = load_raw_instance(instance_file)
+    # Load instance into environment and construct rotation objects
+    (
+        n_qubits,
+        single_rotations,
+        double_rotations,
+        triple_rotations,
+        sat_assgn,
+    ) = load_instance(instance_dir, instance_filename)
 
-    # Construct rotation objects
-    n_qubits, single_rotations, double_rotations, triple_rotations = clean_instance(
-        raw_instance
+    # Initatiate Instance Class for problem
+    instance = QAOAInstance3SAT(
+        n_qubits=n_qubits,
+        single_rotations=single_rotations,
+        double_rotations=double_rotations,
+        triple_rotations=triple_rotations,
+        alpha=[0] * n_rounds,
+        beta=[0] * n_rounds,
+        n_rounds=n_rounds,
+        classical_opt_alg=classical_opt_alg,
+        optimiser_opts=optimisation_opts,
+        sat_assgn=sat_assgn,
+        backend="numpy" if backend is None else backend,
     )
 
-    single_rotations = Rotations(single_rotations, n_qubits)
-    double_rotations = Rotations(double_rotations, n_qubits)
-    triple_rotations = Rotations(triple_rotations, n_qubits)
+    # Default to a fundamental domain of the angles, time reversal only maps
+    # the slice onto itself if the other rounds are fixed at zero
+    instance.build_hamiltonian()
+    other_angles = np.delete(
+        slice_angles([0.0], [0.0], n_rounds, round_index, fixed_angles),
+        [round_index, n_rounds + round_index],
+    )
+    domain_alpha, domain_beta = instance.symmetry.landscape_bounds(
+        time_reversal=not np.any(other_angles)
+    )
+    alpha_bounds = domain_alpha if alpha_bounds is None else alpha_bounds
+    beta_bounds = domain_beta if beta_bounds is None else beta_bounds
 
     # Create a grid of alpha and beta
-    alphas = np.arange(start=-pi, stop=pi, step=0.1)
-    betas = np.arange(start=-pi, stop=pi, step=0.1)
-
-    energy_ls = []
-    iteration = 1
-
-    for alp in alphas:
-        for bet in betas:
-
-            # Initatiate Instance Class for problem
-            instance = QAOAInstance3SAT(
-                n_qubits=n_qubits,
-                single_rotations=single_rotations,
-                double_rotations=double_rotations,
-                triple_rotations=triple_rotations,
-                alpha=[alp],
-                beta=[bet],
-                n_rounds=1,
-                classical_opt_alg="nelder-mead",
-                optimiser_opts=optimisation_opts,
-            )
+    n_alpha, n_beta = np.broadcast_to(resolution, 2)
+    alphas = np.linspace(alpha_bounds[0], alpha_bounds[1], n_alpha)
+    betas = np.linspace(beta_bounds[0], beta_bounds[1], n_beta)
 
-            # Build Quantum Circuit
-            instance.build_circuit()
-            iteration += 1
-
-            # Print the circuit being experimented on
-            # print(instance.quantum_circuit)
-            instance.simulate_circuit()
-            instance.measure_energy()
-            # Kick-off run
-            if disp:
-                print(
-                    "Landscape Iteration %s: \t alpha=%s \t beta=%s \t energy=%s"
-                    % (iteration, instance.alpha[0], instance.beta[0], instance.energy)
-                )
-
-            sim_dict = {"alpha": alp, "beta": bet, "energy": instance.energy}
-            energy_ls.append(sim_dict)
-
-        # Run Optimisation
-        # energy_0 = instance.energy
-
-    df = pd.DataFrame(energy_ls)
+    samples = None
+    if adaptive:
+        samples, sample_energies, alphas, betas, energies = adaptive_landscape(
+            instance,
+            alpha_bounds=alpha_bounds,
+            beta_bounds=beta_bounds,
+            max_evaluations=max_evaluations,
+            min_cell_size=min_cell_size,
+            output_resolution=resolution,
+            round_index=round_index,
+            fixed_angles=fixed_angles,
+            max_memory=max_memory,
+            disp=disp,
+        )
+    elif n_workers != 1 and instance.native_backend:
+        energies = parallel_landscape(
+            instance,
+            alphas,
+            betas,
+            round_index=round_index,
+            fixed_angles=fixed_angles,
+            n_workers=n_workers,
+            tile_size=tile_size,
+            ordered=ordered,
+            max_memory=max_memory,
+            disp=disp,
+        )
+    else:
+        energies = compute_landscape(
+            instance,
+            alphas,
+            betas,
+            round_index=round_index,
+            fixed_angles=fixed_angles,
+            max_memory=max_memory,
+            disp=disp,
+        )
 
     # Write data out if required
     if write_csv:
+        grid_alpha, grid_beta = np.meshgrid(alphas, betas, indexing="ij")
+        df = pd.DataFrame(
+            {
+                "alpha": grid_alpha.ravel(),
+                "beta": grid_beta.ravel(),
+                "energy": energies.ravel(),
+            }
+        )
         outfile = "data/processed/%s.csv" % instance_filename
         df.to_csv(outfile)
 
-    return df
+        # Keep the evaluated points of an adaptive landscape as well
+        if samples is not None:
+            df_samples = pd.DataFrame(
+                {
+                    "alpha": samples[:, 0],
+                    "beta": samples[:, 1],
+                    "energy": sample_energies,
+                }
+            )
+            df_samples.to_csv("data/processed/%s_samples.csv" % instance_filename)
+
+    return alphas, betas, energies
 
 
 if __name__ == "__main__":
@@ -0,0 +1,340 @@
+""" Experiment scheduler
+
+Runs every (instance, params file) pair of an experiment on a process pool,
+replacing the shell loops that started a new ``python run/main_qaoa.py`` per
+run. The parameter files and instance directory are read once, and workers
+are long lived, so each one pays the import cost once and keeps recently
+compiled instances in memory between runs.
+
+Author: Vivek Katial
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+from qaoa_three_sat.instance.binary import (
+    BINARY_SUFFIX,
+    InstanceArchive,
+    list_instances,
+)
+from qaoa_three_sat.simulation.simulate import simulate_circuit
+from qaoa_three_sat.utils.exp_utils import str2bool
+from qaoa_three_sat.utils.results_store import ResultsStore
+
+PARAMS_DIR = os.path.join("params", "ready")
+INSTANCE_DIR = os.path.join("data", "raw")
+PARAMS_COMPLETE_DIR = os.path.join("params", "complete")
+INSTANCE_COMPLETE_DIR = os.path.join("data", "complete")
+
+# Name of the default qiskit Aer backend on the command line, as in job manifests
+QISKIT_BACKEND = "qiskit"
+
+
+def load_params_files(params_dir=PARAMS_DIR):
+    """Read every parameter file of an experiment
+
+    :param params_dir: Directory of the JSON parameter files, defaults to ``params/ready``
+    :type params_dir: str, optional
+    :returns: Parameter file name to its parsed contents
+    :rtype: {dict}
+    """
+    params_files = {}
+    for name in sorted(os.listdir(params_dir)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(params_dir, name)) as file:
+            params_files[name] = json.load(file)
+    return params_files
+
+
+def run_task(instance_name, params_file, params, options):
+    """Run one (instance, params file) pair, as ``run/main_qaoa.py`` would
+
+    With ``track_mlflow`` the run logs the same params, metrics, trace and
+    artifacts as ``run/main_qaoa.py``. Errors are caught and reported so that
+    one failing run does not stop the others, and its MLFlow run is ended as
+    FAILED so the worker can start the next one.
+
+    :param instance_name: Instance filename
+    :type instance_name: str
+    :param params_file: Name of the parameter file
+    :type params_file: str
+    :param params: Contents of the parameter file
+    :type params: dict
+    :param options: Scheduler options (``params_dir``, ``instance_dir``, ``backend``, ``results_dir``, ``store_trace``, ``track_mlflow``, ``quiet``)
+    :type options: dict
+    :returns: A summary of the run, with an ``error`` if it failed
+    :rtype: {dict}
+    """
+    start = time.time()
+    summary = {"instance": instance_name, "params_file": params_file}
+    try:
+        opt_params = params["classical_optimisation"]
+        optimisation_opts = eval(opt_params["optimisation_opts"])
+        alpha_trial = json.loads(opt_params["alpha_trial"])
+        beta_trial = json.loads(opt_params["beta_trial"])
+
+        if options["track_mlflow"]:
+            from qaoa_three_sat.utils.mlflow_logger import mlflow_run
+
+            tracking = mlflow_run(params["experiment"])
+        else:
+            tracking = contextlib.nullcontext()
+
+        with tracking as logger:
+            if logger is not None:
+                # Log initial angle
+                logger.log_params({"alpha_init": alpha_trial, "beta_init": beta_trial})
+
+            output = io.StringIO() if options["quiet"] else sys.stdout
+            with contextlib.redirect_stdout(output):
+                instance = simulate_circuit(
+                    instance_filename=instance_name,
+                    classical_opt_alg=opt_params["classical_opt_alg"],
+                    optimisation_opts=optimisation_opts,
+                    alpha_trial=alpha_trial,
+                    beta_trial=beta_trial,
+                    n_rounds=int(opt_params["n_rounds"]),
+                    track_optimiser=True,
+                    backend=options["backend"],
+                    instance_dir=options["instance_dir"],
+                    results_store=ResultsStore(options["results_dir"]),
+                    store_trace=options["store_trace"],
+                )
+
+            summary["energy"] = instance.trace.best_energy
+            summary["classical_iter"] = instance.classical_iter
+
+            if logger is not None:
+                from qaoa_three_sat.utils.mlflow_logger import log_qaoa_run
+
+                log_qaoa_run(
+                    logger,
+                    instance,
+                    {
+                        "instance": instance_name,
+                        "params_file": params_file,
+                        "budget": optimisation_opts.get("budget"),
+                    },
+                    run_path=os.path.join(options["params_dir"], params_file),
+                )
+    except Exception:
+        summary["error"] = traceback.format_exc()
+
+    summary["seconds"] = time.time() - start
+    summary["pid"] = os.getpid()
+    return summary
+
+
+def run_experiments(
+    params_dir=PARAMS_DIR,
+    instance_dir=INSTANCE_DIR,
+    n_workers=None,
+    backend=None,
+    results_dir=None,
+    store_trace=False,
+    track_mlflow=False,
+    quiet=True,
+):
+    """Run every (instance, params file) pair on a process pool
+
+    :param params_dir: Directory of the JSON parameter files, defaults to ``params/ready``
+    :type params_dir: str, optional
+    :param instance_dir: Directory of the instances, or an instance archive, defaults to ``data/raw``
+    :type instance_dir: str, optional
+    :param n_workers: Number of worker processes, defaults to one per CPU
+    :type n_workers: int, optional
+    :param backend: Simulation backend, defaults to the qiskit Aer simulator like ``run/main_qaoa.py``
+    :type backend: object, optional
+    :param results_dir: Directory of the results store, defaults to ``$QAOA_RESULTS_DIR`` or ``data/results``
+    :type results_dir: str, optional
+    :param store_trace: Set True, to also store each run's optimisation trace, defaults to False
+    :type store_trace: bool, optional
+    :param track_mlflow: Set True, to also track each run on MLFlow, defaults to False
+    :type track_mlflow: bool, optional
+    :param quiet: Set False, to keep the optimisers' printed output, defaults to True
+    :type quiet: bool, optional
+    :returns: The summary of every run, in the order they finished
+    :rtype: {list}
+    """
+    params_files = load_params_files(params_dir)
+    instances = list_instances(instance_dir)
+    tasks = list(product(instances, params_files))
+    options = {
+        "params_dir": params_dir,
+        "instance_dir": instance_dir,
+        "backend": backend,
+        "results_dir": results_dir,
+        "store_trace": store_trace,
+        "track_mlflow": track_mlflow,
+        "quiet": quiet,
+    }
+
+    print(
+        "Running %s tasks (%s instances x %s params files)"
+        % (len(tasks), len(instances), len(params_files))
+    )
+    start = time.time()
+    summaries = []
+    n_evaluations = 0
+    with ProcessPoolExecutor(
+        max_workers=n_workers, mp_context=multiprocessing.get_context("fork")
+    ) as pool:
+        futures = [
+            pool.submit(run_task, inst, name, params_files[name], options)
+            for inst, name in tasks
+        ]
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries.append(summary)
+            n_evaluations += summary.get("classical_iter", 0)
+            elapsed = time.time() - start
+
+            status = (
+                "FAILED" if "error" in summary else "energy=%.6f" % summary["energy"]
+            )
+            print(
+                "[%s/%s] %s %s: %s in %.2fs \t %.2f tasks/s \t %.0f evaluations/s"
+                % (
+                    len(summaries),
+                    len(tasks),
+                    summary["instance"],
+                    summary["params_file"],
+                    status,
+                    summary["seconds"],
+                    len(summaries) / elapsed,
+                    n_evaluations / elapsed,
+                )
+            )
+            if "error" in summary:
+                print(summary["error"])
+
+    return summaries
+
+
+def move_completed(
+    summaries,
+    params_dir=PARAMS_DIR,
+    instance_dir=INSTANCE_DIR,
+    params_complete_dir=PARAMS_COMPLETE_DIR,
+    instance_complete_dir=INSTANCE_COMPLETE_DIR,
+):
+    """Move the instances and params files whose every task succeeded
+
+    Inputs with a failed task are left in place, so running the experiment
+    again retries them. Instances in an archive are never moved.
+
+    :param summaries: The summary of every run, as returned by ``run_experiments``
+    :type summaries: list
+    :param params_dir: Directory of the JSON parameter files, defaults to ``params/ready``
+    :type params_dir: str, optional
+    :param instance_dir: Directory of the instances, defaults to ``data/raw``
+    :type instance_dir: str, optional
+    :param params_complete_dir: Directory the completed params files are moved to, defaults to ``params/complete``
+    :type params_complete_dir: str, optional
+    :param instance_complete_dir: Directory the completed instances are moved to, defaults to ``data/complete``
+    :type instance_complete_dir: str, optional
+    :returns: The moved instance names and params files
+    :rtype: {list, list}
+    """
+    failed_instances = {s["instance"] for s in summaries if "error" in s}
+    failed_params = {s["params_file"] for s in summaries if "error" in s}
+    instances = sorted({s["instance"] for s in summaries} - failed_instances)
+    params_files = sorted({s["params_file"] for s in summaries} - failed_params)
+
+    if InstanceArchive.is_archive(instance_dir):
+        instances = []
+    for name in instances:
+        for suffix in (".json", BINARY_SUFFIX):
+            path = os.path.join(instance_dir, name + suffix)
+            if os.path.isfile(path):
+                shutil.move(path, instance_complete_dir)
+    for name in params_files:
+        shutil.move(os.path.join(params_dir, name), params_complete_dir)
+    return instances, params_files
+
+
+if __name__ == "__main__":
+    """Run an experiment's (instance, params file) pairs on a process pool"""
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-p", "--params_dir", type=str, default=PARAMS_DIR, help="Parameter files"
+    )
+    parser.add_argument(
+        "-i", "--instance_dir", type=str, default=INSTANCE_DIR, help="Raw instances"
+    )
+    parser.add_argument(
+        "-n",
+        "--n_workers",
+        type=int,
+        default=None,
+        help="Number of worker processes, defaults to one per CPU",
+    )
+    parser.add_argument(
+        "-b",
+        "--backend",
+        type=str,
+        default=QISKIT_BACKEND,
+        help="Simulation backend, 'qiskit' (the default) for the qiskit Aer simulator, 'numpy' for the native statevector engine or 'numpy-large[:complex128]' for the memory-lean engine",
+    )
+    parser.add_argument(
+        "-R",
+        "--results_dir",
+        type=str,
+        default=None,
+        help="Directory of the results store, defaults to $QAOA_RESULTS_DIR or data/results",
+    )
+    parser.add_argument(
+        "--store_trace",
+        type=str2bool,
+        nargs="?",
+        const=True,
+        default=False,
+        help="Also store the full optimisation trace in the results store.",
+    )
+    parser.add_argument(
+        "-T",
+        "--track_mlflow",
+        type=str2bool,
+        nargs="?",
+        const=True,
+        default=False,
+        help="Activate MlFlow Tracking.",
+    )
+    parser.add_argument(
+        "--move_completed",
+        type=str2bool,
+        nargs="?",
+        const=True,
+        default=False,
+        help="Move the instances and params files whose every task succeeded to data/complete and params/complete.",
+    )
+    args = parser.parse_args()
+
+    summaries = run_experiments(
+        params_dir=args.params_dir,
+        instance_dir=args.instance_dir,
+        n_workers=args.n_workers,
+        backend=None if args.backend == QISKIT_BACKEND else args.backend,
+        results_dir=args.results_dir,
+        store_trace=args.store_trace,
+        track_mlflow=args.track_mlflow,
+    )
+    if args.move_completed:
+        move_completed(summaries, args.params_dir, args.instance_dir)
+
+    n_failed = sum("error" in summary for summary in summaries)
+    if n_failed:
+        print("%s of %s tasks failed" % (n_failed, len(summaries)))
+        sys.exit(1)
@@ -6,14 +6,18 @@ Author: Vivek Katial
 """
 
 from math import pi
+from os import path
 import argparse
 import yaml
 import json
 
 # Import Custom Modules
 from qaoa_three_sat.instance.three_sat import QAOAInstance3SAT
-from qaoa_three_sat.utils.qc_helpers import load_raw_instance, clean_instance
-from qaoa_three_sat.rotation.rotations import Rotations
+from qaoa_three_sat.instance.binary import load_instance
+from qaoa_three_sat.simulation.chunked import format_bytes
+from qaoa_three_sat.simulation.warm_start import extend_schedule, split_budget
+from qaoa_three_sat.utils.exp_utils import str2bool
+from qaoa_three_sat.utils.results_store import ResultsStore, write_run
 
 
 def simulate_circuit(
@@ -26,9 +30,23 @@ def simulate_circuit(
     track_optimiser,
     disp=False,
     mlflow=False,
+    cache_dir=None,
+    backend=None,
+    warm_start=None,
+    eval_cache=None,
+    results_store=None,
+    store_trace=False,
+    instance_dir=path.join("data", "raw"),
 ):
     """This function simulates an instance of 3SAT on QAOA
 
+    With ``warm_start`` set the circuit is optimised for 1, 2, ..., ``n_rounds``
+    rounds in turn, and each level starts from the previous level's optimum
+    extended by one round with the given method (see ``extend_schedule``). The
+    ``budget`` of ``optimisation_opts`` is that of the whole run, split across
+    the levels in proportion to their number of rounds (see ``split_budget``),
+    so warm and cold started runs spend the same number of evaluations.
+
     :param instance_filename: Instance filename
     :type instance_filename: str
     :param classical_opt_alg: Name of Classical Optmisation Algorithm
@@ -47,58 +65,131 @@ def simulate_circuit(
     :type disp: bool, optional
     :param mlflow: Set True, to track results on an MLFlow server, defaults to False
     :type disp: bool, optional
+    :param cache_dir: Compiled instance cache directory, defaults to ``$QAOA_CACHE_DIR``
+    :type cache_dir: str, optional
+    :param backend: Simulation backend, ``"numpy"`` for the native statevector engine or
+        ``"numpy-large[:precision]"`` for the memory-lean engine, defaults to the instance default
+    :type backend: object, optional
+    :param warm_start: ``"interp"`` or ``"fourier"`` to warm start each level from the one before, defaults to None
+    :type warm_start: str, optional
+    :param eval_cache: Cache of cost function evaluations, defaults to None
+    :type eval_cache: EvaluationCache, optional
+    :param results_store: Store to append the run's summary to, defaults to None
+    :type results_store: ResultsStore, optional
+    :param store_trace: Set True, to also store the full optimisation trace, defaults to False
+    :type store_trace: bool, optional
+    :param instance_dir: Directory of the JSON or binary instance files, or an instance archive, defaults to ``data/raw``
+    :type instance_dir: str, optional
     :returns: Instance Object
     :rtype: {qaoa_three_sat.QAOAInstance3SAT}
     """
 
-    # Load instance into environment
-    instance_file = "data/raw/%s.json" % instance_filename
-    raw_instance = load_raw_instance(instance_file)
-
-    # Construct rotation objects
+    # Load instance into environment and construct rotation objects
     (
         n_qubits,
         single_rotations,
         double_rotations,
         triple_rotations,
         sat_assgn,
-    ) = clean_instance(raw_instance)
-
-    single_rotations = Rotations(single_rotations, n_qubits)
-    double_rotations = Rotations(double_rotations, n_qubits)
-    triple_rotations = Rotations(triple_rotations, n_qubits)
-
-    # Initatiate Instance Class for problem
-    instance = QAOAInstance3SAT(
-        n_qubits=n_qubits,
-        single_rotations=single_rotations,
-        double_rotations=double_rotations,
-        triple_rotations=triple_rotations,
-        alpha=alpha_trial,
-        beta=beta_trial,
-        n_rounds=n_rounds,
-        classical_opt_alg=classical_opt_alg,
-        optimiser_opts=optimisation_opts,
-        track_optimiser=track_optimiser,
-        sat_assgn=sat_assgn,
-        disp=disp,
-        mlflow=mlflow,
-    )
+    ) = load_instance(instance_dir, instance_filename)
 
-    instance.build_circuit()
+    # Use the instance default backend unless one is given
+    backend_opts = {} if backend is None else {"backend": backend}
 
-    # Print the circuit being experimented on
-    if disp:
-        print(instance.quantum_circuit)
-    # Kick-off run
-    if disp:
-        print(
-            "Circuit Iteration %s: \t alpha=%s \t beta=%s \t energy=%s"
-            % (instance.classical_iter, instance.alpha, instance.beta, instance.energy)
+    if warm_start is None:
+        levels = [n_rounds]
+    else:
+        levels = range(1, n_rounds + 1)
+        alpha_trial, beta_trial = alpha_trial[:1], beta_trial[:1]
+        if "budget" in optimisation_opts:
+            level_budgets = split_budget(optimisation_opts["budget"], n_rounds)
+
+    history = []
+    for level in levels:
+        opts = optimisation_opts
+        if warm_start is not None and "budget" in optimisation_opts:
+            opts = dict(opts, budget=level_budgets[level - 1])
+        if warm_start is not None and level > 1:
+            # Seed this level from the previous optimum, in canonical angles
+            alpha_opt, beta_opt = previous["alpha"], previous["beta"]
+            alpha_trial, beta_trial = extend_schedule(
+                alpha_opt, beta_opt, warm_start, symmetry=instance.symmetry
+            )
+            opts = dict(opts, warm_start=True)
+            # The previous instance is only freed by the garbage collector (its
+            # optimiser refers back to it), so release its statevector now
+            instance.statevector = None
+
+        # Initatiate Instance Class for problem
+        instance = QAOAInstance3SAT(
+            n_qubits=n_qubits,
+            single_rotations=single_rotations,
+            double_rotations=double_rotations,
+            triple_rotations=triple_rotations,
+            alpha=alpha_trial,
+            beta=beta_trial,
+            n_rounds=level,
+            classical_opt_alg=classical_opt_alg,
+            optimiser_opts=opts,
+            track_optimiser=track_optimiser,
+            sat_assgn=sat_assgn,
+            disp=disp,
+            mlflow=mlflow,
+            cache_dir=cache_dir,
+            eval_cache=eval_cache,
+            **backend_opts,
         )
 
-    # Optimise
-    instance.optimise_circuit()
+        # Report the peak memory of the memory-lean engine before running
+        estimate = instance.memory_estimate()
+        if estimate is not None:
+            print(
+                "Estimated peak memory for %s qubits: %s (statevector %s, Hamiltonian %s)"
+                % (
+                    n_qubits,
+                    format_bytes(estimate["total"]),
+                    format_bytes(estimate["statevector"]),
+                    format_bytes(estimate["hamiltonian"]),
+                )
+            )
+
+        # The native engines never simulate the qiskit circuit, only build it
+        # (and import qiskit) to print it
+        simulated_natively = instance.native_backend or instance.large_backend
+        if disp or not simulated_natively:
+            instance.build_circuit()
+
+        # Print the circuit being experimented on
+        if disp:
+            print(instance.quantum_circuit)
+        # Kick-off run
+        if disp:
+            print(
+                "Circuit Iteration %s: \t alpha=%s \t beta=%s \t energy=%s"
+                % (
+                    instance.classical_iter,
+                    instance.alpha,
+                    instance.beta,
+                    instance.energy,
+                )
+            )
+
+        # Optimise
+        instance.optimise_circuit()
+        instance.warm_start_history = list(history)
+
+        optimum = list(instance.optimiser.vars_vec)
+        previous = {
+            "n_rounds": level,
+            "alpha": optimum[:level],
+            "beta": optimum[level:],
+            "energy": instance.energy,
+            "classical_iter": instance.classical_iter,
+        }
+        history.append(previous)
+
+    if results_store is not None:
+        write_run(results_store, instance, instance_filename, include_trace=store_trace)
 
     return instance
 
@@ -115,6 +206,35 @@ if __name__ == "__main__":
     parser.add_argument(
         "-p", "--params_file", type=str, help="Parameter file for QAOA run"
     )
+    parser.add_argument(
+        "-b",
+        "--backend",
+        type=str,
+        default=None,
+        help="Simulation backend, set to 'numpy' for the native statevector engine or 'numpy-large[:complex128]' for the memory-lean engine",
+    )
+    parser.add_argument(
+        "-w",
+        "--warm_start",
+        type=str,
+        default=None,
+        help="Optimise for 1, ..., n_rounds rounds in turn, warm starting each from the last ('interp' or 'fourier')",
+    )
+    parser.add_argument(
+        "-R",
+        "--results_dir",
+        type=str,
+        default=None,
+        help="Directory of the results store, defaults to $QAOA_RESULTS_DIR or data/results",
+    )
+    parser.add_argument(
+        "--store_trace",
+        type=str2bool,
+        nargs="?",
+        const=True,
+        default=False,
+        help="Also store the full optimisation trace in the results store.",
+    )
     # Parse your arguments
     args = parser.parse_args()
     run_path = "params/ready/" + args.params_file
@@ -144,4 +264,8 @@ if __name__ == "__main__":
         n_rounds=n_rounds,
         track_optimiser=track_optimiser,
         disp=True,
+        backend=args.backend,
+        warm_start=args.warm_start,
+        results_store=ResultsStore(args.results_dir),
+        store_trace=args.store_trace,
     )
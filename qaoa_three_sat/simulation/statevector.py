@@ -0,0 +1,288 @@
+"""Native NumPy statevector engine for QAOA
+
+Simulates the QAOA circuit built by ``QAOAInstance3SAT.build_circuit`` without
+going through ``qiskit``. Statevectors use the ``qiskit`` (little-endian)
+ordering: qubit ``i`` is bit ``i`` of the basis index.
+
+Author: Vivek Katial
+"""
+
+import numpy as np
+
+# Backend name selecting this engine on ``QAOAInstance3SAT``
+NUMPY_BACKEND = "numpy"
+
+
+def initial_state(n_qubits):
+    """The uniform superposition prepared by the Hadamard layer
+
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :returns: The state :math:`|+\\rangle^{\\otimes n}`
+    :rtype: {numpy.ndarray}
+    """
+    return np.full(2 ** n_qubits, 2 ** (-n_qubits / 2), dtype=np.complex128)
+
+
+def rx_matrix(beta):
+    """Single qubit X rotation :math:`R_X(\\beta) = \\exp(-i \\beta X / 2)`
+
+    :param beta: Rotation angle
+    :type beta: float
+    :returns: A 2x2 unitary
+    :rtype: {numpy.ndarray}
+    """
+    cos, sin = np.cos(beta / 2), np.sin(beta / 2)
+    return np.array([[cos, -1j * sin], [-1j * sin, cos]])
+
+
+def apply_phase_separator(state, alpha, hamiltonian):
+    """Apply the single, double and triple qubit Z rotations of a round
+
+    The ``rz(-2 * alpha * coefficient)`` gates (with their ``cx`` ladders) of
+    a round multiply to :math:`\\exp(i \\alpha H)`, which is diagonal.
+
+    :param state: Statevector
+    :type state: numpy.ndarray
+    :param alpha: Angle alpha for the round
+    :type alpha: float
+    :param hamiltonian: Diagonal of the problem Hamiltonian
+    :type hamiltonian: numpy.ndarray
+    :returns: The rotated statevector
+    :rtype: {numpy.ndarray}
+    """
+    return state * np.exp(1j * alpha * hamiltonian)
+
+
+def apply_mixer(state, beta, n_qubits):
+    """Apply the ``rx(beta)`` layer closing a round
+
+    The statevector is reshaped so that qubit ``i`` is the middle axis of a
+    ``(2 ** (n - i - 1), 2, 2 ** i)`` tensor and contracted with the 2x2
+    rotation.
+
+    :param state: Statevector
+    :type state: numpy.ndarray
+    :param beta: Angle beta for the round
+    :type beta: float
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :returns: The rotated statevector
+    :rtype: {numpy.ndarray}
+    """
+    rx = rx_matrix(beta)
+    for qubit in range(n_qubits):
+        state = np.matmul(rx, state.reshape(-1, 2, 2 ** qubit)).reshape(-1)
+    return state
+
+
+def simulate_qaoa(alpha, beta, hamiltonian, n_qubits):
+    """Simulate the QAOA circuit for the given angles
+
+    :param alpha: Angles alpha, one per round
+    :type alpha: list
+    :param beta: Angles beta, one per round
+    :type beta: list
+    :param hamiltonian: Diagonal of the problem Hamiltonian
+    :type hamiltonian: numpy.ndarray
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :returns: The final statevector
+    :rtype: {numpy.ndarray}
+    """
+    state = initial_state(n_qubits)
+    for alp, bet in zip(alpha, beta):
+        state = apply_phase_separator(state, alp, hamiltonian)
+        state = apply_mixer(state, bet, n_qubits)
+    return state
+
+
+def apply_mixer_generator(state, n_qubits):
+    """Apply the generator :math:`\\frac{1}{2} \\sum_i X_i` of the ``rx(beta)`` layer
+
+    :param state: Statevector
+    :type state: numpy.ndarray
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :returns: A new (unnormalised) statevector
+    :rtype: {numpy.ndarray}
+    """
+    result = np.zeros_like(state)
+    for qubit in range(n_qubits):
+        # X_i swaps the amplitudes that differ only in bit i
+        result += state.reshape(-1, 2, 2 ** qubit)[:, ::-1, :].reshape(-1)
+    return result / 2
+
+
+def energy_and_gradient(alpha, beta, hamiltonian, n_qubits):
+    """Energy and its exact gradient with respect to every alpha and beta
+
+    Uses the adjoint (reverse-mode) method: after one forward simulation the
+    state and the co-state :math:`H|\\psi\\rangle` are evolved backwards
+    through the circuit together. For a gate :math:`\\exp(-i \\theta G)`
+    the derivative is :math:`2 \\, \\mathrm{Im} \\langle\\lambda|G|\\psi\\rangle`,
+    so the whole gradient costs about three simulations whatever the number of
+    rounds.
+
+    :param alpha: Angles alpha, one per round
+    :type alpha: list
+    :param beta: Angles beta, one per round
+    :type beta: list
+    :param hamiltonian: Diagonal of the problem Hamiltonian
+    :type hamiltonian: numpy.ndarray
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :returns: The energy and the gradient ``[dE/dalpha_0, ..., dE/dbeta_0, ...]``
+    :rtype: {float, numpy.ndarray}
+    """
+    state = simulate_qaoa(alpha, beta, hamiltonian, n_qubits)
+    adjoint = hamiltonian * state
+    energy = np.vdot(state, adjoint).real
+
+    grad_alpha = np.empty(len(alpha))
+    grad_beta = np.empty(len(beta))
+    for n_round in reversed(range(len(alpha))):
+        # Mixer exp(-i beta G) with G = sum_i X_i / 2
+        mixed = apply_mixer_generator(state, n_qubits)
+        grad_beta[n_round] = 2 * np.vdot(adjoint, mixed).imag
+        state = apply_mixer(state, -beta[n_round], n_qubits)
+        adjoint = apply_mixer(adjoint, -beta[n_round], n_qubits)
+
+        # Phase separator exp(i alpha H) = exp(-i alpha G) with G = -H
+        grad_alpha[n_round] = -2 * np.vdot(adjoint, hamiltonian * state).imag
+        state = apply_phase_separator(state, -alpha[n_round], hamiltonian)
+        adjoint = apply_phase_separator(adjoint, -alpha[n_round], hamiltonian)
+
+    return energy, np.concatenate((grad_alpha, grad_beta))
+
+
+####################################################
+# Batched Simulation
+####################################################
+
+# Default memory budget for a batch of statevectors (bytes)
+DEFAULT_BATCH_MEMORY = 2 ** 30
+# Amplitudes of the buffer the phases of a batch are built in, several rows at
+# a time when the states are small
+PHASE_BUFFER_SIZE = 2 ** 16
+
+
+def simulate_qaoa_batch(angles, hamiltonian, n_qubits):
+    """Simulate the QAOA circuit for a stack of angle vectors at once
+
+    The states are evolved in place. Besides them, only a phase buffer of at
+    least one state and two half-state-sized mixer buffers per row are
+    allocated (see ``batch_chunk_size``).
+
+    :param angles: A ``K x 2p`` array, each row is ``[alpha_0, ..., beta_0, ...]``
+    :type angles: numpy.ndarray
+    :param hamiltonian: Diagonal of the problem Hamiltonian
+    :type hamiltonian: numpy.ndarray
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :returns: A ``K x 2^n`` array of final statevectors
+    :rtype: {numpy.ndarray}
+    """
+    angles = np.atleast_2d(angles)
+    n_rows, n_rounds = angles.shape[0], angles.shape[1] // 2
+    states = np.full(
+        (n_rows, 2 ** n_qubits), 2 ** (-n_qubits / 2), dtype=np.complex128
+    )
+    block = min(n_rows, max(1, PHASE_BUFFER_SIZE // 2 ** n_qubits))
+    phase = np.empty((block, 2 ** n_qubits), dtype=np.complex128)
+    zero = np.empty((n_rows, 2 ** (n_qubits - 1)), dtype=np.complex128)
+    scratch = np.empty_like(zero)
+
+    for n_round in range(n_rounds):
+        # One phase per batch row, built a block of rows at a time in the buffer
+        for start in range(0, n_rows, block):
+            rows = states[start : start + block]
+            buffer = phase[: len(rows)]
+            alphas = angles[start : start + block, n_round]
+            np.multiply.outer(1j * alphas, hamiltonian, out=buffer)
+            np.exp(buffer, out=buffer)
+            rows *= buffer
+
+        # One rx rotation per batch row, applied in place on each qubit axis
+        betas = angles[:, n_rounds + n_round]
+        cos = np.cos(betas / 2)[:, None, None]
+        sin = -1j * np.sin(betas / 2)[:, None, None]
+        for qubit in range(n_qubits):
+            view = states.reshape(n_rows, -1, 2, 2 ** qubit)
+            zero_view = zero.reshape(n_rows, -1, 2 ** qubit)
+            scratch_view = scratch.reshape(n_rows, -1, 2 ** qubit)
+            zero_view[...] = view[:, :, 0, :]
+            np.multiply(sin, view[:, :, 1, :], out=scratch_view)
+            view[:, :, 0, :] *= cos
+            view[:, :, 0, :] += scratch_view
+            np.multiply(sin, zero_view, out=scratch_view)
+            view[:, :, 1, :] *= cos
+            view[:, :, 1, :] += scratch_view
+
+    return states
+
+
+def batch_chunk_size(n_qubits, max_memory=DEFAULT_BATCH_MEMORY):
+    """Number of statevectors that can be evolved together within a budget
+
+    Each row of a batch needs its state and two half-state mixer buffers, so
+    two state-sized complex arrays. The phase buffer and the probabilities of
+    ``evaluate_batch`` are shared by all rows, and are taken off the budget
+    first.
+
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :param max_memory: Memory budget in bytes
+    :type max_memory: int
+    :returns: The number of rows per chunk (at least one)
+    :rtype: {int}
+    """
+    state_bytes = np.dtype(np.complex128).itemsize * 2 ** n_qubits
+    phase_bytes = np.dtype(np.complex128).itemsize * max(
+        2 ** n_qubits, PHASE_BUFFER_SIZE
+    )
+    shared_bytes = phase_bytes + np.dtype(float).itemsize * 2 ** n_qubits
+    return max(1, int((max_memory - shared_bytes) // (2 * state_bytes)))
+
+
+def evaluate_batch(
+    angles, hamiltonian, n_qubits, sat_index=None, max_memory=DEFAULT_BATCH_MEMORY
+):
+    """Energies (and success probabilities) for a stack of angle vectors
+
+    :param angles: A ``K x 2p`` array, each row is ``[alpha_0, ..., beta_0, ...]``
+    :type angles: numpy.ndarray
+    :param hamiltonian: Diagonal of the problem Hamiltonian
+    :type hamiltonian: numpy.ndarray
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :param sat_index: Basis index of the satisfying assignment, defaults to None
+    :type sat_index: int, optional
+    :param max_memory: Memory budget in bytes for each chunk of states
+    :type max_memory: int, optional
+    :returns: ``K`` energies, and ``K`` success probabilities if ``sat_index`` is given
+    :rtype: {numpy.ndarray or tuple}
+    """
+    angles = np.atleast_2d(np.asarray(angles, dtype=float))
+    energies = np.empty(angles.shape[0])
+    p_success = np.empty(angles.shape[0])
+    probabilities = np.empty(2 ** n_qubits)
+
+    chunk = batch_chunk_size(n_qubits, max_memory)
+    for start in range(0, angles.shape[0], chunk):
+        states = simulate_qaoa_batch(
+            angles[start : start + chunk], hamiltonian, n_qubits
+        )
+        # Row by row, through one reused buffer of probabilities
+        for row in range(len(states)):
+            np.abs(states[row], out=probabilities)
+            np.square(probabilities, out=probabilities)
+            energies[start + row] = probabilities @ hamiltonian
+            if sat_index is not None:
+                p_success[start + row] = probabilities[sat_index]
+        # Free this chunk before the next one is allocated
+        del states
+
+    if sat_index is None:
+        return energies
+    return energies, p_success
@@ -0,0 +1,146 @@
+"""
+Warm starting of QAOA angle schedules when increasing the number of rounds
+
+An optimised schedule at ``p`` rounds is extended to ``p + 1`` rounds and used
+as the starting point at the next level, following the INTERP and FOURIER
+strategies of Zhou et al. (Phys. Rev. X 10, 021067).
+
+Author: Vivek Katial
+"""
+
+from math import pi
+
+import numpy as np
+
+WARM_START_METHODS = ["interp", "fourier"]
+
+
+def interp_schedule(angles):
+    """Extend a schedule by one round with linear interpolation (INTERP)
+
+    With angles ``x_1, ..., x_p`` and ``x_0 = x_{p+1} = 0``, round ``i`` of the
+    new schedule is ``(i - 1) / p * x_{i-1} + (p - i + 1) / p * x_i``.
+
+    :param angles: The schedule at ``p`` rounds
+    :type angles: list
+    :returns: The schedule at ``p + 1`` rounds
+    :rtype: {numpy.ndarray}
+    """
+    angles = np.asarray(angles, dtype=float)
+    n_rounds = len(angles)
+    padded = np.concatenate(([0.0], angles, [0.0]))
+    i = np.arange(1, n_rounds + 2)
+    weights = (i - 1) / n_rounds
+    return weights * padded[i - 1] + (1 - weights) * padded[i]
+
+
+def fourier_basis(n_rounds, n_modes, basis):
+    """Fourier basis of a schedule, ``x_i = sum_k u_k f((k - 1/2)(i - 1/2) pi / p)``
+
+    :param n_rounds: Number of rounds ``p``
+    :type n_rounds: int
+    :param n_modes: Number of Fourier modes
+    :type n_modes: int
+    :param basis: ``"sin"`` (used for alpha) or ``"cos"`` (used for beta)
+    :type basis: str
+    :returns: A ``n_rounds x n_modes`` matrix
+    :rtype: {numpy.ndarray}
+    """
+    rounds = np.arange(1, n_rounds + 1) - 0.5
+    modes = np.arange(1, n_modes + 1) - 0.5
+    arguments = np.outer(rounds, modes) * pi / n_rounds
+    return np.sin(arguments) if basis == "sin" else np.cos(arguments)
+
+
+def fourier_schedule(angles, basis):
+    """Extend a schedule by one round through its Fourier modes (FOURIER)
+
+    The ``p`` Fourier amplitudes of the schedule are found, a zero amplitude is
+    appended for the new mode and the schedule is evaluated at ``p + 1`` rounds.
+
+    :param angles: The schedule at ``p`` rounds
+    :type angles: list
+    :param basis: ``"sin"`` (used for alpha) or ``"cos"`` (used for beta)
+    :type basis: str
+    :returns: The schedule at ``p + 1`` rounds
+    :rtype: {numpy.ndarray}
+    """
+    angles = np.asarray(angles, dtype=float)
+    n_rounds = len(angles)
+    amplitudes = np.linalg.solve(fourier_basis(n_rounds, n_rounds, basis), angles)
+    return fourier_basis(n_rounds + 1, n_rounds, basis) @ amplitudes
+
+
+def unwrap_schedule(angles, period):
+    """Shift each angle of a schedule by whole periods to within half a period
+    of the round before
+
+    ``AngleSymmetry.canonical_angles`` wraps every angle into its own period,
+    which can put a jump into an otherwise smooth schedule. INTERP and FOURIER
+    extrapolate the schedule, so its jumps are undone first.
+
+    :param angles: The schedule at ``p`` rounds
+    :type angles: list
+    :param period: Period of the angles, None if they are not periodic
+    :type period: float
+    :returns: The unwrapped schedule, starting from the same first angle
+    :rtype: {numpy.ndarray}
+    """
+    angles = np.array(angles, dtype=float)
+    if period is None or len(angles) < 2:
+        return angles
+    jumps = np.round(np.diff(angles) / period) * period
+    angles[1:] -= np.cumsum(jumps)
+    return angles
+
+
+def extend_schedule(alpha, beta, method="interp", symmetry=None):
+    """Extend an optimised schedule by one round to warm start the next level
+
+    :param alpha: Optimised phase separator angles at ``p`` rounds
+    :type alpha: list
+    :param beta: Optimised mixer angles at ``p`` rounds
+    :type beta: list
+    :param method: ``"interp"`` or ``"fourier"``, defaults to ``"interp"``
+    :type method: str, optional
+    :param symmetry: Symmetries of the instance, to unwrap canonical angles before extending them, defaults to None
+    :type symmetry: AngleSymmetry, optional
+    :raises ValueError: If the method is unknown
+    :returns: The alpha and beta schedules at ``p + 1`` rounds
+    :rtype: {tuple}
+    """
+    if symmetry is not None:
+        alpha = unwrap_schedule(alpha, symmetry.alpha_period)
+        beta = unwrap_schedule(beta, symmetry.beta_period)
+    if method == "interp":
+        return interp_schedule(alpha).tolist(), interp_schedule(beta).tolist()
+    if method == "fourier":
+        return (
+            fourier_schedule(alpha, "sin").tolist(),
+            fourier_schedule(beta, "cos").tolist(),
+        )
+    raise ValueError(
+        "Warm start method must be one of %s - User passed %s"
+        % (WARM_START_METHODS, method)
+    )
+
+
+def split_budget(budget, n_rounds):
+    """Split an evaluation budget across the levels ``1, ..., n_rounds`` of a warm start
+
+    Level ``p`` optimises ``2p`` angles, so it gets a share of the budget
+    proportional to ``p``. The shares add up to ``budget``, with what rounding
+    leaves over given to the last level, and every level gets at least one
+    evaluation.
+
+    :param budget: Evaluations of the whole warm started run
+    :type budget: int
+    :param n_rounds: Number of rounds of the last level
+    :type n_rounds: int
+    :returns: The budget of each level
+    :rtype: {list}
+    """
+    total = n_rounds * (n_rounds + 1) // 2
+    budgets = [max(1, budget * level // total) for level in range(1, n_rounds + 1)]
+    budgets[-1] = max(1, budget - sum(budgets[:-1]))
+    return budgets
@@ -0,0 +1,442 @@
+"""
+Resource-aware job manifests for cluster experiments
+
+Predicts the peak memory and runtime of each (instance, params file) task from
+its number of qubits, number of rounds, evaluation budget and backend, then
+groups the tasks into Slurm jobs: small tasks are packed, to run one after
+another, into shared allocations of at most ``pack_walltime``, and large tasks
+get a job each, sized to their own prediction.
+
+Both predictions are linear in the work of the simulation,
+
+    memory  = base_memory + bytes_per_amplitude * 2^n
+    seconds = startup_seconds + budget * (seconds_per_evaluation
+              + seconds_per_amplitude_op * p * (n + 1) * 2^n)
+
+since each of the ``p`` rounds applies a phase to the ``2^n`` amplitudes and a
+rotation on each of the ``n`` qubits. The default coefficients of every
+backend can be replaced by a least squares fit to measured benchmarks.
+
+Author: Vivek Katial
+"""
+
+import json
+import logging
+import math
+
+import numpy as np
+
+DEFAULT_BACKEND = "qiskit"
+
+# Model coefficients per backend, measured on a single core. The NumPy engines
+# keep the Hamiltonian (8 bytes per amplitude) and the statevector with its
+# temporaries; ``numpy-large`` keeps a single in-place ``complex64`` state.
+DEFAULT_CALIBRATION = {
+    "qiskit": {
+        "base_memory": 500 * 2 ** 20,
+        "bytes_per_amplitude": 56,
+        "startup_seconds": 20.0,
+        "seconds_per_evaluation": 5e-3,
+        "seconds_per_amplitude_op": 3e-8,
+    },
+    "numpy": {
+        "base_memory": 200 * 2 ** 20,
+        "bytes_per_amplitude": 80,
+        "startup_seconds": 5.0,
+        "seconds_per_evaluation": 2e-4,
+        "seconds_per_amplitude_op": 2.5e-8,
+    },
+    "numpy-large": {
+        "base_memory": 200 * 2 ** 20,
+        "bytes_per_amplitude": 16,
+        "startup_seconds": 5.0,
+        "seconds_per_evaluation": 2e-4,
+        "seconds_per_amplitude_op": 5e-9,
+    },
+    "numpy-large:complex128": {
+        "base_memory": 200 * 2 ** 20,
+        "bytes_per_amplitude": 24,
+        "startup_seconds": 5.0,
+        "seconds_per_evaluation": 2e-4,
+        "seconds_per_amplitude_op": 6e-9,
+    },
+}
+
+# Headroom added to every prediction
+MEMORY_MARGIN = 1.25
+WALLTIME_MARGIN = 1.5
+
+# Smallest allocation handed to Slurm
+MIN_MEMORY = 512 * 2 ** 20
+MIN_WALLTIME = 10 * 60
+
+# Tasks are packed into shared jobs of at most this walltime and memory
+PACK_WALLTIME = 4 * 60 * 60
+PACK_MEMORY = 4 * 2 ** 30
+# Largest allocation of a single job
+MAX_WALLTIME = 7 * 24 * 60 * 60
+
+
+def amplitude_ops(n_qubits, n_rounds):
+    """Amplitudes updated by one evaluation of the circuit, ``p (n + 1) 2^n``"""
+    return n_rounds * (n_qubits + 1) * 2 ** n_qubits
+
+
+def format_walltime(seconds):
+    """Slurm walltime, ``D-HH:MM:SS``"""
+    seconds = int(math.ceil(seconds))
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    return "%d-%02d:%02d:%02d" % (days, hours, minutes, seconds)
+
+
+def format_memory(n_bytes):
+    """Slurm memory in whole megabytes, e.g. ``"1024M"``"""
+    return "%dM" % int(math.ceil(n_bytes / 2 ** 20))
+
+
+def _fit_linear(x, y):
+    """Non-negative ``a, b`` of ``y = a + b x``, minimising the relative error"""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    design = np.stack([np.ones_like(x), x], axis=1) / y[:, None]
+    (a, b), *_ = np.linalg.lstsq(design, np.ones_like(y), rcond=None)
+    if a < 0:
+        a, b = 0.0, float(np.dot(x, y) / np.dot(x, x))
+    elif b < 0:
+        a, b = float(np.median(y)), 0.0
+    return float(a), float(b)
+
+
+class ResourceModel:
+    """Predicted memory and runtime of QAOA tasks
+
+    Attributes
+    ----------
+        calibration : dict
+            Model coefficients of each backend, as in ``DEFAULT_CALIBRATION``
+    """
+
+    def __init__(self, calibration=None):
+        self.calibration = {
+            backend: dict(coefficients)
+            for backend, coefficients in DEFAULT_CALIBRATION.items()
+        }
+        for backend, coefficients in (calibration or {}).items():
+            self.calibration.setdefault(backend, {}).update(coefficients)
+
+    @classmethod
+    def from_benchmarks(cls, records):
+        """Fit the model of each backend to benchmark measurements
+
+        Backends with fewer than two problem sizes keep their default
+        coefficients.
+
+        :param records: Measurements with ``backend``, ``n_qubits``, ``n_rounds``, ``seconds_per_evaluation`` and ``peak_memory`` (bytes)
+        :type records: list
+        :returns: The calibrated model
+        :rtype: {ResourceModel}
+        """
+        by_backend = {}
+        for record in records:
+            by_backend.setdefault(record["backend"], []).append(record)
+
+        calibration = {}
+        for backend, measured in by_backend.items():
+            if len({record["n_qubits"] for record in measured}) < 2:
+                logging.warning("Too few benchmarks to calibrate %s" % backend)
+                continue
+            overhead, per_op = _fit_linear(
+                [amplitude_ops(r["n_qubits"], r["n_rounds"]) for r in measured],
+                [r["seconds_per_evaluation"] for r in measured],
+            )
+            base, per_amplitude = _fit_linear(
+                [2 ** r["n_qubits"] for r in measured],
+                [r["peak_memory"] for r in measured],
+            )
+            calibration[backend] = {
+                "base_memory": base,
+                "bytes_per_amplitude": per_amplitude,
+                "seconds_per_evaluation": overhead,
+                "seconds_per_amplitude_op": per_op,
+            }
+        return cls(calibration)
+
+    @classmethod
+    def load(cls, filename):
+        """Model calibrated from a benchmark results file
+
+        Only the ``cost_function`` records of ``simulation.benchmark`` results
+        are used, a task's runtime being dominated by its evaluations.
+
+        :param filename: JSON file of benchmark records, or of a dict with them under ``results``
+        :type filename: str
+        :returns: The calibrated model
+        :rtype: {ResourceModel}
+        """
+        with open(filename) as file:
+            records = json.load(file)
+        if isinstance(records, dict):
+            records = records["results"]
+        return cls.from_benchmarks(
+            [
+                record
+                for record in records
+                if record.get("benchmark", "cost_function") == "cost_function"
+            ]
+        )
+
+    def coefficients(self, backend):
+        """Model coefficients of a backend (``None`` selects the default Aer backend)"""
+        backend = DEFAULT_BACKEND if backend is None else str(backend)
+        if backend not in self.calibration:
+            raise ValueError(
+                "No resource model for backend %s, use one of %s"
+                % (backend, sorted(self.calibration))
+            )
+        return self.calibration[backend]
+
+    def memory(self, n_qubits, backend=DEFAULT_BACKEND):
+        """Predicted peak memory of a task, in bytes
+
+        :param n_qubits: Number of qubits
+        :type n_qubits: int
+        :param backend: Simulation backend, defaults to ``DEFAULT_BACKEND``
+        :type backend: str, optional
+        :returns: The predicted peak memory
+        :rtype: {float}
+        """
+        model = self.coefficients(backend)
+        return model["base_memory"] + model["bytes_per_amplitude"] * 2 ** n_qubits
+
+    def seconds_per_evaluation(self, n_qubits, n_rounds, backend=DEFAULT_BACKEND):
+        """Predicted time of one evaluation of the cost function, in seconds"""
+        model = self.coefficients(backend)
+        return model["seconds_per_evaluation"] + model[
+            "seconds_per_amplitude_op"
+        ] * amplitude_ops(n_qubits, n_rounds)
+
+    def seconds(self, n_qubits, n_rounds, budget, backend=DEFAULT_BACKEND):
+        """Predicted runtime of a task, assuming it uses its whole budget
+
+        :param n_qubits: Number of qubits
+        :type n_qubits: int
+        :param n_rounds: Number of QAOA rounds
+        :type n_rounds: int
+        :param budget: Maximum number of function evaluations
+        :type budget: int
+        :param backend: Simulation backend, defaults to ``DEFAULT_BACKEND``
+        :type backend: str, optional
+        :returns: The predicted runtime in seconds
+        :rtype: {float}
+        """
+        per_evaluation = self.seconds_per_evaluation(n_qubits, n_rounds, backend)
+        return self.coefficients(backend)["startup_seconds"] + budget * per_evaluation
+
+    def predict(self, task, backend=DEFAULT_BACKEND):
+        """Add the predicted ``memory`` and ``seconds`` to a task
+
+        :param task: A task with ``n_qubits``, ``n_rounds`` and ``budget``
+        :type task: dict
+        :param backend: Simulation backend, defaults to ``DEFAULT_BACKEND``
+        :type backend: str, optional
+        :returns: The task with its predictions
+        :rtype: {dict}
+        """
+        return dict(
+            task,
+            memory=self.memory(task["n_qubits"], backend),
+            seconds=self.seconds(
+                task["n_qubits"], task["n_rounds"], task["budget"], backend
+            ),
+        )
+
+
+def _job(tasks):
+    """A job running ``tasks`` one after another"""
+    memory = max(MIN_MEMORY, MEMORY_MARGIN * max(task["memory"] for task in tasks))
+    seconds = max(MIN_WALLTIME, WALLTIME_MARGIN * sum(t["seconds"] for t in tasks))
+    if seconds > MAX_WALLTIME:
+        logging.warning(
+            "Predicted walltime of %s exceeds the maximum, capped at %s"
+            % (format_walltime(seconds), format_walltime(MAX_WALLTIME))
+        )
+        seconds = MAX_WALLTIME
+    return {
+        "memory": format_memory(memory),
+        "walltime": format_walltime(seconds),
+        "predicted_memory": max(task["memory"] for task in tasks),
+        "predicted_seconds": sum(task["seconds"] for task in tasks),
+        "tasks": tasks,
+    }
+
+
+def pack_tasks(tasks, pack_walltime=PACK_WALLTIME, pack_memory=PACK_MEMORY):
+    """Group predicted tasks into jobs
+
+    Tasks within ``pack_walltime`` and ``pack_memory`` are packed first fit
+    decreasing (by runtime) into shared jobs of at most ``pack_walltime``, the
+    others get a job each.
+
+    :param tasks: Tasks with their predicted ``memory`` and ``seconds``
+    :type tasks: list
+    :param pack_walltime: Walltime of a shared job, in seconds, defaults to ``PACK_WALLTIME``
+    :type pack_walltime: float, optional
+    :param pack_memory: Largest memory of a packed task, in bytes, defaults to ``PACK_MEMORY``
+    :type pack_memory: float, optional
+    :returns: The jobs, each with its Slurm ``memory`` and ``walltime`` and its ``tasks``
+    :rtype: {list}
+    """
+    capacity = pack_walltime / WALLTIME_MARGIN
+    small, large = [], []
+    for task in sorted(tasks, key=lambda task: task["seconds"], reverse=True):
+        if task["seconds"] <= capacity and task["memory"] <= pack_memory:
+            small.append(task)
+        else:
+            large.append(task)
+
+    bins, loads = [], []
+    for task in small:
+        for i, load in enumerate(loads):
+            if load + task["seconds"] <= capacity:
+                bins[i].append(task)
+                loads[i] += task["seconds"]
+                break
+        else:
+            bins.append([task])
+            loads.append(task["seconds"])
+
+    jobs = [_job([task]) for task in large] + [_job(tasks) for tasks in bins]
+    for n_job, job in enumerate(jobs):
+        job["name"] = "qaoa_%04d" % n_job
+    return jobs
+
+
+def build_manifest(
+    instance_sizes,
+    params_files,
+    backend=DEFAULT_BACKEND,
+    model=None,
+    pack_walltime=PACK_WALLTIME,
+    pack_memory=PACK_MEMORY,
+):
+    """Job manifest of every (instance, params file) task
+
+    :param instance_sizes: Instance name to its number of qubits
+    :type instance_sizes: dict
+    :param params_files: Params file name to its ``n_rounds`` and ``budget``
+    :type params_files: dict
+    :param backend: Simulation backend of the tasks, defaults to ``DEFAULT_BACKEND``
+    :type backend: str, optional
+    :param model: Resource model, defaults to the uncalibrated ``ResourceModel``
+    :type model: ResourceModel, optional
+    :param pack_walltime: Walltime of a shared job, in seconds, defaults to ``PACK_WALLTIME``
+    :type pack_walltime: float, optional
+    :param pack_memory: Largest memory of a packed task, in bytes, defaults to ``PACK_MEMORY``
+    :type pack_memory: float, optional
+    :returns: The manifest, with the ``backend``, the model ``calibration`` and the ``jobs``
+    :rtype: {dict}
+    """
+    if model is None:
+        model = ResourceModel()
+    tasks = [
+        model.predict(
+            {
+                "instance": instance,
+                "params_file": params_file,
+                "n_qubits": int(n_qubits),
+                "n_rounds": int(params["n_rounds"]),
+                "budget": int(params["budget"]),
+            },
+            backend,
+        )
+        for instance, n_qubits in sorted(instance_sizes.items())
+        for params_file, params in sorted(params_files.items())
+    ]
+    return {
+        "backend": backend,
+        "calibration": model.coefficients(backend),
+        "jobs": pack_tasks(tasks, pack_walltime, pack_memory),
+    }
+
+
+def instance_sizes(instance_dir):
+    """Number of qubits of each instance in an archive or a directory
+
+    :param instance_dir: Archive or directory of the instances
+    :type instance_dir: str
+    :returns: Instance name to its number of qubits
+    :rtype: {dict}
+    """
+    from qaoa_three_sat.instance.binary import (
+        InstanceArchive,
+        list_instances,
+        load_instance,
+        open_archive,
+    )
+
+    if InstanceArchive.is_archive(instance_dir):
+        archive = open_archive(instance_dir)
+        return dict(zip(archive.names.tolist(), archive.n_qubits.tolist()))
+    return {
+        name: load_instance(instance_dir, name)[0]
+        for name in list_instances(instance_dir)
+    }
+
+
+def write_manifest(manifest, filename):
+    """Write a job manifest as JSON"""
+    with open(filename, "w") as outfile:
+        json.dump(manifest, outfile, indent=4)
+
+
+def job_commands(manifest, track_mlflow=True):
+    """One line per job of a manifest, ``<name> <memory> <walltime> <task>...``
+
+    Each task is ``<instance>:<params file>:<track_mlflow>[:<backend>]`` for the
+    ``run_experiment`` app of the Singularity image. The backend is that of the
+    predictions, so jobs are sized for the engine they run on, and is left out
+    for ``DEFAULT_BACKEND``, the default of ``run/main_qaoa.py``.
+
+    :param manifest: Job manifest
+    :type manifest: dict
+    :param track_mlflow: Activate MlFlow tracking of the tasks, defaults to True
+    :type track_mlflow: bool, optional
+    :returns: The job lines
+    :rtype: {list}
+    """
+    backend = manifest.get("backend", DEFAULT_BACKEND)
+    suffix = "" if backend == DEFAULT_BACKEND else ":%s" % backend
+    lines = []
+    for job in manifest["jobs"]:
+        tasks = [
+            "%s:%s:%s%s" % (task["instance"], task["params_file"], track_mlflow, suffix)
+            for task in job["tasks"]
+        ]
+        lines.append(" ".join([job["name"], job["memory"], job["walltime"]] + tasks))
+    return lines
+
+
+if __name__ == "__main__":
+    """Print the ``job_commands`` of a manifest for ``bin/run_experiments.sh`` to submit"""
+
+    import argparse
+    from qaoa_three_sat.utils.exp_utils import str2bool
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("manifest", type=str, help="Job manifest")
+    parser.add_argument(
+        "-T",
+        "--track_mlflow",
+        type=str2bool,
+        nargs="?",
+        const=True,
+        default=True,
+        help="Activate MlFlow Tracking.",
+    )
+    args = parser.parse_args()
+
+    with open(args.manifest) as file:
+        manifest = json.load(file)
+    for line in job_commands(manifest, args.track_mlflow):
+        print(line)
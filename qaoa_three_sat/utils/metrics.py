@@ -0,0 +1,213 @@
+"""
+Quality metrics of QAOA states
+
+Every metric reads amplitudes by integer basis state index, so nothing scales
+with the number of basis states beyond a single pass over the probabilities.
+Functions take a single statevector of length ``2^n`` or a batch of shape
+``(batch, 2^n)`` and return a scalar or an array of length ``batch``.
+
+Basis states follow `qiskit`'s little-endian order: qubit ``k`` is bit ``k`` of
+the index, so the bitstring of an index (as written by `qiskit` and in the
+instance ``sat_assgn``) lists qubit ``n - 1`` first.
+
+Author: Vivek Katial
+"""
+
+import numpy as np
+
+
+def basis_index(assignment):
+    """Index of a basis state in the statevector
+
+    :param assignment: A bitstring in `qiskit` order (qubit ``n - 1`` first), or
+        a sequence of bits in qubit order (qubit 0 first)
+    :type assignment: str
+    :returns: The basis state index
+    :rtype: {int}
+    """
+    if isinstance(assignment, str):
+        return int(assignment, 2)
+    return sum(int(bit) << qubit for qubit, bit in enumerate(assignment))
+
+
+def basis_bitstring(index, n_qubits):
+    """Bitstring of a basis state in `qiskit` order (qubit ``n - 1`` first)
+
+    :param index: The basis state index
+    :type index: int
+    :param n_qubits: Number of qubits
+    :type n_qubits: int
+    :returns: The bitstring
+    :rtype: {str}
+    """
+    return format(int(index), "0%sb" % n_qubits)
+
+
+def probabilities(states):
+    """Measurement probabilities of one or more statevectors
+
+    :param states: A statevector, or a batch of statevectors (one per row)
+    :type states: numpy.ndarray
+    :returns: Real probabilities of the same shape (single precision for ``complex64`` states)
+    :rtype: {numpy.ndarray}
+    """
+    states = np.asarray(states)
+    return states.real ** 2 + states.imag ** 2
+
+
+def _success_indices(solutions):
+    """Basis state indices of one or more solutions"""
+    if isinstance(solutions, (str, int, np.integer)):
+        solutions = [solutions]
+    return np.array(
+        [s if isinstance(s, (int, np.integer)) else basis_index(s) for s in solutions],
+        dtype=np.int64,
+    )
+
+
+def p_success(states, solutions):
+    """Probability of measuring a satisfying assignment
+
+    :param states: A statevector, or a batch of statevectors (one per row)
+    :type states: numpy.ndarray
+    :param solutions: A satisfying assignment (bitstring or index), or a list of
+        them for instances with several solutions
+    :type solutions: object
+    :returns: The total probability of the solutions
+    :rtype: {float or numpy.ndarray}
+    """
+    states = np.asarray(states)
+    amplitudes = states[..., _success_indices(solutions)]
+    return probabilities(amplitudes).sum(axis=-1)
+
+
+def expected_energy(states, hamiltonian):
+    """Expectation ``<s|H|s>`` of a diagonal Hamiltonian
+
+    :param states: A statevector, or a batch of statevectors (one per row)
+    :type states: numpy.ndarray
+    :param hamiltonian: The diagonal of the problem Hamiltonian
+    :type hamiltonian: numpy.ndarray
+    :returns: The expected energy
+    :rtype: {float or numpy.ndarray}
+    """
+    return probabilities(states) @ np.asarray(hamiltonian)
+
+
+def approximation_ratio(states, hamiltonian):
+    """Approximation ratio ``(E_max - <H>) / (E_max - E_min)``
+
+    This is 1 when all probability is on the ground states and 0 when it is
+    all on the highest energy states.
+
+    :param states: A statevector, or a batch of statevectors (one per row)
+    :type states: numpy.ndarray
+    :param hamiltonian: The diagonal of the problem Hamiltonian
+    :type hamiltonian: numpy.ndarray
+    :returns: The approximation ratio
+    :rtype: {float or numpy.ndarray}
+    """
+    hamiltonian = np.asarray(hamiltonian)
+    e_min, e_max = hamiltonian.min(), hamiltonian.max()
+    if e_max == e_min:
+        return np.ones(np.shape(states)[:-1])[()]
+    return (e_max - expected_energy(states, hamiltonian)) / (e_max - e_min)
+
+
+def expected_violations(states, hamiltonian, offset=None):
+    """Expected number of violated clauses
+
+    Each clause contributes one to the Hamiltonian when it is violated, less the
+    constant term dropped when the Hamiltonian was expanded in Pauli terms. For
+    a satisfiable instance that constant is the ground energy, which is the
+    default offset.
+
+    :param states: A statevector, or a batch of statevectors (one per row)
+    :type states: numpy.ndarray
+    :param hamiltonian: The diagonal of the problem Hamiltonian
+    :type hamiltonian: numpy.ndarray
+    :param offset: Energy of an assignment violating no clause, defaults to the ground energy
+    :type offset: float, optional
+    :returns: The expected number of violated clauses
+    :rtype: {float or numpy.ndarray}
+    """
+    hamiltonian = np.asarray(hamiltonian)
+    if offset is None:
+        offset = hamiltonian.min()
+    return expected_energy(states, hamiltonian) - offset
+
+
+def top_k_states(states, k=10):
+    """The ``k`` most likely basis states, most likely first
+
+    Uses ``argpartition``, so only the ``k`` selected states are sorted.
+
+    :param states: A statevector, or a batch of statevectors (one per row)
+    :type states: numpy.ndarray
+    :param k: Number of states, defaults to 10
+    :type k: int, optional
+    :returns: The basis state indices and their probabilities, each of shape ``(..., k)``
+    :rtype: {numpy.ndarray, numpy.ndarray}
+    """
+    probs = probabilities(states)
+    k = min(k, probs.shape[-1])
+    top = np.argpartition(probs, -k, axis=-1)[..., -k:]
+    top_probs = np.take_along_axis(probs, top, axis=-1)
+    order = np.argsort(-top_probs, axis=-1, kind="stable")
+    return (
+        np.take_along_axis(top, order, axis=-1),
+        np.take_along_axis(top_probs, order, axis=-1),
+    )
+
+
+def energy_histogram(states, hamiltonian, decimals=9):
+    """Probability of measuring each distinct energy level
+
+    :param states: A statevector, or a batch of statevectors (one per row)
+    :type states: numpy.ndarray
+    :param hamiltonian: The diagonal of the problem Hamiltonian
+    :type hamiltonian: numpy.ndarray
+    :param decimals: Energies are rounded to this many decimals to form the levels, defaults to 9
+    :type decimals: int, optional
+    :returns: The sorted energy levels, and the probability of each (of shape ``(..., n_levels)``)
+    :rtype: {numpy.ndarray, numpy.ndarray}
+    """
+    levels, level_index = np.unique(
+        np.round(np.asarray(hamiltonian), decimals), return_inverse=True
+    )
+    probs = probabilities(states)
+    if probs.ndim == 1:
+        return levels, np.bincount(level_index, weights=probs, minlength=len(levels))
+
+    histogram = np.zeros((probs.shape[0], len(levels)))
+    for row, row_probs in enumerate(probs):
+        histogram[row] = np.bincount(
+            level_index, weights=row_probs, minlength=len(levels)
+        )
+    return levels, histogram
+
+
+def state_metrics(states, hamiltonian, solutions):
+    """All scalar metrics of one or more statevectors
+
+    :param states: A statevector, or a batch of statevectors (one per row)
+    :type states: numpy.ndarray
+    :param hamiltonian: The diagonal of the problem Hamiltonian
+    :type hamiltonian: numpy.ndarray
+    :param solutions: The satisfying assignment(s), as in ``p_success``
+    :type solutions: object
+    :returns: ``energy``, ``p_success``, ``approximation_ratio`` and ``expected_violations``
+    :rtype: {dict}
+    """
+    hamiltonian = np.asarray(hamiltonian)
+    probs = probabilities(states)
+    energy = probs @ hamiltonian
+    e_min, e_max = hamiltonian.min(), hamiltonian.max()
+    return {
+        "energy": energy,
+        "p_success": probs[..., _success_indices(solutions)].sum(axis=-1),
+        "approximation_ratio": (e_max - energy) / (e_max - e_min)
+        if e_max > e_min
+        else np.ones(np.shape(energy))[()],
+        "expected_violations": energy - e_min,
+    }
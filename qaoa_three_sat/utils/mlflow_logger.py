@@ -0,0 +1,386 @@
+"""Batched, asynchronous logging to an MLFlow tracking server
+
+Params and metrics are queued and sent from a worker thread in ``log_batch``
+calls, so the caller never waits on the tracking server. If the server fails
+or is too slow, the remaining batches are spooled to local JSON lines files
+that ``replay_spool`` can send later.
+
+Author: Vivek Katial
+"""
+
+import atexit
+import contextlib
+import glob
+import json
+import os
+import queue
+import signal
+import threading
+import time
+
+# Environment variable used to locate the spool if no directory is given
+SPOOL_DIR_ENV = "QAOA_MLFLOW_SPOOL_DIR"
+DEFAULT_SPOOL_DIR = os.path.join("data", "mlflow_spool")
+
+# Limits of a single MLFlow ``log_batch`` request, the entities are the
+# metrics, params and tags together
+MAX_BATCH_ENTITIES = 1000
+MAX_BATCH_METRICS = 1000
+MAX_BATCH_PARAMS = 100
+
+
+def _timestamp():
+    """The current time in milliseconds, as MLFlow expects"""
+    return int(time.time() * 1000)
+
+
+def _send_batch(client, run_id, metrics, params):
+    """Send a batch of ``(key, value, timestamp, step)`` metrics and ``(key, value)`` params"""
+    from mlflow.entities import Metric, Param
+
+    client.log_batch(
+        run_id,
+        metrics=[Metric(*metric) for metric in metrics],
+        params=[Param(key, str(value)) for key, value in params],
+    )
+
+
+class AsyncMlflowLogger:
+    """Log params and metrics to an MLFlow run from a background thread
+
+    Attributes
+    ----------
+        run_id : str
+            The run being logged to (defaults to the active run)
+        client : mlflow.tracking.MlflowClient
+            The client used to send batches
+        flush_interval : float
+            Longest time in seconds a logged value waits before it is sent
+        slow_threshold : float
+            A batch not sent within this many seconds is spooled, and so is everything after it
+        spool_dir : str
+            Directory of the spool files (defaults to ``$QAOA_MLFLOW_SPOOL_DIR`` or ``data/mlflow_spool``)
+        spooling : bool
+            Whether batches are being written to the spool instead of the server
+    """
+
+    def __init__(
+        self,
+        run_id=None,
+        client=None,
+        flush_interval=1.0,
+        slow_threshold=10.0,
+        spool_dir=None,
+    ):
+        if run_id is None or client is None:
+            import mlflow
+            from mlflow.tracking import MlflowClient
+
+            if run_id is None:
+                run_id = mlflow.active_run().info.run_id
+            if client is None:
+                client = MlflowClient()
+
+        self.run_id = run_id
+        self.client = client
+        self.flush_interval = flush_interval
+        self.slow_threshold = slow_threshold
+        self.spool_dir = spool_dir or os.environ.get(SPOOL_DIR_ENV, DEFAULT_SPOOL_DIR)
+        self.spooling = False
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def log_param(self, key, value):
+        """Queue a param"""
+        self._queue.put(("param", (key, value)))
+
+    def log_params(self, params):
+        """Queue a ``dict`` of params"""
+        for key, value in params.items():
+            self.log_param(key, value)
+
+    def log_metric(self, key, value, step=0, timestamp=None):
+        """Queue a metric
+
+        :param key: Name of the metric
+        :type key: str
+        :param value: Value of the metric
+        :type value: float
+        :param step: Step of the metric, defaults to 0
+        :type step: int, optional
+        :param timestamp: Time in milliseconds, defaults to now
+        :type timestamp: int, optional
+        """
+        if timestamp is None:
+            timestamp = _timestamp()
+        self._queue.put(("metric", (key, float(value), int(timestamp), int(step))))
+
+    def log_metrics(self, metrics, step=0):
+        """Queue a ``dict`` of metrics at one step"""
+        timestamp = _timestamp()
+        for key, value in metrics.items():
+            self.log_metric(key, value, step, timestamp)
+
+    def log_trace(self, trace, key="energy"):
+        """Queue every recorded energy of an optimisation trace as a step-wise metric
+
+        :param trace: The optimisation trace
+        :type trace: OptimisationTrace
+        :param key: Name of the metric, defaults to ``"energy"``
+        :type key: str, optional
+        """
+        timestamps = (trace.timestamps * 1000).astype(int)
+        for step, value, timestamp in zip(trace.iterations, trace.energies, timestamps):
+            self.log_metric(key, value, step, timestamp)
+
+    def _run(self):
+        """Worker thread, collect queued values into batches and send them"""
+        stop = False
+        while not stop:
+            metrics, params, n_items = [], [], 0
+            deadline = time.time() + self.flush_interval
+            while (
+                len(metrics) + len(params) < MAX_BATCH_ENTITIES
+                and len(metrics) < MAX_BATCH_METRICS
+                and len(params) < MAX_BATCH_PARAMS
+            ):
+                try:
+                    kind, item = self._queue.get(
+                        timeout=max(0.0, deadline - time.time())
+                    )
+                except queue.Empty:
+                    break
+                n_items += 1
+                if kind == "stop":
+                    stop = True
+                    break
+                if kind == "flush":
+                    break
+                (metrics if kind == "metric" else params).append(item)
+
+            if metrics or params:
+                self._dispatch(metrics, params)
+            for _ in range(n_items):
+                self._queue.task_done()
+
+    def _dispatch(self, metrics, params):
+        """Send a batch, or spool it if the server is failing or slow
+
+        The batch is sent from its own thread, so a server that hangs holds up
+        the worker (and ``flush`` or ``close``) for at most ``slow_threshold``
+        seconds. A batch that times out is spooled as well, and is sent twice if
+        the hung request completes after all.
+        """
+        if not self.spooling:
+            errors = []
+
+            def send():
+                try:
+                    _send_batch(self.client, self.run_id, metrics, params)
+                except Exception as error:
+                    errors.append(error)
+
+            sender = threading.Thread(target=send, daemon=True)
+            sender.start()
+            sender.join(self.slow_threshold)
+            if sender.is_alive():
+                print(
+                    "MLFlow logging took over %ss, spooling to %s"
+                    % (self.slow_threshold, self.spool_dir)
+                )
+            elif errors:
+                print(
+                    "MLFlow logging failed, spooling to %s: %s"
+                    % (self.spool_dir, errors[0])
+                )
+            else:
+                return
+            self.spooling = True
+        self._spool(metrics, params)
+
+    def _spool(self, metrics, params):
+        """Append a batch to this process's spool file"""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        path = os.path.join(
+            self.spool_dir, "spool-%s-%s.jsonl" % (self.run_id, os.getpid())
+        )
+        with open(path, "a") as spool_file:
+            record = {"run_id": self.run_id, "metrics": metrics, "params": params}
+            spool_file.write(json.dumps(record) + "\n")
+
+    def flush(self):
+        """Block until everything queued so far has been sent or spooled"""
+        if self._closed:
+            return
+        self._queue.put(("flush", None))
+        self._queue.join()
+
+    def close(self):
+        """Flush the queue and stop the worker thread"""
+        if self._closed:
+            return
+        self._queue.put(("stop", None))
+        self._queue.join()
+        self._worker.join()
+        self._closed = True
+        # Release the logger, and its client, in long lived processes
+        atexit.unregister(self.close)
+
+    def install_signal_handlers(self, signals=(signal.SIGTERM, signal.SIGINT)):
+        """Flush the queue before the process is stopped by a signal
+
+        Must be called from the main thread. The previous handler is called
+        once the queue has been flushed.
+
+        :param signals: The signals to handle, defaults to SIGTERM and SIGINT
+        :type signals: tuple, optional
+        """
+        for signum in signals:
+            previous = signal.getsignal(signum)
+
+            def handler(signum, frame, previous=previous):
+                self.close()
+                if callable(previous):
+                    previous(signum, frame)
+                else:
+                    signal.signal(signum, signal.SIG_DFL)
+                    os.kill(os.getpid(), signum)
+
+            signal.signal(signum, handler)
+
+
+@contextlib.contextmanager
+def mlflow_run(experiment):
+    """An MLFlow run and its logger, always closed and ended, as FAILED if the block raises
+
+    :param experiment: The ``experiment`` section of a parameter file
+    :type experiment: dict
+    :returns: The logger of the run
+    :rtype: {AsyncMlflowLogger}
+    """
+    import mlflow
+
+    mlflow.set_tracking_uri(experiment["tracking-uri"])
+    mlflow.set_experiment(experiment["name"])
+    mlflow.start_run()
+    status, logger = "FINISHED", None
+    try:
+        logger = AsyncMlflowLogger()
+        yield logger
+    except BaseException:
+        status = "FAILED"
+        raise
+    finally:
+        if logger is not None:
+            logger.close()
+        mlflow.end_run(status=status)
+
+
+def log_qaoa_run(logger, instance, params, run_path=None):
+    """Log a finished QAOA run, as ``run/main_qaoa.py`` and the scheduler do
+
+    Besides ``params`` this logs the instance size and final angles, the
+    energy and quality metrics at the optimum, the energy trace, and as
+    artifacts the parameter file and, on a qiskit backend, the circuit drawn
+    at the optimum.
+
+    :param logger: Logger of the run
+    :type logger: AsyncMlflowLogger
+    :param instance: The optimised instance
+    :type instance: QAOAInstance3SAT
+    :param params: Params of the run, e.g. ``instance``, ``params_file`` and ``budget``
+    :type params: dict
+    :param run_path: Parameter file to log as an artifact, defaults to None
+    :type run_path: str, optional
+    """
+    from qaoa_three_sat.utils.exp_utils import make_temp_directory
+
+    logger.log_params(
+        dict(
+            params,
+            n_qubits=instance.n_qubits,
+            alpha_final=instance.alpha,
+            beta_final=instance.beta,
+        )
+    )
+    metrics = instance.calculate_metrics()
+    logger.log_metrics(
+        {
+            "energy": instance.energy,
+            "classical_iter": instance.classical_iter,
+            "p_success": metrics["p_success"],
+            "approximation_ratio": metrics["approximation_ratio"],
+            "expected_violations": metrics["expected_violations"],
+        }
+    )
+    # Energy at every iteration of the classical optimiser
+    logger.log_trace(instance.trace, key="trace_energy")
+
+    # The native engines never need qiskit or matplotlib, so the circuit is
+    # only drawn for runs on a qiskit backend
+    if not (instance.native_backend or instance.large_backend):
+        # Build artifacts in a tmp directory
+        with make_temp_directory() as temp_dir:
+            circuit_path = os.path.join(temp_dir, "qc.png")
+            # Draw the circuit at the optimised angles
+            instance.build_circuit()
+            instance.quantum_circuit.draw("mpl", filename=circuit_path)
+            logger.client.log_artifact(logger.run_id, circuit_path)
+    if run_path is not None:
+        logger.client.log_artifact(logger.run_id, run_path)
+
+
+def replay_spool(spool_dir=None, client=None):
+    """Send spooled batches to the tracking server, removing each file once sent
+
+    :param spool_dir: Directory of the spool files, defaults to ``$QAOA_MLFLOW_SPOOL_DIR`` or ``data/mlflow_spool``
+    :type spool_dir: str, optional
+    :param client: The client used to send batches, defaults to a new ``MlflowClient``
+    :type client: mlflow.tracking.MlflowClient, optional
+    :returns: Number of batches sent
+    :rtype: {int}
+    """
+    if client is None:
+        from mlflow.tracking import MlflowClient
+
+        client = MlflowClient()
+    spool_dir = spool_dir or os.environ.get(SPOOL_DIR_ENV, DEFAULT_SPOOL_DIR)
+
+    n_batches = 0
+    for path in sorted(glob.glob(os.path.join(spool_dir, "spool-*.jsonl"))):
+        with open(path) as spool_file:
+            records = [json.loads(line) for line in spool_file if line.strip()]
+        for i, record in enumerate(records):
+            try:
+                _send_batch(
+                    client, record["run_id"], record["metrics"], record["params"]
+                )
+            except Exception:
+                # Keep only what has not been sent yet
+                with open(path, "w") as spool_file:
+                    for unsent in records[i:]:
+                        spool_file.write(json.dumps(unsent) + "\n")
+                raise
+            n_batches += 1
+        os.remove(path)
+    return n_batches
+
+
+if __name__ == "__main__":
+    """ Replay spooled batches once the tracking server is reachable """
+
+    import argparse
+    import mlflow
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", "--spool_dir", type=str, help="Spool directory")
+    parser.add_argument("-u", "--tracking_uri", type=str, help="MLFlow tracking URI")
+    args = parser.parse_args()
+
+    if args.tracking_uri:
+        mlflow.set_tracking_uri(args.tracking_uri)
+    print("Replayed %s batches" % replay_spool(args.spool_dir))
@@ -161,8 +161,7 @@ def calculate_p_success(pdf, n_qubits, sat_assgn):
     :param sat_assgn: Satisfying assignment
     :type sat_assgn: str
     """
-
-    # Create variable formating for binary string
-    format_str = "{0:0%sb}" % (n_qubits)
-    instance_space = [format_str.format(i) for i in range(2 ** n_qubits)]
-    return pdf[instance_space.index(sat_assgn)]
+    # The bitstring of basis state i is i in binary (see ``metrics.basis_index``)
+    if len(sat_assgn) != n_qubits:
+        raise ValueError("sat_assgn must have n_qubits bits")
+    return pdf[int(sat_assgn, 2)]
@@ -0,0 +1,267 @@
+"""Append-only columnar store for experiment results
+
+Every write creates a new uniquely named ``.npz`` shard inside
+``<root>/<table>/<partition>/``. Shards are written to a hidden temporary file
+and renamed into place, so many processes can append to the same partition
+at once without locks and readers never see a partial shard. ``compact``
+merges the shards of each partition into one.
+
+Author: Vivek Katial
+"""
+
+import os
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+# Environment variable used to locate the store if no root is given
+RESULTS_DIR_ENV = "QAOA_RESULTS_DIR"
+DEFAULT_RESULTS_DIR = os.path.join("data", "results")
+
+SUMMARY_TABLE = "summary"
+TRACE_TABLE = "trace"
+
+# Key of a compacted shard listing the shards it replaces
+SOURCES_KEY = "_sources"
+COMPACTED_PREFIX = "compacted-"
+
+
+def _column_arrays(columns):
+    """Turn scalars and sequences into equal length one-dimensional arrays"""
+    arrays = {name: np.atleast_1d(np.asarray(value)) for name, value in columns.items()}
+    n_rows = max(len(array) for array in arrays.values())
+    for name, array in arrays.items():
+        if len(array) != n_rows:
+            if len(array) != 1:
+                raise ValueError(
+                    "Column %s has %s rows, expected %s" % (name, len(array), n_rows)
+                )
+            arrays[name] = np.repeat(array, n_rows)
+    return arrays
+
+
+class ResultsStore:
+    """A partitioned, append-only store of ``.npz`` shards
+
+    Attributes
+    ----------
+        root : str
+            Directory of the store (defaults to ``$QAOA_RESULTS_DIR`` or ``data/results``)
+    """
+
+    def __init__(self, root=None):
+        if root is None:
+            root = os.environ.get(RESULTS_DIR_ENV, DEFAULT_RESULTS_DIR)
+        self.root = root
+
+    def partition_dir(self, table, partition):
+        """Directory holding the shards of a partition of a table"""
+        partition = str(partition).replace(os.sep, "_")
+        return os.path.join(self.root, table, "partition=%s" % partition)
+
+    def write(self, table, columns, partition="default"):
+        """Atomically append rows to a table as a new shard
+
+        :param table: Name of the table
+        :type table: str
+        :param columns: Column name to a sequence of values, or a scalar repeated on every row
+        :type columns: dict
+        :param partition: Partition to append to, defaults to ``"default"``
+        :type partition: str, optional
+        :returns: Path of the new shard
+        :rtype: {str}
+        """
+        arrays = _column_arrays(columns)
+        directory = self.partition_dir(table, partition)
+        os.makedirs(directory, exist_ok=True)
+
+        name = "part-%s-%s.npz" % (time.strftime("%Y%m%dT%H%M%S"), uuid.uuid4().hex)
+        return self._write_shard(directory, name, arrays)
+
+    def _write_shard(self, directory, name, arrays):
+        """Write a shard to a hidden file and rename it into place"""
+        handle, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".npz")
+        try:
+            with os.fdopen(handle, "wb") as tmp_file:
+                np.savez(tmp_file, **arrays)
+            path = os.path.join(directory, name)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return path
+
+    def partitions(self, table):
+        """The partitions of a table
+
+        :param table: Name of the table
+        :type table: str
+        :returns: Partition names
+        :rtype: {list}
+        """
+        table_dir = os.path.join(self.root, table)
+        if not os.path.isdir(table_dir):
+            return []
+        return sorted(
+            entry.split("=", 1)[1]
+            for entry in os.listdir(table_dir)
+            if entry.startswith("partition=")
+        )
+
+    def _load_partition(self, directory):
+        """Load the live shards of a partition
+
+        Shards that have been merged into a compacted shard are skipped, even if
+        they have not been deleted yet. If a shard is deleted by a compaction
+        while it is being read, the partition is listed again.
+
+        :returns: Shard names and their columns
+        :rtype: {list}
+        """
+        while True:
+            names = sorted(
+                name
+                for name in os.listdir(directory)
+                if name.endswith(".npz") and not name.startswith(".")
+            )
+            try:
+                shards = []
+                for name in names:
+                    with np.load(os.path.join(directory, name)) as shard:
+                        shards.append((name, {key: shard[key] for key in shard.files}))
+                break
+            except FileNotFoundError:
+                continue
+
+        replaced = set()
+        for name, columns in shards:
+            replaced.update(columns.pop(SOURCES_KEY, []))
+        return [(name, columns) for name, columns in shards if name not in replaced]
+
+    def read(self, table, partition=None):
+        """Read a table (or one partition of it) into a ``pandas.DataFrame``
+
+        :param table: Name of the table
+        :type table: str
+        :param partition: Only read this partition, defaults to all partitions
+        :type partition: str, optional
+        :returns: All rows, with a ``partition`` column
+        :rtype: {pandas.DataFrame}
+        """
+        import pandas as pd
+
+        partitions = self.partitions(table) if partition is None else [partition]
+        frames = []
+        for name in partitions:
+            directory = self.partition_dir(table, name)
+            if not os.path.isdir(directory):
+                continue
+            for _, columns in self._load_partition(directory):
+                frame = pd.DataFrame(columns)
+                frame["partition"] = name
+                frames.append(frame)
+
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True, sort=False)
+
+    def compact(self, table):
+        """Merge the shards of every partition of a table into a single shard
+
+        Writers may keep appending while a table is compacted, but only one
+        process should compact a table at a time.
+
+        :param table: Name of the table
+        :type table: str
+        :returns: Number of shards removed
+        :rtype: {int}
+        """
+        import pandas as pd
+
+        removed = 0
+        for partition in self.partitions(table):
+            directory = self.partition_dir(table, partition)
+            shards = self._load_partition(directory)
+            if len(shards) < 2:
+                continue
+
+            merged = pd.concat(
+                [pd.DataFrame(columns) for _, columns in shards],
+                ignore_index=True,
+                sort=False,
+            )
+            arrays = {}
+            for column in merged.columns:
+                values = merged[column].to_numpy()
+                if values.dtype == object:
+                    values = values.astype(str)
+                arrays[column] = values
+            sources = [name for name, _ in shards]
+            arrays[SOURCES_KEY] = np.array(sources)
+
+            # The merged shard replaces its sources before they are deleted
+            name = "%s%s.npz" % (COMPACTED_PREFIX, uuid.uuid4().hex)
+            self._write_shard(directory, name, arrays)
+            for source in sources:
+                os.remove(os.path.join(directory, source))
+            removed += len(sources)
+        return removed
+
+
+def write_run(store, instance, instance_name, include_trace=False):
+    """Append the summary of an optimised instance (and optionally its trace)
+
+    The summary row holds the instance's angles (in canonical form), with the
+    energy and success probability of its statevector, so all three describe
+    the same point. An optimised instance is left at its optimum, which can
+    differ from the best point of the trace (BFGS and CMA-ES may end away from
+    it). Both are partitioned by instance name.
+
+    :param store: The results store
+    :type store: ResultsStore
+    :param instance: An optimised instance
+    :type instance: QAOAInstance3SAT
+    :param instance_name: Instance filename, used as the partition
+    :type instance_name: str
+    :param include_trace: Set True, to also store every evaluation, defaults to False
+    :type include_trace: bool, optional
+    :returns: The id of the run, shared by its summary and trace rows
+    :rtype: {str}
+    """
+    run_id = uuid.uuid4().hex
+    trace = instance.trace
+    # Streaming metrics of the current statevector, without simulating again
+    metrics = instance.calculate_metrics()
+    n_rounds = instance.n_rounds
+    # In canonical angles, which have the same energy, so runs compare
+    angles = instance.symmetry.canonical_angles(
+        np.concatenate((instance.alpha, instance.beta)), n_rounds
+    )
+
+    summary = {
+        "run_id": run_id,
+        "instance": instance_name,
+        "n_qubits": instance.n_qubits,
+        "n_rounds": n_rounds,
+        "algorithm": instance.classical_opt_alg,
+        "optimiser_opts": str(instance.optimiser_opts),
+        "backend": "numpy" if instance.native_backend else str(instance.backend),
+        "energy": metrics["energy"],
+        "p_success": metrics["p_success"],
+        "classical_iter": instance.classical_iter,
+        "timestamp": time.time(),
+    }
+    for i in range(n_rounds):
+        summary["alpha_%s" % i] = angles[i]
+    for i in range(n_rounds):
+        summary["beta_%s" % i] = angles[n_rounds + i]
+    store.write(SUMMARY_TABLE, summary, partition=instance_name)
+
+    if include_trace and len(trace):
+        columns = trace.columns()
+        columns["run_id"] = run_id
+        store.write(TRACE_TABLE, columns, partition=instance_name)
+
+    return run_id
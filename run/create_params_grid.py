@@ -3,12 +3,23 @@
 Author: Vivek Katial
 """
 
+import argparse
 from os import path
 from itertools import product
 import yaml
 import json
 import logging
 
+from qaoa_three_sat.utils.job_manifest import (
+    DEFAULT_BACKEND,
+    PACK_WALLTIME,
+    ResourceModel,
+    build_manifest,
+    format_walltime,
+    instance_sizes,
+    write_manifest,
+)
+
 
 def load_yaml_file(filename):
     """Load parameter YAML file
@@ -75,7 +86,49 @@ def create_optimisation_dict(classical_opt_alg, budget):
     return optimisation_opts
 
 
-def main():
+def create_manifest(params_files, args):
+    """Predict the resources of every (instance, params file) task and pack them into jobs
+
+    :param params_files: Params file name to its ``n_rounds`` and ``budget``
+    :type params_files: dict
+    :param args: Command line arguments
+    :type args: argparse.Namespace
+    :returns: The job manifest
+    :rtype: {dict}
+    """
+    if path.isfile(args.calibration):
+        logging.info("Calibrating resource model from \t" + args.calibration)
+        model = ResourceModel.load(args.calibration)
+    else:
+        logging.info(
+            "No benchmarks at %s, using default resource model" % args.calibration
+        )
+        model = ResourceModel()
+
+    sizes = instance_sizes(args.instance_dir) if path.isdir(args.instance_dir) else {}
+    if not sizes:
+        logging.warning("No instances found in " + args.instance_dir)
+
+    manifest = build_manifest(
+        sizes,
+        params_files,
+        backend=args.backend,
+        model=model,
+        pack_walltime=args.pack_walltime * 60 * 60,
+    )
+    n_tasks = sum(len(job["tasks"]) for job in manifest["jobs"])
+    logging.info(
+        "Packed %s tasks into %s jobs, %s predicted"
+        % (
+            n_tasks,
+            len(manifest["jobs"]),
+            format_walltime(sum(job["predicted_seconds"] for job in manifest["jobs"])),
+        )
+    )
+    return manifest
+
+
+def main(args):
 
     params_grid = load_yaml_file("params_grid.yml")
     params_template = load_yaml_file("params_template.yml")
@@ -85,10 +138,11 @@ def main():
     l_classical_opt_alg = params_grid["classical_opt_alg"]
     l_budget = params_grid["budget"]
     l_n_rounds = params_grid["n_rounds"]
+    params_files = {}
 
     for inst in product(l_classical_opt_alg, l_budget, l_n_rounds):
 
-        if int(inst[1]) >= 2000*int(inst[2]):
+        if int(inst[1]) >= 2000 * int(inst[2]):
 
             instance = params_template
             instance["classical_optimisation"]["classical_opt_alg"] = inst[0]
@@ -105,7 +159,47 @@ def main():
 
             with open(outpath, "w") as outfile:
                 json.dump(instance, outfile, indent=4)
+            params_files[classical_instance_file] = {
+                "n_rounds": inst[2],
+                "budget": inst[1],
+            }
+
+    manifest = create_manifest(params_files, args)
+    logging.info("Writing \t" + args.manifest)
+    write_manifest(manifest, args.manifest)
 
 
 if __name__ == "__main__":
-    main()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-i", "--instance_dir", type=str, default="data/raw", help="Raw instances"
+    )
+    parser.add_argument(
+        "-b",
+        "--backend",
+        type=str,
+        default=DEFAULT_BACKEND,
+        help="Simulation backend the experiments run on, passed to their tasks in the job manifest",
+    )
+    parser.add_argument(
+        "-c",
+        "--calibration",
+        type=str,
+        default=path.join("reports", "benchmarks.json"),
+        help="Results of qaoa_three_sat.simulation.benchmark to calibrate the resource predictions, if the file exists",
+    )
+    parser.add_argument(
+        "-m",
+        "--manifest",
+        type=str,
+        default=path.join("params", "manifest.json"),
+        help="Job manifest to write",
+    )
+    parser.add_argument(
+        "--pack_walltime",
+        type=float,
+        default=PACK_WALLTIME / 60 / 60,
+        help="Hours of small tasks packed into a shared job",
+    )
+    main(parser.parse_args())
@@ -5,16 +5,15 @@ This script is a default run script for running an experiment of QAOA
 Author: Vivek Katial
 """
 
-from math import pi
 from os import path
 import argparse
-import yaml
+import contextlib
 import json
-import mlflow
 
 from qaoa_three_sat.simulation.simulate import simulate_circuit
-from qaoa_three_sat.utils.exp_utils import str2bool, make_temp_directory
-from qaoa_three_sat.utils.qc_helpers import *
+from qaoa_three_sat.utils.exp_utils import str2bool
+from qaoa_three_sat.utils.mlflow_logger import log_qaoa_run, mlflow_run
+from qaoa_three_sat.utils.results_store import ResultsStore
 
 
 if __name__ == "__main__":
@@ -37,6 +36,35 @@ if __name__ == "__main__":
         default=False,
         help="Activate MlFlow Tracking.",
     )
+    parser.add_argument(
+        "-b",
+        "--backend",
+        type=str,
+        default=None,
+        help="Simulation backend, set to 'numpy' for the native statevector engine or 'numpy-large[:complex128]' for the memory-lean engine",
+    )
+    parser.add_argument(
+        "-w",
+        "--warm_start",
+        type=str,
+        default=None,
+        help="Optimise for 1, ..., n_rounds rounds in turn, warm starting each from the last ('interp' or 'fourier')",
+    )
+    parser.add_argument(
+        "-R",
+        "--results_dir",
+        type=str,
+        default=None,
+        help="Directory of the results store, defaults to $QAOA_RESULTS_DIR or data/results",
+    )
+    parser.add_argument(
+        "--store_trace",
+        type=str2bool,
+        nargs="?",
+        const=True,
+        default=False,
+        help="Also store the full optimisation trace in the results store.",
+    )
     # Parse your arguments
     args = parser.parse_args()
     run_path = path.join("params", "ready", args.params_file)
@@ -47,11 +75,6 @@ if __name__ == "__main__":
     with open(run_path) as file:
         params = json.load(file)
 
-    # MlFlow Configuration
-    if mlflow_tracking:
-        mlflow.set_tracking_uri(params["experiment"]["tracking-uri"])
-        mlflow.set_experiment(params["experiment"]["name"])
-
     # Optimisation parameters
     opt_params = params["classical_optimisation"]
 
@@ -63,45 +86,44 @@ if __name__ == "__main__":
     n_rounds = int(opt_params["n_rounds"])
     track_optimiser = True
 
+    # MlFlow Configuration, the run is ended as FAILED if the simulation raises
     if mlflow_tracking:
-        # Log initial angle
-        mlflow.log_param("alpha_init", alpha_trial)
-        mlflow.log_param("beta_init", beta_trial)
+        tracking = mlflow_run(params["experiment"])
+    else:
+        tracking = contextlib.nullcontext()
 
-    instance = simulate_circuit(
-        instance_filename=instance_filename,
-        classical_opt_alg=classical_opt_alg,
-        optimisation_opts=optimisation_opts,
-        alpha_trial=alpha_trial,
-        beta_trial=beta_trial,
-        n_rounds=n_rounds,
-        track_optimiser=track_optimiser,
-        mlflow=mlflow_tracking,
-        disp=True,
-    )
-
-    instance.calculate_pdf()
-
-    # Log parameters and metrics
-    if mlflow_tracking:
-        mlflow.log_param("instance", args.instance)
-        mlflow.log_param("params_file", args.params_file)
-        mlflow.log_param("n_qubits", instance.n_qubits)
-        mlflow.log_param("budget", optimisation_opts["budget"])
-        mlflow.log_param("alpha_final", instance.alpha)
-        mlflow.log_param("beta_final", instance.beta)
-        mlflow.log_metric("energy", instance.energy)
-        mlflow.log_metric("classical_iter", instance.classical_iter)
-        mlflow.log_metric(
-            "p_success",
-            calculate_p_success(instance.pdf, instance.n_qubits, instance.sat_assgn),
+    with tracking as logger:
+        if mlflow_tracking:
+            # Log in batches from a background thread, flushing if the job is killed
+            logger.install_signal_handlers()
+            # Log initial angle
+            logger.log_params({"alpha_init": alpha_trial, "beta_init": beta_trial})
+
+        instance = simulate_circuit(
+            instance_filename=instance_filename,
+            classical_opt_alg=classical_opt_alg,
+            optimisation_opts=optimisation_opts,
+            alpha_trial=alpha_trial,
+            beta_trial=beta_trial,
+            n_rounds=n_rounds,
+            track_optimiser=track_optimiser,
+            mlflow=mlflow_tracking,
+            disp=True,
+            backend=args.backend,
+            warm_start=args.warm_start,
+            results_store=ResultsStore(args.results_dir),
+            store_trace=args.store_trace,
         )
 
-    # Build artifacts in a tmp directory
-    with make_temp_directory() as temp_dir:
-        # Write circuit to file and save
-        circuit_path = path.join(temp_dir, "qc.png")
-        instance.quantum_circuit.draw("mpl", filename=circuit_path)
+        # Log parameters, metrics and artifacts
         if mlflow_tracking:
-            mlflow.log_artifact(circuit_path)
-            mlflow.log_artifact(run_path)
+            log_qaoa_run(
+                logger,
+                instance,
+                {
+                    "instance": args.instance,
+                    "params_file": args.params_file,
+                    "budget": optimisation_opts["budget"],
+                },
+                run_path=run_path,
+            )
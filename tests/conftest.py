@@ -0,0 +1,71 @@
+"""Shared fixtures: small Exact Cover 3 instances from the seeded generator"""
+
+import pytest
+
+from qaoa_three_sat.instance.binary import BinaryInstance
+from qaoa_three_sat.instance.compiled import compile_instance
+from qaoa_three_sat.instance.generator import generate_instances
+from qaoa_three_sat.instance.three_sat import QAOAInstance3SAT
+
+
+@pytest.fixture(scope="session")
+def raw_instance():
+    """Raw instance of ``n_qubits`` qubits, the same on every run"""
+    cache = {}
+
+    def make(n_qubits, seed=0):
+        if (n_qubits, seed) not in cache:
+            cache[n_qubits, seed] = generate_instances(
+                n_qubits, 1, seed=seed, n_workers=1
+            )[0]
+        return cache[n_qubits, seed]
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def hamiltonian(raw_instance):
+    """Diagonal Hamiltonian of the raw instance of ``n_qubits`` qubits"""
+
+    def make(n_qubits):
+        rotations = BinaryInstance.from_raw(raw_instance(n_qubits)).rotations()
+        return compile_instance(*rotations[:4]).hamiltonian
+
+    return make
+
+
+@pytest.fixture
+def make_instance(raw_instance, tmp_path):
+    """Build a ``QAOAInstance3SAT`` of a generated instance"""
+
+    def make(
+        n_qubits,
+        n_rounds=1,
+        backend="numpy",
+        classical_opt_alg="nelder-mead",
+        optimiser_opts=None,
+        alpha=None,
+        beta=None,
+    ):
+        raw = raw_instance(n_qubits)
+        n_qubits, single, double, triple, sat_assgn = BinaryInstance.from_raw(
+            raw
+        ).rotations()
+        opts = {"classical_opt_alg": classical_opt_alg}
+        opts.update(optimiser_opts or {})
+        return QAOAInstance3SAT(
+            n_qubits=n_qubits,
+            n_rounds=n_rounds,
+            single_rotations=single,
+            double_rotations=double,
+            triple_rotations=triple,
+            alpha=[0.1] * n_rounds if alpha is None else alpha,
+            beta=[0.2] * n_rounds if beta is None else beta,
+            classical_opt_alg=classical_opt_alg,
+            optimiser_opts=opts,
+            sat_assgn=sat_assgn,
+            backend=backend,
+            cache_dir=str(tmp_path),
+        )
+
+    return make
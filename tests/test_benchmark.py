@@ -0,0 +1,50 @@
+"""Smoke test of the benchmark suite and its regression check
+
+Runs the smallest cases once, so it checks the records rather than the timings.
+"""
+
+import copy
+
+from qaoa_three_sat.simulation.benchmark import compare_results, run_benchmarks
+from qaoa_three_sat.utils.job_manifest import ResourceModel
+
+RECORD_KEYS = [
+    "benchmark",
+    "backend",
+    "n_qubits",
+    "n_rounds",
+    "evaluations",
+    "seconds_per_evaluation",
+    "evaluations_per_second",
+    "peak_memory",
+]
+
+
+def test_benchmarks_and_regressions():
+    results = run_benchmarks(
+        benchmarks=["build_hamiltonian", "cost_function", "nelder-mead"],
+        backends=["numpy", "numpy-large"],
+        n_qubits=[6, 8],
+        n_rounds=[1],
+        min_time=0,
+        budget=5,
+        quiet=True,
+    )
+    # One Hamiltonian build per size, the others per backend and size
+    assert len(results["results"]) == 2 + 2 * 2 * 2
+    for record in results["results"]:
+        assert all(key in record for key in RECORD_KEYS)
+        assert record["evaluations"] > 0
+        assert record["peak_memory"] > 0
+
+    assert compare_results(results, results) == []
+    slower = copy.deepcopy(results)
+    slower["results"][1]["seconds_per_evaluation"] *= 2
+    regressions = compare_results(results, slower)
+    assert len(regressions) == 1
+    assert regressions[0]["metric"] == "seconds_per_evaluation"
+
+    model = ResourceModel.from_benchmarks(
+        [r for r in results["results"] if r["benchmark"] == "cost_function"]
+    )
+    assert model.seconds_per_evaluation(8, 1, "numpy") > 0
@@ -0,0 +1,52 @@
+"""JSON, binary and archived instances load back the same"""
+
+import numpy as np
+
+from qaoa_three_sat.instance.binary import (
+    InstanceArchive,
+    convert_instance,
+    list_instances,
+    load_instance,
+)
+from qaoa_three_sat.instance.generator import write_raw_instance
+
+
+def _arrays(loaded):
+    n_qubits, single, double, triple, sat_assgn = loaded
+    rotations = [rotation.to_arrays() for rotation in [single, double, triple]]
+    return n_qubits, sat_assgn, rotations
+
+
+def _assert_same(loaded, expected):
+    n_qubits, sat_assgn, rotations = _arrays(loaded)
+    expected_n_qubits, expected_sat_assgn, expected_rotations = _arrays(expected)
+    assert (n_qubits, sat_assgn) == (expected_n_qubits, expected_sat_assgn)
+    for (qubits, coefficients), (expected_qubits, expected_coefficients) in zip(
+        rotations, expected_rotations
+    ):
+        np.testing.assert_array_equal(qubits, expected_qubits)
+        np.testing.assert_array_equal(coefficients, expected_coefficients)
+
+
+def test_binary_and_archive_round_trip(raw_instance, tmp_path):
+    json_dir, binary_dir = tmp_path / "json", tmp_path / "binary"
+    json_dir.mkdir()
+    binary_dir.mkdir()
+    names = ["inst_a", "inst_b", "inst_c"]
+    for name, n_qubits in zip(names, [6, 7, 8]):
+        write_raw_instance(raw_instance(n_qubits), str(json_dir / (name + ".json")))
+        convert_instance(
+            str(json_dir / (name + ".json")), str(binary_dir / (name + ".npz"))
+        )
+
+    archive_dir = str(tmp_path / "archive")
+    archive = InstanceArchive.from_directory(str(json_dir), archive_dir)
+    assert len(archive) == 3 and "inst_b" in archive
+    assert list_instances(archive_dir) == list_instances(str(json_dir)) == names
+    assert list_instances(str(binary_dir)) == names
+
+    for name in names:
+        expected = load_instance(str(json_dir), name)
+        _assert_same(load_instance(str(binary_dir), name), expected)
+        _assert_same(load_instance(archive_dir, name), expected)
+        _assert_same(archive[names.index(name)].rotations(), expected)
@@ -0,0 +1,110 @@
+"""The memory-lean engine agrees with the native engine and stays within its own
+peak memory estimate"""
+
+import contextlib
+import io
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from qaoa_three_sat.instance import compiled, symmetry
+from qaoa_three_sat.instance.generator import write_raw_instance
+from qaoa_three_sat.simulation.chunked import ChunkedStatevector
+from qaoa_three_sat.simulation.simulate import simulate_circuit
+from qaoa_three_sat.simulation.statevector import energy_and_gradient, simulate_qaoa
+from qaoa_three_sat.utils.metrics import probabilities
+from qaoa_three_sat.utils.results_store import ResultsStore
+
+ALPHA = [0.4, -1.1]
+BETA = [0.7, 0.3]
+
+
+@pytest.mark.parametrize(
+    "precision, tolerance", [("complex128", 1e-12), ("complex64", 1e-5)]
+)
+def test_chunked_engine_matches_native(hamiltonian, precision, tolerance):
+    hamiltonian = hamiltonian(8)
+    # Chunks smaller than the state, so every mixer qubit spans several chunks
+    backend = ChunkedStatevector(precision=precision, chunk_size=2 ** 5)
+    expected = simulate_qaoa(ALPHA, BETA, hamiltonian, 8)
+
+    state = backend.simulate(ALPHA, BETA, hamiltonian, 8)
+    assert state.dtype == np.dtype(precision)
+    np.testing.assert_allclose(state, expected, atol=tolerance)
+    assert backend.expectation(state, hamiltonian) == pytest.approx(
+        float(probabilities(expected) @ hamiltonian), abs=10 * tolerance
+    )
+
+    _, gradient = backend.energy_and_gradient(ALPHA, BETA, hamiltonian, 8)
+    _, expected_gradient = energy_and_gradient(ALPHA, BETA, hamiltonian, 8)
+    np.testing.assert_allclose(gradient, expected_gradient, atol=100 * tolerance)
+
+
+def test_gradient_adds_one_statevector(make_instance):
+    backend = ChunkedStatevector(chunk_size=2 ** 8)
+    instance = make_instance(14, n_rounds=2, backend=backend, classical_opt_alg="bfgs")
+    angles = np.array([0.3, 0.5, 0.2, 0.4])
+    instance.cost_function(angles)
+    state_bytes = instance.statevector.nbytes
+
+    tracemalloc.start()
+    try:
+        gradient = instance.gradient(angles)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    estimate = instance.memory_estimate()
+    assert estimate["gradient"] == state_bytes
+    # Only the adjoint is allocated next to the instance statevector
+    assert peak < state_bytes + estimate["temporaries"] + 2 ** 16
+    _, expected = backend.energy_and_gradient(
+        angles[:2], angles[2:], instance.hamiltonian, instance.n_qubits
+    )
+    np.testing.assert_allclose(gradient, expected)
+    # The statevector overwritten by the gradient is simulated again
+    assert instance.calculate_metrics()["energy"] == pytest.approx(instance.energy)
+
+
+def test_run_stays_within_memory_estimate(raw_instance, tmp_path, monkeypatch):
+    import pandas  # noqa: F401, imported by the run, not part of its peak
+
+    # Small chunks, so the state-sized arrays dominate the peak
+    monkeypatch.setattr(compiled, "BUILD_CHUNK_SIZE", 2 ** 12)
+    monkeypatch.setattr(symmetry, "CHUNK_SIZE", 2 ** 12)
+    monkeypatch.delenv(compiled.CACHE_DIR_ENV, raising=False)
+    monkeypatch.setattr(compiled, "_MEMORY_CACHE", compiled.OrderedDict())
+    n_qubits = 18
+    write_raw_instance(raw_instance(n_qubits), str(tmp_path / "inst.json"))
+    backend = ChunkedStatevector(chunk_size=2 ** 12)
+
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            instance = simulate_circuit(
+                instance_filename="inst",
+                classical_opt_alg="nelder-mead",
+                optimisation_opts={
+                    "classical_opt_alg": "nelder-mead",
+                    "xtol": 0.001,
+                    "disp": False,
+                    "adaptive": True,
+                    "budget": 10,
+                },
+                alpha_trial=[0.1, 0.2],
+                beta_trial=[0.3, 0.4],
+                n_rounds=2,
+                track_optimiser=True,
+                backend=backend,
+                warm_start="interp",
+                results_store=ResultsStore(str(tmp_path / "results")),
+                instance_dir=str(tmp_path),
+            )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    estimate = instance.memory_estimate()
+    # Allow for the optimiser, trace and imports, far less than a statevector
+    assert peak < estimate["total"] + 2 ** 19
@@ -0,0 +1,73 @@
+"""Instances are compiled once and then found in the in-process or on-disk cache,
+which stays within its memory bound"""
+
+import numpy as np
+import pytest
+
+from qaoa_three_sat.instance import compiled
+from qaoa_three_sat.instance.binary import BinaryInstance
+
+
+def _compile(raw_instance, n_qubits):
+    rotations = BinaryInstance.from_raw(raw_instance(n_qubits)).rotations()
+    return compiled.compile_instance(*rotations[:4])
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Count the instances compiled from scratch, with an empty memory cache"""
+    monkeypatch.delenv(compiled.CACHE_DIR_ENV, raising=False)
+    monkeypatch.setattr(compiled, "_MEMORY_CACHE", compiled.OrderedDict())
+    built = []
+    build = compiled._build_compiled
+
+    def counted(key, *args):
+        built.append(key)
+        return build(key, *args)
+
+    monkeypatch.setattr(compiled, "_build_compiled", counted)
+    return built
+
+
+def test_cache_hits_and_misses(raw_instance, builds, tmp_path):
+    rotations = BinaryInstance.from_raw(raw_instance(8)).rotations()[:4]
+    first = compiled.compile_instance(*rotations, cache_dir=str(tmp_path))
+    assert len(builds) == 1
+    assert not first.hamiltonian.flags.writeable
+
+    # A hit in memory returns the same object
+    assert compiled.compile_instance(*rotations, cache_dir=str(tmp_path)) is first
+
+    # A new process finds the instance on disk
+    compiled._MEMORY_CACHE.clear()
+    loaded = compiled.compile_instance(*rotations, cache_dir=str(tmp_path))
+    assert loaded is not first and len(builds) == 1
+    np.testing.assert_array_equal(loaded.hamiltonian, first.hamiltonian)
+
+    # A different instance misses both caches
+    _compile(raw_instance, 9)
+    assert len(builds) == 2 and builds[1] != builds[0]
+
+
+def test_cost_function_compiles_once(make_instance, builds):
+    instance = make_instance(8)
+    for angles in [[0.1, 0.2], [0.3, 0.4], [0.5, 0.6]]:
+        instance.cost_function(np.array(angles))
+    assert len(builds) == 1
+
+
+def test_memory_cache_bounded_by_bytes(raw_instance, monkeypatch):
+    monkeypatch.delenv(compiled.CACHE_DIR_ENV, raising=False)
+    monkeypatch.setattr(compiled, "_MEMORY_CACHE", compiled.OrderedDict())
+    # Room for the 9 and 10 qubit Hamiltonians (4 KiB + 8 KiB), not the 8 qubit one too
+    monkeypatch.setattr(compiled, "MEMORY_CACHE_BYTES", 12 * 1024)
+
+    for n_qubits in [8, 9, 10]:
+        _compile(raw_instance, n_qubits)
+    cached = [entry.n_qubits for entry in compiled._MEMORY_CACHE.values()]
+    assert cached == [9, 10]
+
+    # Hamiltonians larger than the whole budget are never kept
+    _compile(raw_instance, 11)
+    cached = [entry.n_qubits for entry in compiled._MEMORY_CACHE.values()]
+    assert cached == [9, 10]
@@ -0,0 +1,69 @@
+"""The evaluation cache answers repeated angles, including the final optimum, and
+keeps the instances sharing it apart"""
+
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from qaoa_three_sat.instance.evaluation_cache import EvaluationCache
+from qaoa_three_sat.utils.metrics import probabilities
+
+
+def test_cache_hits_skip_the_simulation(make_instance):
+    instance = make_instance(6)
+    instance.eval_cache = EvaluationCache()
+    angles = np.array([0.3, 0.7])
+    energy = instance.cost_function(angles)
+    statevector = instance.statevector
+
+    instance.cost_function(np.array([0.1, 0.2]))
+    assert instance.cost_function(angles + 1e-12) == energy
+    assert instance.statevector is statevector
+    assert (instance.eval_cache.hits, instance.eval_cache.misses) == (1, 2)
+    assert instance.classical_iter == 3
+
+
+def test_optimum_restored_from_cache(make_instance):
+    np.random.seed(0)
+    instance = make_instance(
+        6,
+        n_rounds=2,
+        alpha=[0.1, 0.2],
+        beta=[0.3, 0.4],
+        optimiser_opts={"xtol": 0.001, "disp": False, "adaptive": True, "budget": 40},
+    )
+    instance.eval_cache = EvaluationCache(max_statevectors=64)
+    simulations = []
+    simulate_circuit = instance.simulate_circuit
+
+    def counted():
+        simulations.append(list(instance.alpha + instance.beta))
+        simulate_circuit()
+
+    instance.simulate_circuit = counted
+    with contextlib.redirect_stdout(io.StringIO()):
+        instance.optimise_circuit()
+
+    # Every simulation was an optimiser evaluation, none at the end
+    assert len(simulations) == instance.eval_cache.misses
+    optimum = np.asarray(instance.optimiser.vars_vec)
+    assert instance.energy == pytest.approx(instance.evaluate_energy(optimum))
+    assert instance.energy == pytest.approx(
+        float(probabilities(instance.statevector) @ instance.hamiltonian)
+    )
+
+
+def test_shared_cache_keeps_instances_apart(make_instance):
+    cache = EvaluationCache()
+    first, second = make_instance(6), make_instance(7)
+    first.eval_cache = second.eval_cache = cache
+    angles = np.array([0.3, 0.7])
+
+    first.cost_function(angles)
+    assert second.cost_function(angles) == pytest.approx(
+        second.evaluate_energy(angles)
+    )
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert len(cache) == 2
@@ -0,0 +1,38 @@
+"""Generated instances have a single solution, and a Hamiltonian counting the
+violated clauses"""
+
+import numpy as np
+
+from qaoa_three_sat.instance.generator import (
+    CLAUSE_OFFSET,
+    count_solutions,
+    generate_instances,
+)
+
+N_QUBITS = 8
+
+
+def test_generated_hamiltonian_counts_clause_violations(raw_instance, hamiltonian):
+    raw = raw_instance(N_QUBITS)
+    hamiltonian = hamiltonian(N_QUBITS)
+
+    # Brute force: the number of clauses without exactly one true qubit
+    states = np.arange(2 ** N_QUBITS)
+    violations = sum(
+        sum((states >> qubit) & 1 for qubit in clause) != 1 for clause in raw["clauses"]
+    )
+    np.testing.assert_allclose(
+        hamiltonian, violations - CLAUSE_OFFSET * len(raw["clauses"]), atol=1e-12
+    )
+
+    sat_index = int(raw["sat_assgn"], 2)
+    assert np.flatnonzero(violations == 0).tolist() == [sat_index]
+    assert int(np.argmin(hamiltonian)) == sat_index
+
+
+def test_instances_unique_and_independent_of_workers():
+    serial = generate_instances(6, 5, seed=3, n_workers=1, chunk_size=2)
+    parallel = generate_instances(6, 5, seed=3, n_workers=2, chunk_size=2)
+    assert parallel == serial
+    for raw in serial:
+        assert count_solutions(np.array(raw["clauses"]), 6) == 1
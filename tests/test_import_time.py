@@ -0,0 +1,87 @@
+"""Import time budget of the core package
+
+Heavy dependencies are imported on first use, so importing the instance and
+simulation modules in a fresh interpreter must neither pull them in nor take
+longer than the budget, and a run on the native engine never imports qiskit.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+# Seconds allowed for importing the core modules in a fresh interpreter
+IMPORT_BUDGET = 3.0
+
+CORE_MODULES = [
+    "qaoa_three_sat.instance.three_sat",
+    "qaoa_three_sat.simulation.simulate",
+    "qaoa_three_sat.simulation.scheduler",
+]
+DEFERRED_MODULES = ["qiskit", "mlflow", "pandas", "cma", "matplotlib"]
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+for module in %r:
+    __import__(module)
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+RUN_SCRIPT = """
+import os, sys, tempfile
+from qaoa_three_sat.instance.generator import generate_instances, write_raw_instance
+from qaoa_three_sat.simulation.simulate import simulate_circuit
+instance_dir = tempfile.mkdtemp()
+write_raw_instance(
+    generate_instances(6, 1, n_workers=1)[0], os.path.join(instance_dir, "inst.json")
+)
+for backend in ["numpy", "numpy-large"]:
+    simulate_circuit(
+        instance_filename="inst",
+        classical_opt_alg="nelder-mead",
+        optimisation_opts={"classical_opt_alg": "nelder-mead", "xtol": 0.001,
+                           "disp": False, "adaptive": True, "budget": 20},
+        alpha_trial=[0.1],
+        beta_trial=[0.2],
+        n_rounds=1,
+        track_optimiser=True,
+        backend=backend,
+        cache_dir=instance_dir,
+        instance_dir=instance_dir,
+    )
+print("qiskit" in sys.modules)
+"""
+
+
+def _import_core():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT % (CORE_MODULES, DEFERRED_MODULES)],
+        cwd=root,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_heavy_dependencies_deferred():
+    assert _import_core()["loaded"] == []
+
+
+def test_import_time_budget():
+    assert _import_core()["seconds"] < IMPORT_BUDGET
+
+
+def test_native_run_skips_qiskit():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-c", RUN_SCRIPT],
+        cwd=root,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert output.strip().splitlines()[-1] == "False"
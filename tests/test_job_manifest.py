@@ -0,0 +1,25 @@
+"""Jobs of a manifest run their tasks on the backend they were sized for"""
+
+from qaoa_three_sat.utils.job_manifest import (
+    DEFAULT_BACKEND,
+    build_manifest,
+    job_commands,
+)
+
+PARAMS_FILES = {"nelder-mead_2000_1.json": {"n_rounds": 1, "budget": 2000}}
+
+
+def _tasks(manifest):
+    return [task for line in job_commands(manifest) for task in line.split()[3:]]
+
+
+def test_tasks_pass_the_predicted_backend():
+    manifest = build_manifest({"inst_a": 8}, PARAMS_FILES, backend=DEFAULT_BACKEND)
+    assert _tasks(manifest) == ["inst_a:nelder-mead_2000_1.json:True"]
+
+    manifest = build_manifest(
+        {"inst_a": 8}, PARAMS_FILES, backend="numpy-large:complex128"
+    )
+    assert _tasks(manifest) == [
+        "inst_a:nelder-mead_2000_1.json:True:numpy-large:complex128"
+    ]
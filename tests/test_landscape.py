@@ -0,0 +1,80 @@
+"""Energy landscapes match point by point evaluations, and are evaluated on the
+instance's own backend"""
+
+import numpy as np
+import pytest
+
+from qaoa_three_sat.simulation import landscape
+
+N_QUBITS = 6
+ALPHAS = np.linspace(-1, 1, 5)
+BETAS = np.linspace(-0.5, 0.5, 4)
+
+
+def test_landscape_matches_single_evaluations(make_instance):
+    instance = make_instance(N_QUBITS, n_rounds=2)
+    fixed_angles = [0.3, 0.0, -0.2, 0.0]
+    energies = landscape.compute_landscape(
+        instance, ALPHAS, BETAS, round_index=1, fixed_angles=fixed_angles
+    )
+    assert energies.shape == (len(ALPHAS), len(BETAS))
+
+    for i, alpha in enumerate(ALPHAS):
+        for j, beta in enumerate(BETAS):
+            angles = [0.3, alpha, -0.2, beta]
+            assert energies[i, j] == pytest.approx(instance.evaluate_energy(angles))
+
+    # Tiles of a single alpha row give the same landscape
+    tiled = landscape.compute_landscape(
+        instance,
+        ALPHAS,
+        BETAS,
+        round_index=1,
+        fixed_angles=fixed_angles,
+        max_memory=0,
+    )
+    np.testing.assert_allclose(tiled, energies)
+
+
+def test_adaptive_landscape_uses_the_instance_backend(make_instance, monkeypatch):
+    options = {"coarse_resolution": 5, "max_evaluations": 60, "output_resolution": 9}
+    expected = landscape.adaptive_landscape(make_instance(N_QUBITS), **options)
+
+    instance = make_instance(N_QUBITS, backend="numpy-large:complex128")
+    batches = []
+    evaluate_batch = instance.backend.evaluate_batch
+
+    def spy(angles, *args, **kwargs):
+        batches.append(len(angles))
+        return evaluate_batch(angles, *args, **kwargs)
+
+    def native(*args, **kwargs):
+        raise AssertionError("the native engine evaluated a numpy-large landscape")
+
+    monkeypatch.setattr(instance.backend, "evaluate_batch", spy)
+    monkeypatch.setattr(landscape, "evaluate_batch", native)
+    result = landscape.adaptive_landscape(instance, **options)
+
+    assert sum(batches) == len(result[1])
+    for array, expected_array in zip(result, expected):
+        np.testing.assert_allclose(array, expected_array, atol=1e-10)
+
+
+def test_parallel_landscape_matches_serial(make_instance):
+    instance = make_instance(N_QUBITS, n_rounds=2)
+    alphas, betas = np.linspace(-1, 1, 7), np.linspace(-0.5, 0.5, 5)
+    options = {"round_index": 1, "fixed_angles": [0.3, 0.0, -0.2, 0.0]}
+    serial = landscape.compute_landscape(instance, alphas, betas, **options)
+
+    # Tiles that do not divide the grid, completing in any order
+    for ordered in [True, False]:
+        parallel = landscape.parallel_landscape(
+            instance,
+            alphas,
+            betas,
+            n_workers=2,
+            tile_size=3,
+            ordered=ordered,
+            **options,
+        )
+        np.testing.assert_allclose(parallel, serial, atol=1e-12)
@@ -0,0 +1,133 @@
+"""State quality metrics agree with direct NumPy, for a single statevector and for
+a batch"""
+
+import numpy as np
+import pytest
+
+from qaoa_three_sat.utils import metrics
+
+# Three qubits, with ground states at indices 5 and 6 and two levels above
+HAMILTONIAN = np.array([2.0, 1.0, 3.0, 1.0, 2.0, 0.0, 0.0, 3.0])
+
+
+def _states(batch=None, seed=0):
+    rng = np.random.default_rng(seed)
+    shape = (8,) if batch is None else (batch, 8)
+    states = rng.normal(size=shape) + 1j * rng.normal(size=shape)
+    return states / np.linalg.norm(states, axis=-1, keepdims=True)
+
+
+@pytest.fixture(params=[None, 3], ids=["single", "batch"])
+def states(request):
+    return _states(request.param)
+
+
+def test_basis_index_and_bitstring():
+    assert metrics.basis_index("101") == 5
+    assert metrics.basis_index([1, 0, 1]) == 5
+    assert metrics.basis_index([0, 1, 1]) == 6
+    assert metrics.basis_bitstring(6, 3) == "110"
+    assert metrics.basis_index(metrics.basis_bitstring(6, 3)) == 6
+
+
+def test_p_success(states):
+    probs = np.abs(states) ** 2
+    np.testing.assert_allclose(metrics.p_success(states, "101"), probs[..., 5])
+    np.testing.assert_allclose(metrics.p_success(states, 6), probs[..., 6])
+    np.testing.assert_allclose(
+        metrics.p_success(states, ["101", 6]), probs[..., 5] + probs[..., 6]
+    )
+    assert np.shape(metrics.p_success(states, "101")) == states.shape[:-1]
+
+
+def test_energy_metrics(states):
+    energy = (np.abs(states) ** 2) @ HAMILTONIAN
+    np.testing.assert_allclose(metrics.expected_energy(states, HAMILTONIAN), energy)
+    np.testing.assert_allclose(
+        metrics.approximation_ratio(states, HAMILTONIAN), (3.0 - energy) / 3.0
+    )
+    np.testing.assert_allclose(metrics.expected_violations(states, HAMILTONIAN), energy)
+    np.testing.assert_allclose(
+        metrics.expected_violations(states, HAMILTONIAN, offset=-1.0), energy + 1.0
+    )
+
+
+def test_approximation_ratio_bounds():
+    ground = np.zeros(8, dtype=complex)
+    ground[5] = 1.0
+    highest = np.zeros(8, dtype=complex)
+    highest[7] = 1.0
+    np.testing.assert_allclose(
+        metrics.approximation_ratio(np.stack([ground, highest]), HAMILTONIAN), [1, 0]
+    )
+
+
+def test_flat_hamiltonian_has_ratio_one(states):
+    flat = np.full(8, 2.0)
+    ratio = metrics.approximation_ratio(states, flat)
+    np.testing.assert_array_equal(ratio, np.ones(states.shape[:-1]))
+    assert np.shape(ratio) == states.shape[:-1]
+    summary = metrics.state_metrics(states, flat, "101")
+    np.testing.assert_array_equal(summary["approximation_ratio"], ratio)
+
+
+def test_top_k_states(states):
+    probs = np.abs(states) ** 2
+    indices, top_probs = metrics.top_k_states(states, k=3)
+    assert indices.shape == top_probs.shape == states.shape[:-1] + (3,)
+    expected = np.argsort(-probs, axis=-1, kind="stable")[..., :3]
+    np.testing.assert_array_equal(indices, expected)
+    np.testing.assert_allclose(top_probs, np.take_along_axis(probs, expected, -1))
+
+
+def test_top_k_is_limited_to_the_number_of_states(states):
+    indices, top_probs = metrics.top_k_states(states, k=20)
+    assert indices.shape[-1] == 8
+    np.testing.assert_array_equal(
+        np.sort(indices, axis=-1), np.broadcast_to(np.arange(8), indices.shape)
+    )
+    assert np.all(np.diff(top_probs, axis=-1) <= 0)
+
+
+def test_energy_histogram(states):
+    probs = np.abs(states) ** 2
+    levels, histogram = metrics.energy_histogram(states, HAMILTONIAN)
+    np.testing.assert_array_equal(levels, [0.0, 1.0, 2.0, 3.0])
+    assert histogram.shape == states.shape[:-1] + (4,)
+    for level, column in zip(levels, np.moveaxis(histogram, -1, 0)):
+        np.testing.assert_allclose(
+            column, probs[..., HAMILTONIAN == level].sum(axis=-1)
+        )
+    np.testing.assert_allclose(histogram.sum(axis=-1), 1.0)
+
+
+def test_state_metrics_match_the_single_metrics(states):
+    solutions = ["101", "110"]
+    summary = metrics.state_metrics(states, HAMILTONIAN, solutions)
+    np.testing.assert_allclose(
+        summary["energy"], metrics.expected_energy(states, HAMILTONIAN)
+    )
+    np.testing.assert_allclose(
+        summary["p_success"], metrics.p_success(states, solutions)
+    )
+    np.testing.assert_allclose(
+        summary["approximation_ratio"],
+        metrics.approximation_ratio(states, HAMILTONIAN),
+    )
+    np.testing.assert_allclose(
+        summary["expected_violations"],
+        metrics.expected_violations(states, HAMILTONIAN),
+    )
+
+
+def test_batch_rows_match_single_states():
+    batch = _states(4, seed=1)
+    for name, function in [
+        ("p_success", lambda s: metrics.p_success(s, ["101", "110"])),
+        ("ratio", lambda s: metrics.approximation_ratio(s, HAMILTONIAN)),
+        ("top_k", lambda s: metrics.top_k_states(s, k=4)[0]),
+        ("histogram", lambda s: metrics.energy_histogram(s, HAMILTONIAN)[1]),
+    ]:
+        result = function(batch)
+        for row, state in enumerate(batch):
+            np.testing.assert_allclose(result[row], function(state), err_msg=name)
@@ -0,0 +1,121 @@
+"""Batches of the asynchronous MLFlow logger stay within the server's limits, a
+server that hangs does not hold up the run, and native runs log no circuit"""
+
+import atexit
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from qaoa_three_sat.instance.trace import OptimisationTrace
+from qaoa_three_sat.utils.mlflow_logger import AsyncMlflowLogger, log_qaoa_run
+
+# Batches are built from mlflow.entities
+pytest.importorskip("mlflow")
+
+# Limits of a single log_batch request on the MLFlow tracking server
+MAX_ENTITIES, MAX_METRICS, MAX_PARAMS, MAX_TAGS = 1000, 1000, 100, 100
+
+
+class ValidatingClient:
+    """Stands in for ``MlflowClient``, checking each batch as the server would"""
+
+    def __init__(self):
+        self.batches = []
+        self.artifacts = []
+
+    def log_batch(self, run_id, metrics=(), params=(), tags=()):
+        assert len(metrics) + len(params) + len(tags) <= MAX_ENTITIES
+        assert len(metrics) <= MAX_METRICS
+        assert len(params) <= MAX_PARAMS
+        assert len(tags) <= MAX_TAGS
+        self.batches.append((len(metrics), len(params)))
+
+    def log_artifact(self, run_id, path):
+        self.artifacts.append(os.path.basename(path))
+
+
+def test_long_trace_batches_within_limits(tmp_path):
+    trace = OptimisationTrace(n_rounds=1)
+    for energy in np.linspace(0, -1, 2500):
+        trace.append(np.array([0.1, 0.2]), energy)
+
+    client = ValidatingClient()
+    logger = AsyncMlflowLogger(
+        run_id="run", client=client, flush_interval=60, spool_dir=str(tmp_path)
+    )
+    logger.log_params({"param_%s" % i: i for i in range(150)})
+    logger.log_trace(trace)
+    logger.close()
+
+    assert not logger.spooling
+    assert sum(n_metrics for n_metrics, _ in client.batches) == 2500
+    assert sum(n_params for _, n_params in client.batches) == 150
+
+
+class HangingClient:
+    """Stands in for ``MlflowClient``, never answering until released"""
+
+    def __init__(self):
+        self.released = threading.Event()
+
+    def log_batch(self, run_id, metrics=(), params=(), tags=()):
+        self.released.wait()
+
+
+def test_hung_server_is_spooled(tmp_path):
+    client = HangingClient()
+    logger = AsyncMlflowLogger(
+        run_id="run",
+        client=client,
+        flush_interval=0.05,
+        slow_threshold=0.2,
+        spool_dir=str(tmp_path),
+    )
+    logger.log_metric("energy", -1.0, step=0)
+    time.sleep(0.1)
+    logger.log_metrics({"energy": -2.0}, step=1)
+
+    closer = threading.Thread(target=logger.close, daemon=True)
+    closer.start()
+    closer.join(2)
+    client.released.set()
+    assert not closer.is_alive()
+
+    assert logger.spooling
+    records = [
+        json.loads(line) for path in tmp_path.iterdir() for line in open(str(path))
+    ]
+    steps = [metric[3] for record in records for metric in record["metrics"]]
+    assert sorted(steps) == [0, 1]
+
+
+def test_closed_logger_is_released_at_exit(tmp_path, monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+    monkeypatch.setattr(atexit, "unregister", registered.remove)
+
+    logger = AsyncMlflowLogger(
+        run_id="run", client=ValidatingClient(), spool_dir=str(tmp_path)
+    )
+    assert registered == [logger.close]
+    logger.close()
+    assert registered == []
+
+
+def test_native_run_logs_no_circuit(make_instance, tmp_path):
+    instance = make_instance(6)
+    instance.cost_function([0.1, 0.2])
+    run_path = tmp_path / "params.json"
+    run_path.write_text("{}")
+
+    client = ValidatingClient()
+    logger = AsyncMlflowLogger(run_id="run", client=client, spool_dir=str(tmp_path))
+    log_qaoa_run(logger, instance, {"instance": "inst"}, run_path=str(run_path))
+    logger.close()
+
+    assert client.artifacts == ["params.json"]
+    assert instance.quantum_circuit is None
@@ -0,0 +1,74 @@
+"""Parallel Nelder-Mead restarts share a single evaluation budget, and every
+restart records its trace"""
+
+import contextlib
+import io
+import random
+
+import numpy as np
+import pytest
+
+from qaoa_three_sat.optimiser.nelder_mead import NelderMead
+from qaoa_three_sat.optimiser.parallel import SharedBudget
+
+
+def _quadratic(vars_vec):
+    return float(np.sum((np.asarray(vars_vec) - 0.5) ** 2))
+
+
+def test_shared_budget_is_taken_once():
+    budget = SharedBudget(3)
+    assert [budget.take() for _ in range(5)] == [True, True, True, False, False]
+    assert budget.spent
+
+
+def test_parallel_restarts_spend_the_budget_exactly():
+    evaluations = []
+    optimiser = NelderMead(
+        vars_vec=[0.0, 0.0],
+        cost_function=_quadratic,
+        options={
+            "xtol": 0.01,
+            "disp": False,
+            "adaptive": True,
+            "budget": 200,
+            "n_workers": 2,
+        },
+        callback=lambda vars_vec, cost: evaluations.append(cost),
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        optimiser.optimise()
+
+    # Restarts keep starting until the budget is spent, and never go over it
+    assert len(optimiser.restarts) > 2
+    assert len(evaluations) == sum(restart["nfev"] for restart in optimiser.restarts)
+    assert optimiser.iterations == optimiser.budget
+    assert optimiser.best_cost == pytest.approx(min(evaluations))
+    assert _quadratic(optimiser.vars_vec) == optimiser.best_cost
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_restarts_record_their_traces(n_workers, capsys):
+    random.seed(0)
+    optimiser = NelderMead(
+        vars_vec=[0.0, 0.0],
+        cost_function=_quadratic,
+        options={
+            "xtol": 0.01,
+            "disp": False,
+            "adaptive": True,
+            "budget": 100,
+            "n_workers": n_workers,
+        },
+    )
+    optimiser.optimise()
+
+    # Only the optimum is printed without disp
+    assert capsys.readouterr().out.count("\n") == 1
+    for restart in optimiser.restarts:
+        if restart["nfev"] == 0:
+            # Started as the shared budget ran out
+            continue
+        assert len(restart["trace_x"]) == len(restart["trace_f"]) == restart["nfev"]
+        np.testing.assert_allclose(restart["trace_x"][0], restart["x0"])
+        assert restart["fun"] == min(restart["trace_f"])
@@ -0,0 +1,42 @@
+"""The instance is left at the optimum after every optimiser and evaluator"""
+
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from qaoa_three_sat.utils.metrics import probabilities
+
+
+@pytest.mark.parametrize(
+    "classical_opt_alg, options",
+    [
+        ("nelder-mead", {"xtol": 0.001, "disp": False, "adaptive": True}),
+        ("cma-es", {"evaluator": "serial"}),
+        ("cma-es", {"evaluator": "batch"}),
+        ("cma-es", {"evaluator": "thread", "n_workers": 2}),
+        ("bfgs", {}),
+    ],
+)
+def test_final_state_is_optimum(make_instance, classical_opt_alg, options):
+    if classical_opt_alg == "cma-es":
+        pytest.importorskip("cma")
+    np.random.seed(0)
+    instance = make_instance(
+        8,
+        n_rounds=1,
+        classical_opt_alg=classical_opt_alg,
+        optimiser_opts=dict(options, budget=60),
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        instance.optimise_circuit()
+
+    optimum = np.asarray(instance.optimiser.vars_vec)
+    np.testing.assert_allclose(instance.alpha + instance.beta, optimum)
+    assert instance.energy == pytest.approx(instance.evaluate_energy(optimum))
+    assert instance.energy == pytest.approx(
+        float(probabilities(instance.statevector) @ instance.hamiltonian)
+    )
+    if classical_opt_alg != "bfgs":
+        assert instance.energy == pytest.approx(instance.trace.best_energy)
@@ -0,0 +1,97 @@
+"""Runs written to the results store read back the same before and after compaction,
+and each summary row describes a single point"""
+
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from qaoa_three_sat.utils.results_store import (
+    SUMMARY_TABLE,
+    TRACE_TABLE,
+    ResultsStore,
+    write_run,
+)
+
+
+def test_write_read_compact_round_trip(make_instance, tmp_path):
+    np.random.seed(0)
+    instance = make_instance(
+        6,
+        n_rounds=2,
+        alpha=[0.1, 0.2],
+        beta=[0.3, 0.4],
+        optimiser_opts={"xtol": 0.001, "disp": False, "adaptive": True, "budget": 30},
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        instance.optimise_circuit()
+
+    store = ResultsStore(str(tmp_path / "results"))
+    run_ids = [
+        write_run(store, instance, "inst_a.json", include_trace=True),
+        write_run(store, instance, "inst_a.json", include_trace=True),
+        write_run(store, instance, "inst_b.json"),
+    ]
+    assert store.partitions(SUMMARY_TABLE) == ["inst_a.json", "inst_b.json"]
+    assert store.partitions(TRACE_TABLE) == ["inst_a.json"]
+
+    summary = store.read(SUMMARY_TABLE)
+    assert sorted(summary["run_id"]) == sorted(run_ids)
+    metrics = instance.calculate_metrics()
+    np.testing.assert_allclose(summary["p_success"], metrics["p_success"])
+    np.testing.assert_allclose(summary["energy"], metrics["energy"])
+    for i, angle in enumerate(instance.alpha + instance.beta):
+        column = "alpha_%s" % i if i < 2 else "beta_%s" % (i - 2)
+        np.testing.assert_allclose(summary[column], angle)
+    assert summary["n_rounds"].tolist() == [2, 2, 2]
+    trace = store.read(TRACE_TABLE)
+    assert len(trace) == 2 * len(instance.trace)
+    assert set(trace["run_id"]) == set(run_ids[:2])
+
+    # Only the partition with several shards is merged
+    assert store.compact(SUMMARY_TABLE) == 2
+    assert store.compact(SUMMARY_TABLE) == 0
+    compacted = store.read(SUMMARY_TABLE).set_index("run_id")
+    summary = summary.set_index("run_id").loc[compacted.index]
+    assert compacted.equals(summary)
+    inst_b = store.read(SUMMARY_TABLE, partition="inst_b.json")
+    assert inst_b["run_id"].tolist() == [run_ids[2]]
+
+
+def test_write_run_uses_the_instance_state(make_instance, tmp_path, monkeypatch):
+    instance = make_instance(6)
+    instance.simulate_circuit()
+    instance.measure_energy()
+
+    def simulate(*args):
+        raise AssertionError("write_run simulated the circuit again")
+
+    monkeypatch.setattr(instance, "run_circuit", simulate)
+    monkeypatch.setattr(instance, "evaluate_energy", simulate)
+
+    store = ResultsStore(str(tmp_path))
+    write_run(store, instance, "inst_a.json")
+    summary = store.read(SUMMARY_TABLE)
+    assert summary["energy"][0] == pytest.approx(instance.energy)
+
+
+def test_summary_describes_one_point(make_instance, tmp_path):
+    instance = make_instance(6)
+    # Evaluate the best point first, so the trace's best is not the current one
+    points = sorted(
+        [np.array([0.4, 0.3]), np.array([0.1, 0.2])], key=instance.evaluate_energy
+    )
+    energies = [instance.cost_function(angles) for angles in points]
+    assert instance.trace.best_energy == energies[0] < energies[-1]
+
+    store = ResultsStore(str(tmp_path))
+    write_run(store, instance, "inst_a.json")
+    summary = store.read(SUMMARY_TABLE).iloc[0]
+    metrics = instance.calculate_metrics()
+    assert summary["energy"] == pytest.approx(energies[-1])
+    assert summary["p_success"] == pytest.approx(metrics["p_success"])
+    np.testing.assert_allclose(
+        [summary["alpha_0"], summary["beta_0"]],
+        instance.symmetry.canonical_angles(points[-1], 1),
+    )
@@ -0,0 +1,48 @@
+"""The diagonal Hamiltonian of the rotations in the qiskit qubit ordering"""
+
+from functools import reduce
+
+import numpy as np
+
+from qaoa_three_sat.rotation.rotations import Rotations
+from qaoa_three_sat.utils.qc_helpers import pauli_identity, pauli_z
+
+N_QUBITS = 4
+ROTATIONS = [
+    {"qubits": [0], "coefficient": 0.5},
+    {"qubits": [1, 3], "coefficient": -0.25},
+    {"qubits": [0, 2, 3], "coefficient": 0.75},
+]
+
+
+def _dense_hamiltonian(rotations, qubits):
+    """The Hamiltonian from Kronecker products with factors in the order of ``qubits``"""
+    return sum(
+        rotation["coefficient"]
+        * reduce(
+            np.kron,
+            [
+                pauli_z() if qubit in rotation["qubits"] else pauli_identity()
+                for qubit in qubits
+            ],
+        )
+        for rotation in rotations
+    )
+
+
+def test_diagonal_matches_kron_products():
+    rotations = Rotations(ROTATIONS, N_QUBITS)
+    rotations.build_hamiltonian()
+    # Qubit 0 is the least significant bit, the last factor of the products
+    dense = _dense_hamiltonian(ROTATIONS, range(N_QUBITS - 1, -1, -1))
+
+    np.testing.assert_array_equal(np.diag(np.diag(dense)), dense)
+    np.testing.assert_allclose(rotations.hamiltonian, np.diag(dense))
+    reversed_dense = _dense_hamiltonian(ROTATIONS, range(N_QUBITS))
+    assert not np.allclose(rotations.hamiltonian, np.diag(reversed_dense))
+
+    # Building the diagonal a slice at a time gives the same vector
+    sliced = np.zeros(2 ** N_QUBITS)
+    for start in range(0, 2 ** N_QUBITS, 4):
+        rotations.add_to_hamiltonian(sliced[start : start + 4], start)
+    np.testing.assert_array_equal(sliced, rotations.hamiltonian)
@@ -0,0 +1,72 @@
+"""A failing scheduler task ends its MLFlow run, so the next task can start one,
+and keeps its inputs in place to be retried"""
+
+import pytest
+
+from qaoa_three_sat.simulation.scheduler import move_completed, run_task
+
+
+def test_failed_task_ends_mlflow_run(tmp_path, monkeypatch):
+    mlflow = pytest.importorskip("mlflow")
+    monkeypatch.setenv("MLFLOW_ALLOW_FILE_STORE", "true")
+    params = {
+        "experiment": {
+            "tracking-uri": (tmp_path / "mlruns").as_uri(),
+            "name": "scheduler-test",
+        },
+        "classical_optimisation": {
+            "classical_opt_alg": "nelder-mead",
+            "optimisation_opts": "{'classical_opt_alg':'nelder-mead', 'budget':10}",
+            "alpha_trial": "[0]",
+            "beta_trial": "[0]",
+            "n_rounds": 1,
+        },
+    }
+    options = {
+        "params_dir": str(tmp_path),
+        "instance_dir": str(tmp_path),
+        "backend": "numpy",
+        "results_dir": str(tmp_path / "results"),
+        "store_trace": False,
+        "track_mlflow": True,
+        "quiet": True,
+    }
+
+    summaries = [run_task("missing", "p.json", params, options) for _ in range(2)]
+
+    assert all("error" in summary for summary in summaries)
+    assert "already active" not in summaries[1]["error"]
+    assert mlflow.active_run() is None
+    experiment = mlflow.get_experiment_by_name("scheduler-test")
+    runs = mlflow.search_runs(experiment_ids=[experiment.experiment_id])
+    assert list(runs["status"]) == ["FAILED", "FAILED"]
+
+
+def test_move_completed_keeps_failed_inputs(tmp_path):
+    params_dir, instance_dir = tmp_path / "ready", tmp_path / "raw"
+    params_complete, instance_complete = tmp_path / "params", tmp_path / "data"
+    for directory in [params_dir, instance_dir, params_complete, instance_complete]:
+        directory.mkdir()
+    for name in ["p1.json", "p2.json"]:
+        (params_dir / name).write_text("{}")
+    for name in ["a.json", "b.npz"]:
+        (instance_dir / name).write_text("")
+
+    summaries = [
+        {"instance": "a", "params_file": "p1.json"},
+        {"instance": "a", "params_file": "p2.json", "error": "Traceback"},
+        {"instance": "b", "params_file": "p1.json"},
+        {"instance": "b", "params_file": "p2.json"},
+    ]
+    moved = move_completed(
+        summaries,
+        str(params_dir),
+        str(instance_dir),
+        str(params_complete),
+        str(instance_complete),
+    )
+
+    assert moved == (["b"], ["p1.json"])
+    assert sorted(p.name for p in params_dir.iterdir()) == ["p2.json"]
+    assert sorted(p.name for p in instance_dir.iterdir()) == ["a.json"]
+    assert sorted(p.name for p in instance_complete.iterdir()) == ["b.npz"]
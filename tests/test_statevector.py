@@ -0,0 +1,108 @@
+"""The native NumPy engine agrees with qiskit and with its other references"""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+from scipy.linalg import expm
+
+from qaoa_three_sat.simulation.statevector import (
+    batch_chunk_size,
+    energy_and_gradient,
+    evaluate_batch,
+    simulate_qaoa,
+)
+from qaoa_three_sat.utils.metrics import probabilities
+
+N_QUBITS = 8
+ALPHA = [0.4, -1.1]
+BETA = [0.7, 0.3]
+
+
+def _energy(angles, hamiltonian):
+    state = simulate_qaoa(angles[:2], angles[2:], hamiltonian, N_QUBITS)
+    return float(probabilities(state) @ hamiltonian)
+
+
+def test_native_engine_matches_qiskit(make_instance):
+    quantum_info = pytest.importorskip("qiskit.quantum_info")
+    instance = make_instance(N_QUBITS, n_rounds=2, alpha=ALPHA, beta=BETA)
+    instance.build_circuit()
+    expected = quantum_info.Statevector(instance.quantum_circuit).data
+
+    instance.simulate_circuit()
+    # The rotation gates and the native phase differ by a global phase only
+    overlap = np.vdot(expected, instance.statevector)
+    assert abs(overlap) == pytest.approx(1, abs=1e-10)
+
+
+def test_native_engine_matches_dense_unitaries(hamiltonian):
+    hamiltonian = hamiltonian(N_QUBITS)
+    pauli_x = np.array([[0, 1], [1, 0]])
+    mixer = sum(
+        np.kron(
+            np.kron(np.eye(2 ** (N_QUBITS - qubit - 1)), pauli_x), np.eye(2 ** qubit)
+        )
+        for qubit in range(N_QUBITS)
+    )
+
+    # exp(i alpha H) then exp(-i beta/2 sum X) each round, from |+>^n
+    state = np.full(2 ** N_QUBITS, 2 ** (-N_QUBITS / 2), dtype=complex)
+    for alpha, beta in zip(ALPHA, BETA):
+        state = np.exp(1j * alpha * hamiltonian) * state
+        state = expm(-0.5j * beta * mixer) @ state
+    np.testing.assert_allclose(
+        simulate_qaoa(ALPHA, BETA, hamiltonian, N_QUBITS), state, atol=1e-12
+    )
+
+
+def test_batch_matches_single_evaluations(hamiltonian):
+    hamiltonian = hamiltonian(N_QUBITS)
+    rng = np.random.default_rng(0)
+    angles = rng.uniform(-np.pi, np.pi, size=(5, 4))
+    sat_index = int(np.argmin(hamiltonian))
+
+    energies, p_success = evaluate_batch(
+        angles, hamiltonian, N_QUBITS, sat_index=sat_index
+    )
+    # Evolving one row at a time gives the same energies
+    np.testing.assert_allclose(
+        evaluate_batch(angles, hamiltonian, N_QUBITS, max_memory=0), energies
+    )
+    for row, energy, p_sat in zip(angles, energies, p_success):
+        state = simulate_qaoa(row[:2], row[2:], hamiltonian, N_QUBITS)
+        assert energy == pytest.approx(_energy(row, hamiltonian))
+        assert p_sat == pytest.approx(abs(state[sat_index]) ** 2)
+
+
+def test_batch_stays_within_its_memory_budget():
+    n_qubits = 12
+    rng = np.random.default_rng(0)
+    hamiltonian = rng.integers(0, 5, size=2 ** n_qubits).astype(float)
+    angles = rng.uniform(-np.pi, np.pi, size=(40, 4))
+    max_memory = 2 ** 21
+    assert 1 < batch_chunk_size(n_qubits, max_memory) < len(angles)
+
+    tracemalloc.start()
+    try:
+        evaluate_batch(angles, hamiltonian, n_qubits, max_memory=max_memory)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Allowing for the small per-row arrays of angles and energies
+    assert peak < max_memory + 2 ** 14
+
+
+def test_adjoint_gradient_matches_finite_differences(hamiltonian):
+    hamiltonian = hamiltonian(N_QUBITS)
+    angles, step = np.array(ALPHA + BETA), 1e-6
+    energy, gradient = energy_and_gradient(ALPHA, BETA, hamiltonian, N_QUBITS)
+    assert energy == pytest.approx(_energy(angles, hamiltonian))
+
+    for i in range(len(angles)):
+        shift = np.zeros_like(angles)
+        shift[i] = step
+        difference = (
+            _energy(angles + shift, hamiltonian) - _energy(angles - shift, hamiltonian)
+        ) / (2 * step)
+        assert gradient[i] == pytest.approx(difference, abs=1e-6)
@@ -0,0 +1,97 @@
+"""The symmetries of an instance preserve its energy, and canonical angles lie in
+the fundamental domain and are the ones reported"""
+
+from math import pi
+
+import numpy as np
+import pytest
+
+from qaoa_three_sat.instance.symmetry import AngleSymmetry
+from qaoa_three_sat.simulation.statevector import simulate_qaoa
+from qaoa_three_sat.utils.metrics import probabilities
+from qaoa_three_sat.utils.results_store import SUMMARY_TABLE, ResultsStore, write_run
+
+
+ALPHA = [0.4, -1.1]
+BETA = [0.7, 0.3]
+
+
+def _energy(alpha, beta, hamiltonian):
+    state = simulate_qaoa(alpha, beta, hamiltonian, int(np.log2(len(hamiltonian))))
+    return float(probabilities(state) @ hamiltonian)
+
+
+def _in_domain(angles, symmetry, n_rounds):
+    return all(
+        low <= angle <= high
+        for angle, (low, high) in zip(angles, symmetry.domain(n_rounds))
+    )
+
+
+def test_symmetry_folding_preserves_energy(make_instance):
+    instance = make_instance(8, n_rounds=2)
+    instance.build_hamiltonian()
+    symmetry, hamiltonian = instance.symmetry, instance.hamiltonian
+    assert symmetry.alpha_period is not None
+    energy = _energy(ALPHA, BETA, hamiltonian)
+
+    shifted_alpha = [ALPHA[0] + symmetry.alpha_period, ALPHA[1]]
+    shifted_beta = [BETA[0], BETA[1] - symmetry.beta_period]
+    assert _energy(shifted_alpha, BETA, hamiltonian) == pytest.approx(energy)
+    assert _energy(ALPHA, shifted_beta, hamiltonian) == pytest.approx(energy)
+    reversed_alpha, reversed_beta = [-a for a in ALPHA], [-b for b in BETA]
+    assert _energy(reversed_alpha, reversed_beta, hamiltonian) == pytest.approx(energy)
+
+    canonical = symmetry.canonical_angles(
+        [-ALPHA[0] - 3 * symmetry.alpha_period, -ALPHA[1], -BETA[0], -BETA[1]], 2
+    )
+    assert _in_domain(canonical, symmetry, 2)
+    assert _energy(canonical[:2], canonical[2:], hamiltonian) == pytest.approx(energy)
+
+
+@pytest.mark.parametrize("alpha_0", [pi, -pi, 3 * pi])
+def test_leading_angle_on_the_period_edge(alpha_0):
+    symmetry = AngleSymmetry(alpha_period=2 * pi, beta_period=pi)
+    canonical = symmetry.canonical_angles([alpha_0, 0.3, 0.2, -0.4], 2)
+    assert canonical[0] == pytest.approx(pi)
+    assert _in_domain(canonical, symmetry, 2)
+
+
+def test_canonical_angles_in_domain():
+    rng = np.random.default_rng(0)
+    for symmetry in [
+        AngleSymmetry(alpha_period=2 * pi, beta_period=pi, flip_symmetric=True),
+        AngleSymmetry(alpha_period=4 * pi, beta_period=2 * pi),
+    ]:
+        for angles in rng.uniform(-10, 10, size=(200, 4)):
+            canonical = symmetry.canonical_angles(angles, 2)
+            assert _in_domain(canonical, symmetry, 2)
+            # Canonical angles are their own canonical form
+            np.testing.assert_allclose(
+                symmetry.canonical_angles(canonical, 2), canonical
+            )
+
+
+def test_reported_angles_are_canonical(make_instance, tmp_path):
+    instance = make_instance(6)
+    angles = np.array([-0.4, 0.3])
+    instance.cost_function(angles)
+    canonical = instance.symmetry.canonical_angles(angles, 1)
+    assert canonical[0] > 0
+
+    instance.generate_instance_df()
+    row = instance.d_instance.iloc[0]
+    np.testing.assert_allclose([row["alpha_0"], row["beta_0"]], canonical)
+
+    store = ResultsStore(str(tmp_path))
+    write_run(store, instance, "inst.json")
+    summary = store.read(SUMMARY_TABLE).iloc[0]
+    np.testing.assert_allclose([summary["alpha_0"], summary["beta_0"]], canonical)
+
+
+def test_aperiodic_alpha_is_not_wrapped():
+    symmetry = AngleSymmetry(alpha_period=None, beta_period=2 * pi)
+    # Only time reversal is removed, alpha stays outside the sampled range
+    canonical = symmetry.canonical_angles([-5.0, 0.3], 1)
+    np.testing.assert_allclose(canonical, [5.0, -0.3])
+    assert not _in_domain(canonical, symmetry, 1)
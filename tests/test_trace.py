@@ -0,0 +1,52 @@
+"""The optimisation trace grows with every evaluation, or keeps only the latest
+ones as a ring buffer"""
+
+import numpy as np
+
+from qaoa_three_sat.instance.trace import OptimisationTrace
+
+
+def _record(trace, n_evaluations):
+    energies = np.sin(np.arange(n_evaluations))
+    for i, energy in enumerate(energies):
+        trace.append(np.array([i, -i, 0.5 * i, -0.5 * i]), energy, p_success=i / 10)
+    return energies
+
+
+def test_trace_grows_past_its_capacity():
+    trace = OptimisationTrace(n_rounds=2, capacity=4)
+    energies = _record(trace, 11)
+
+    assert len(trace) == trace.n_recorded == 11
+    np.testing.assert_array_equal(trace.iterations, np.arange(11))
+    np.testing.assert_array_equal(trace.energies, energies)
+    np.testing.assert_array_equal(trace.alphas, [np.arange(11), -np.arange(11)])
+    np.testing.assert_array_equal(trace.betas[0], 0.5 * np.arange(11))
+    np.testing.assert_allclose(trace.p_success, np.arange(11) / 10)
+
+    best = int(np.argmin(energies))
+    assert (trace.best_iteration, trace.best_energy) == (best, energies[best])
+    np.testing.assert_array_equal(trace.best_angles, [best, -best, best / 2, -best / 2])
+
+
+def test_ring_buffer_keeps_the_latest_evaluations():
+    trace = OptimisationTrace(n_rounds=2, max_length=5)
+    trace.append(np.array([0.1, 0.2, 0.3, 0.4]), -5.0)
+    _record(trace, 2)
+    # Not yet wrapped around, the columns are views of the buffers
+    assert len(trace) == 3 and np.shares_memory(trace.energies, trace._energy)
+
+    energies = _record(trace, 12)
+    assert len(trace) == 5 and trace.n_recorded == 15
+    # The oldest evaluation is dropped first, the rest stay in order
+    np.testing.assert_array_equal(trace.iterations, np.arange(10, 15))
+    np.testing.assert_array_equal(trace.energies, energies[7:])
+    np.testing.assert_array_equal(trace.alphas[0], np.arange(7, 12))
+
+    frame = trace.to_dataframe()
+    assert frame["iteration"].tolist() == list(range(10, 15))
+    np.testing.assert_array_equal(frame["beta_1"], -0.5 * np.arange(7, 12))
+
+    # The best evaluation is remembered after it was overwritten
+    assert (trace.best_iteration, trace.best_energy) == (0, -5.0)
+    np.testing.assert_array_equal(trace.best_angles, [0.1, 0.2, 0.3, 0.4])
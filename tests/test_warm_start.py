@@ -0,0 +1,102 @@
+"""Warm starts extend the previous level's optimum by one round"""
+
+import contextlib
+import io
+from math import pi
+
+import numpy as np
+import pytest
+
+from qaoa_three_sat.instance.generator import write_raw_instance
+from qaoa_three_sat.instance.symmetry import AngleSymmetry
+from qaoa_three_sat.simulation import simulate
+from qaoa_three_sat.simulation.warm_start import (
+    extend_schedule,
+    fourier_basis,
+    interp_schedule,
+    split_budget,
+    unwrap_schedule,
+)
+
+
+def test_interp_and_fourier_schedules():
+    np.testing.assert_allclose(interp_schedule([0.5]), [0.5, 0.5])
+    np.testing.assert_allclose(interp_schedule([0.2, 0.4]), [0.2, 0.3, 0.4])
+
+    # Schedules made of the first Fourier mode keep that mode at p + 1
+    alpha, beta = extend_schedule(
+        fourier_basis(2, 1, "sin")[:, 0], fourier_basis(2, 1, "cos")[:, 0], "fourier"
+    )
+    np.testing.assert_allclose(alpha, fourier_basis(3, 1, "sin")[:, 0])
+    np.testing.assert_allclose(beta, fourier_basis(3, 1, "cos")[:, 0])
+
+    with pytest.raises(ValueError):
+        extend_schedule([0.1], [0.2], "linear")
+
+
+def test_split_budget_spends_the_run_budget():
+    assert split_budget(100, 1) == [100]
+    assert split_budget(100, 3) == [16, 33, 51]
+    assert split_budget(2, 3) == [1, 1, 1]
+    for budget in [10, 99, 1000]:
+        for n_rounds in [1, 2, 5]:
+            budgets = split_budget(budget, n_rounds)
+            assert len(budgets) == n_rounds and sum(budgets) == budget
+
+
+def test_wrapped_optimum_extends_smoothly():
+    symmetry = AngleSymmetry(alpha_period=2 * pi, beta_period=pi)
+    alpha, beta = [2.9, 3.5], [0.6, 1.8]
+    # The canonical form of this p = 2 optimum wraps its second round
+    canonical = symmetry.canonical_angles(alpha + beta, 2)
+    assert canonical[1] == pytest.approx(3.5 - 2 * pi)
+    assert canonical[3] == pytest.approx(1.8 - pi)
+
+    np.testing.assert_allclose(unwrap_schedule(canonical[:2], 2 * pi), alpha)
+    for method in ["interp", "fourier"]:
+        extended = extend_schedule(
+            canonical[:2], canonical[2:], method, symmetry=symmetry
+        )
+        np.testing.assert_allclose(extended, extend_schedule(alpha, beta, method))
+
+
+def test_warm_started_simulation(raw_instance, tmp_path, monkeypatch):
+    np.random.seed(0)
+    symmetries = []
+
+    def spy(alpha, beta, method, symmetry=None):
+        symmetries.append(symmetry)
+        return extend_schedule(alpha, beta, method, symmetry=symmetry)
+
+    monkeypatch.setattr(simulate, "extend_schedule", spy)
+    write_raw_instance(raw_instance(6), str(tmp_path / "inst.json"))
+    with contextlib.redirect_stdout(io.StringIO()):
+        instance = simulate.simulate_circuit(
+            instance_filename="inst",
+            classical_opt_alg="nelder-mead",
+            optimisation_opts={
+                "classical_opt_alg": "nelder-mead",
+                "xtol": 0.001,
+                "disp": False,
+                "adaptive": True,
+                "budget": 30,
+            },
+            alpha_trial=[0.1, 0.1],
+            beta_trial=[0.2, 0.2],
+            n_rounds=2,
+            track_optimiser=True,
+            backend="numpy",
+            warm_start="interp",
+            cache_dir=str(tmp_path),
+            instance_dir=str(tmp_path),
+        )
+
+    history = instance.warm_start_history
+    assert [level["n_rounds"] for level in history] == [1]
+    assert instance.n_rounds == 2
+    # The second level starts from the first level's optimum, unwrapped and extended
+    assert len(symmetries) == 1 and symmetries[0] is not None
+    seed = extend_schedule(
+        history[0]["alpha"], history[0]["beta"], "interp", symmetry=instance.symmetry
+    )
+    np.testing.assert_allclose(instance.trace.angles[:, 0], seed[0] + seed[1])